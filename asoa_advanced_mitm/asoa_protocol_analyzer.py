@@ -6,12 +6,35 @@ Targets real ASOA messaging system on UDP port 7400 with ucdr serialization
 
 import struct
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 import time
 
-class ASOAMessageType(Enum):
+from ucdr_handler import (
+    FieldOffsetCache, find_temperature_record, TEMPERATURE_TOPIC_ID, TEMPERATURE_TOPIC_NAME, TEMPERATURE_VALUE_OFFSET
+)
+from topic_locator import TopicLocator
+from packet_records import PacketRecordStore
+from checksum_engine import packet_checksum, xor_words
+from pcap_reader import PcapReader, DEFAULT_PORTS
+from flow_aggregation import FlowAggregate, FlowAggregator, iter_timestamped
+from flow_table import FlowTable
+from rtps_parser import RTPSParser, CDR_LE, is_rtps
+from fragment_reassembly import FragmentReassembler
+from topic_demux import TopicDemultiplexer
+from topic_registry import TopicRegistry
+
+_TEMPERATURE_VALUES = struct.Struct('<ff')
+
+# ASOA header: Magic(4) + Version(1) + Type(1) + ServiceID(2) + TargetID(2) +
+# SeqNum(4) + PayloadLen(4) + Checksum(4) + Timestamp(8) + padding(2)
+ASOA_HEADER_STRUCT = struct.Struct('<4sBBHHIIIQ2x')
+ASOA_HEADER_SIZE = ASOA_HEADER_STRUCT.size
+ASOA_MAGIC = b'ASOA'
+
+class ASOAMessageType(IntEnum):
     """ASOA Message Types based on protocol analysis"""
     SERVICE_DISCOVERY = 0x01
     GUARANTEE_DATA = 0x02
@@ -23,12 +46,22 @@ class ASOAMessageType(Enum):
     SENSOR_FUSION = 0x11
     OBSTACLE_DATA = 0x12
 
+# Raw type byte -> ASOAMessageType, None for types not in the enum
+MESSAGE_TYPE_TABLE: List[Optional[ASOAMessageType]] = [None] * 256
+for _message_type in ASOAMessageType:
+    MESSAGE_TYPE_TABLE[_message_type] = _message_type
+
+# Payload decoder: fills in an analysis dict from the packet payload
+PayloadDecoder = Callable[[Dict[str, Any], bytes], None]
+
 @dataclass
 class ASOAPacketHeader:
     """ASOA Packet Header Structure"""
+    __slots__ = ('magic', 'version', 'message_type', 'service_id', 'target_service_id',
+                 'sequence_number', 'payload_length', 'checksum', 'timestamp')
     magic: bytes  # Magic bytes (likely "ASOA")
     version: int  # Protocol version
-    message_type: ASOAMessageType
+    message_type: Union[ASOAMessageType, int]  # Raw type byte for types not in the enum
     service_id: int  # Source service ID
     target_service_id: int  # Destination service ID
     sequence_number: int
@@ -36,9 +69,28 @@ class ASOAPacketHeader:
     checksum: int
     timestamp: int
 
+    def pack_into(self, buffer, offset: int = 0):
+        """
+        Write the header into a writable buffer with the shared header codec
+        """
+        ASOA_HEADER_STRUCT.pack_into(
+            buffer, offset, self.magic, self.version, self.message_type, self.service_id,
+            self.target_service_id, self.sequence_number, self.payload_length, self.checksum, self.timestamp
+        )
+
+    def pack(self) -> bytes:
+        """
+        Serialize the header to its 32-byte wire form
+        """
+        return ASOA_HEADER_STRUCT.pack(
+            self.magic, self.version, self.message_type, self.service_id,
+            self.target_service_id, self.sequence_number, self.payload_length, self.checksum, self.timestamp
+        )
+
 @dataclass
 class ASOATemperatureData:
     """Temperature data structure within ASOA messages"""
+    __slots__ = ('topic_id', 'topic_name', 'temperature_value', 'accuracy', 'timestamp')
     topic_id: int
     topic_name: str
     temperature_value: float
@@ -62,40 +114,75 @@ class ASOAProtocolAnalyzer:
         }
         self.message_patterns = {}
         self.temperature_locations = []
+        self.offset_cache = FieldOffsetCache()
+        self.topic_registry = TopicRegistry(logger=self.logger)
+        self.topic_registry.load()
+        self.topic_locator = TopicLocator(self.topic_registry.by_id or None)
+        self.flow_table = FlowTable()
+        self.rtps_parser = RTPSParser(self.logger)
+        self.fragment_reassembler = FragmentReassembler(logger=self.logger)
+        self.topic_demux = TopicDemultiplexer(self.topic_registry, logger=self.logger)
+        self.topic_demux.load_legit_flows()
         
-    def analyze_packet(self, raw_data: bytes) -> Optional[Dict[str, Any]]:
+        # Per-type payload decoders and packet counts, indexed by the raw type byte
+        self.payload_decoders: List[Optional[PayloadDecoder]] = [None] * 256
+        self.message_type_counts = array('L', bytes(array('L').itemsize * 256))
+        self.register_decoder(ASOAMessageType.GUARANTEE_DATA, self._decode_sensor_payload)
+        self.register_decoder(ASOAMessageType.TEMPERATURE_DATA, self._decode_sensor_payload)
+        self.register_decoder(ASOAMessageType.SENSOR_FUSION, self._decode_topic_payload)
+        self.register_decoder(ASOAMessageType.OBSTACLE_DATA, self._decode_topic_payload)
+        
+    def register_decoder(self, message_type: Union[ASOAMessageType, int], decoder: Optional[PayloadDecoder]):
+        """
+        Register the payload decoder of a message type (any type byte, including ones not in
+        ASOAMessageType); None removes it. Decoders add their results to the analysis dict.
         """
-        Analyze raw ASOA packet and extract structured information
+        self.payload_decoders[int(message_type)] = decoder
+    
+    def analyze_packet(self, raw_data: bytes, timestamp: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze raw ASOA packet and extract structured information.
+        `timestamp` is the capture time, defaulting to now, used for flow health counters.
         """
         try:
+            if is_rtps(raw_data):
+                return self.analyze_rtps_packet(raw_data, timestamp)
+            
             if len(raw_data) < 32:  # Minimum ASOA header size
                 return None
                 
             # Parse ASOA header
-            header = self._parse_header(raw_data[:32])
+            header = self._parse_header(raw_data)
             if not header:
                 return None
                 
             # Extract payload
             payload = raw_data[32:32+header.payload_length]
             
+            message_type = int(header.message_type)
+            self.message_type_counts[message_type] += 1
+            self.flow_table.update(
+                (header.service_id, header.target_service_id, message_type), len(raw_data),
+                header.sequence_number, time.time() if timestamp is None else timestamp
+            )
+            
             # Analyze based on message type
             analysis = {
                 'header': header,
                 'payload': payload,
                 'message_type': header.message_type,
-                'source_service': self.known_services.get(header.service_id, f"Unknown-{header.service_id}"),
-                'target_service': self.known_services.get(header.target_service_id, f"Unknown-{header.target_service_id}"),
+                'source_service': self._service_name(header.service_id),
+                'target_service': self._service_name(header.target_service_id),
                 'timestamp': header.timestamp,
                 'sequence': header.sequence_number
             }
             
-            # Special handling for temperature data
-            if header.message_type == ASOAMessageType.GUARANTEE_DATA:
-                temp_data = self._extract_temperature_data(payload)
-                if temp_data:
-                    analysis['temperature_data'] = temp_data
-                    analysis['contains_temperature'] = True
+            # Stable flows keep a fixed payload layout
+            analysis['flow_key'] = (header.service_id, message_type, len(payload))
+            
+            decoder = self.payload_decoders[message_type]
+            if decoder is not None:
+                decoder(analysis, payload)
                     
             return analysis
             
@@ -103,37 +190,113 @@ class ASOAProtocolAnalyzer:
             self.logger.error(f"Failed to analyze ASOA packet: {e}")
             return None
     
-    def _parse_header(self, header_data: bytes) -> Optional[ASOAPacketHeader]:
+    def _decode_sensor_payload(self, analysis: Dict[str, Any], payload: bytes):
         """
-        Parse ASOA packet header
+        Temperature reading plus any registered topic records
         """
-        try:
-            # ASOA header structure (based on protocol analysis)
-            # Magic(4) + Version(1) + Type(1) + ServiceID(2) + TargetID(2) + 
-            # SeqNum(4) + PayloadLen(4) + Checksum(4) + Timestamp(8)
+        temp_data = self._extract_temperature_data(payload, analysis['flow_key'])
+        if temp_data:
+            analysis['temperature_data'] = temp_data
+            analysis['contains_temperature'] = True
+        self._decode_topic_payload(analysis, payload)
+    
+    def _decode_topic_payload(self, analysis: Dict[str, Any], payload: bytes):
+        """
+        Registered topic records
+        """
+        topic_data = self.decode_topics(payload)
+        if topic_data:
+            analysis['topic_data'] = topic_data
+    
+    def analyze_rtps_packet(self, raw_data: bytes, timestamp: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze an RTPS message; DATA payloads are decoded in place through memoryviews.
+        The analysis has 'header': None and 'protocol': 'rtps', with the parsed message under 'rtps'
+        and its DATA samples, followed by any samples its DATA_FRAGs completed, under 'samples'.
+        """
+        message = self.rtps_parser.parse(raw_data)
+        if message is None:
+            return None
+        
+        capture_time = time.time() if timestamp is None else timestamp
+        source_prefix = message.header.guid_prefix
+        destination = None
+        sequence = 0
+        sample_time = None
+        samples = list(message.samples)
+        for fragment in message.fragments:
+            sample = self.fragment_reassembler.add(fragment, capture_time)
+            if sample is not None:
+                samples.append(sample)
+        for sample in samples:
+            self.flow_table.update(
+                (int.from_bytes(sample.writer_guid_prefix, 'big'), sample.writer_id), len(raw_data),
+                sample.sequence_number, capture_time
+            )
+        if samples:
+            first = samples[0]
+            source_prefix, destination = first.writer_guid_prefix, first.destination
+            sequence, sample_time = first.sequence_number, first.timestamp
+        
+        analysis = {
+            'header': None,
+            'protocol': 'rtps',
+            'rtps': message,
+            'samples': samples,
+            'payload': raw_data[20:],
+            'message_type': None,
+            'source_service': self._rtps_participant_name(source_prefix),
+            'target_service': self._rtps_participant_name(destination) if destination else "Multicast",
+            # Microseconds, like the ASOA header timestamp
+            'timestamp': int(sample_time * 1e6) if sample_time is not None else 0,
+            'sequence': sequence
+        }
+        
+        topic_data = {}
+        demux = self.topic_demux
+        for index, sample in enumerate(samples):
+            if sample.payload is None or demux.learn(sample):
+                continue
+            route = demux.route(sample)
+            if route is None:
+                # Writer of unknown topic: scan the payload for topic records
+                for name, values in self.decode_topics(sample.payload).items():
+                    topic_data.setdefault(name, values)
+            elif sample.encapsulation == CDR_LE:
+                values = route.codec.unpack(sample.payload)
+                if values is not None:
+                    topic_data.setdefault(route.topic.name, values)
             
-            if len(header_data) < 32:
+            # Only temperature writers, or writers of unknown topic, can carry temperature
+            if 'temperature_data' not in analysis and (route is None or route.topic.topic_id == TEMPERATURE_TOPIC_ID):
+                flow_key = (sample.writer_guid_prefix, sample.writer_id, len(sample.payload))
+                temp_data = self._extract_temperature_data(sample.payload, flow_key)
+                if temp_data:
+                    analysis['temperature_data'] = temp_data
+                    analysis['contains_temperature'] = True
+                    analysis['temperature_sample'] = index
+        if topic_data:
+            analysis['topic_data'] = topic_data
+        return analysis
+    
+    def _parse_header(self, header_data, offset: int = 0) -> Optional[ASOAPacketHeader]:
+        """
+        Parse ASOA packet header with a single unpack_from (no slicing copies)
+        """
+        try:
+            if len(header_data) - offset < ASOA_HEADER_SIZE:
                 return None
-                
-            magic = header_data[:4]
-            if magic != b'ASOA':
-                # Try alternative magic bytes
-                if magic != b'\x41\x53\x4F\x41':  # ASCII "ASOA"
-                    return None
             
-            version = header_data[4]
-            msg_type = ASOAMessageType(header_data[5])
-            service_id = struct.unpack('<H', header_data[6:8])[0]
-            target_id = struct.unpack('<H', header_data[8:10])[0]
-            seq_num = struct.unpack('<I', header_data[10:14])[0]
-            payload_len = struct.unpack('<I', header_data[14:18])[0]
-            checksum = struct.unpack('<I', header_data[18:22])[0]
-            timestamp = struct.unpack('<Q', header_data[22:30])[0]
+            (magic, version, msg_type, service_id, target_id, seq_num,
+             payload_len, checksum, timestamp) = ASOA_HEADER_STRUCT.unpack_from(header_data, offset)
+            if magic != ASOA_MAGIC:
+                return None
             
+            message_type = MESSAGE_TYPE_TABLE[msg_type]
             return ASOAPacketHeader(
                 magic=magic,
                 version=version,
-                message_type=msg_type,
+                message_type=msg_type if message_type is None else message_type,
                 service_id=service_id,
                 target_service_id=target_id,
                 sequence_number=seq_num,
@@ -146,62 +309,109 @@ class ASOAProtocolAnalyzer:
             self.logger.error(f"Failed to parse ASOA header: {e}")
             return None
     
-    def _extract_temperature_data(self, payload: bytes) -> Optional[ASOATemperatureData]:
+    def _extract_temperature_data(self, payload: bytes,
+                                  flow_key: Optional[Tuple] = None) -> Optional[ASOATemperatureData]:
         """
         Extract temperature data from ucdr serialized payload
         """
         try:
-            # Look for temperature topic ID (15) in ucdr data
+            # Look for temperature topic ID (15) in ucdr data, reusing the offset cached for this flow
             # Temperature data structure: topic_id(4) + topic_name + temperature_value(4) + accuracy(4)
+            record_offset = self.offset_cache.locate(payload, flow_key, find_temperature_record)
+            if record_offset is None:
+                return None
             
-            # Search for temperature topic ID
-            temp_topic_id = 15  # From t_temperature.hpp
+            value_offset = record_offset + TEMPERATURE_VALUE_OFFSET
+            if value_offset + 4 > len(payload):
+                return None
             
-            # Find temperature data in payload
-            for i in range(len(payload) - 8):
-                # Check if this could be temperature data
-                if i + 4 <= len(payload):
-                    potential_topic_id = struct.unpack('<I', payload[i:i+4])[0]
-                    if potential_topic_id == temp_topic_id:
-                        # Extract temperature value (next 4 bytes after topic_id)
-                        if i + 8 <= len(payload):
-                            temp_value = struct.unpack('<f', payload[i+4:i+8])[0]
-                            
-                            # Try to extract accuracy (next 4 bytes)
-                            accuracy = 0.0
-                            if i + 12 <= len(payload):
-                                accuracy = struct.unpack('<f', payload[i+8:i+12])[0]
-                            
-                            return ASOATemperatureData(
-                                topic_id=temp_topic_id,
-                                topic_name="Temp",
-                                temperature_value=temp_value,
-                                accuracy=accuracy,
-                                timestamp=int(time.time())
-                            )
+            # Try to extract accuracy (next 4 bytes)
+            if value_offset + 8 <= len(payload):
+                temp_value, accuracy = _TEMPERATURE_VALUES.unpack_from(payload, value_offset)
+            else:
+                temp_value, accuracy = struct.unpack_from('<f', payload, value_offset)[0], 0.0
             
-            return None
+            return ASOATemperatureData(
+                topic_id=TEMPERATURE_TOPIC_ID,
+                topic_name=TEMPERATURE_TOPIC_NAME,
+                temperature_value=temp_value,
+                accuracy=accuracy,
+                timestamp=int(time.time())
+            )
             
         except Exception as e:
             self.logger.error(f"Failed to extract temperature data: {e}")
             return None
     
-    def identify_service_communication(self, packets: List[bytes]) -> Dict[str, Any]:
+    def identify_service_communication(self, packets: Iterable[bytes], compact: bool = False) -> Dict[str, Any]:
         """
-        Analyze multiple packets to identify service communication patterns
+        Analyze multiple packets (any iterable, e.g. a PcapReader generator) to identify service communication patterns.
+        With compact=True each flow is a PacketRecordStore instead of a list of
+        analysis dicts, for long captures held in memory.
         """
         service_flows = {}
+        # Flow names are formatted once per ID pair; IDs sharing a service name share a flow
+        flow_names = {}
         
         for packet in packets:
             analysis = self.analyze_packet(packet)
             if analysis:
-                flow_key = f"{analysis['source_service']}->{analysis['target_service']}"
-                if flow_key not in service_flows:
-                    service_flows[flow_key] = []
-                service_flows[flow_key].append(analysis)
+                header = analysis['header']
+                if header is None:
+                    flow_name = f"{analysis['source_service']}->{analysis['target_service']}"
+                else:
+                    flow_key = (header.service_id, header.target_service_id)
+                    flow_name = flow_names.get(flow_key)
+                    if flow_name is None:
+                        flow_name = flow_names[flow_key] = (
+                            f"{self._service_name(flow_key[0])}->{self._service_name(flow_key[1])}"
+                        )
+                flow = service_flows.get(flow_name)
+                if flow is None:
+                    flow = service_flows[flow_name] = PacketRecordStore() if compact else []
+                flow.append(analysis)
         
         return service_flows
     
+    def summarize_service_communication(self, packets: Iterable[Any], max_samples: int = 0,
+                                        temperature_only: bool = False) -> Dict[str, FlowAggregate]:
+        """
+        Streaming counterpart of identify_service_communication: consumes any iterable of
+        packets or (timestamp, packet) pairs and keeps only per-flow aggregates, plus at most
+        max_samples recent PacketRecords per flow
+        """
+        aggregator = FlowAggregator(max_samples)
+        for timestamp, packet in iter_timestamped(packets):
+            analysis = self.analyze_packet(packet, timestamp)
+            if analysis and (not temperature_only or analysis.get('contains_temperature')):
+                aggregator.add(analysis, timestamp, len(packet))
+        return aggregator.flows
+    
+    def summarize_temperature_flows(self, packets: Iterable[Any], max_samples: int = 0) -> Dict[str, FlowAggregate]:
+        """
+        Streaming counterpart of detect_temperature_flows
+        """
+        return self.summarize_service_communication(packets, max_samples, temperature_only=True)
+    
+    def analyze_capture(self, path: str, ports: Optional[Iterable[int]] = DEFAULT_PORTS,
+                        compact: bool = True) -> Dict[str, Any]:
+        """
+        Stream a pcap/pcapng capture through identify_service_communication.
+        Payloads are zero-copy views into the mapped file; compact flows copy what they keep.
+        """
+        with PcapReader(path, ports, self.logger) as reader:
+            service_flows = self.identify_service_communication(reader.payloads(), compact=compact)
+            self.logger.info(f"Analyzed {reader.stats['datagrams']} of {reader.stats['records']} records from {path}")
+        return service_flows
+    
+    def summarize_capture(self, path: str, ports: Optional[Iterable[int]] = DEFAULT_PORTS,
+                          max_samples: int = 0) -> Dict[str, FlowAggregate]:
+        """
+        Summarize a pcap/pcapng capture per flow in constant memory, using capture timestamps
+        """
+        with PcapReader(path, ports, self.logger) as reader:
+            return self.summarize_service_communication(reader, max_samples)
+    
     def detect_temperature_flows(self, packets: List[bytes]) -> List[Dict[str, Any]]:
         """
         Detect temperature data flows in ASOA communication
@@ -223,15 +433,12 @@ class ASOAProtocolAnalyzer:
             if len(packet) < 32:
                 return False
                 
-            header = self._parse_header(packet[:32])
+            header = self._parse_header(packet)
             if not header:
                 return False
             
-            # Calculate checksum (excluding checksum field itself)
-            data_for_checksum = packet[:18] + packet[22:]
-            calculated_checksum = self._calculate_checksum(data_for_checksum)
-            
-            return calculated_checksum == header.checksum
+            # Calculate checksum (excluding checksum field itself) without copying the packet
+            return packet_checksum(packet) == header.checksum
             
         except Exception as e:
             self.logger.error(f"Failed to validate checksum: {e}")
@@ -241,16 +448,71 @@ class ASOAProtocolAnalyzer:
         """
         Calculate ASOA packet checksum
         """
-        checksum = 0
-        for i in range(0, len(data), 4):
-            chunk = data[i:i+4]
-            if len(chunk) == 4:
-                checksum ^= struct.unpack('<I', chunk)[0]
+        return xor_words(data)
+    
+    def locate_topics(self, payload: bytes) -> List[Tuple[int, int]]:
+        """
+        Find (offset, topic_id) of every known topic ID in a payload in one pass
+        """
+        return self.topic_locator.find_all(payload)
+    
+    def decode_topics(self, payload: bytes) -> Dict[str, Dict[str, Any]]:
+        """
+        Decode every registered topic record found in a payload
+        """
+        topics = {}
+        for offset, topic_id in self.topic_locator.find_all(payload):
+            definition = self.topic_registry.by_id.get(topic_id)
+            if definition is None or definition.name in topics:
+                continue
+            values = self.topic_registry.codecs[definition.name].unpack(payload, offset)
+            # The embedded topic name guards against topic ID look-alikes in float data
+            if values is not None and values['topic_name'] == definition.topic_name:
+                topics[definition.name] = values
+        return topics
+    
+    def get_flow_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get live per-flow counters keyed by "source->target (message type)"
+        """
+        health = {}
+        for key, counters in self.flow_table.snapshot().items():
+            if len(key) == 2:
+                # RTPS flows are keyed by (writer GUID prefix, writer entity ID)
+                health[f"RTPS-{key[0]:024x}/{key[1]:08x}"] = counters
             else:
-                # Pad with zeros for incomplete chunks
-                padded = chunk + b'\x00' * (4 - len(chunk))
-                checksum ^= struct.unpack('<I', padded)[0]
-        return checksum
+                service_id, target_id, message_type = key
+                health[f"{self._service_name(service_id)}->{self._service_name(target_id)} ({message_type:#04x})"] = counters
+        return health
+    
+    def _rtps_participant_name(self, guid_prefix: bytes) -> str:
+        name = self.topic_demux.participants.get(guid_prefix)
+        return name if name is not None else f"RTPS-{guid_prefix.hex()}"
+    
+    def _service_name(self, service_id: int) -> str:
+        name = self.known_services.get(service_id)
+        return name if name is not None else f"Unknown-{service_id}"
+    
+    def get_reassembly_stats(self) -> Dict[str, int]:
+        """
+        Get RTPS DATA_FRAG reassembly counters
+        """
+        return self.fragment_reassembler.get_stats()
+    
+    def get_message_type_stats(self) -> Dict[str, int]:
+        """
+        Get ASOA packet counts per message type; types not in ASOAMessageType are named by their hex byte
+        """
+        return {
+            MESSAGE_TYPE_TABLE[raw].name if MESSAGE_TYPE_TABLE[raw] is not None else f"{raw:#04x}": count
+            for raw, count in enumerate(self.message_type_counts) if count
+        }
+    
+    def get_offset_cache_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters of the per-flow temperature offset cache
+        """
+        return self.offset_cache.get_stats()
     
     def get_service_mapping(self) -> Dict[int, str]:
         """
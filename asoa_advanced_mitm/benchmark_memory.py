@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark - Bytes per retained ASOA message
+Compares analysis dicts, PacketRecord tuples and the array-backed PacketRecordStore,
+each built from the packets inside the measurement so every figure includes the payload bytes
+"""
+
+import gc
+import sys
+import time
+import struct
+import logging
+import argparse
+import tracemalloc
+from typing import Callable, List
+
+from asoa_protocol_analyzer import ASOAProtocolAnalyzer
+from packet_records import PacketRecord, PacketRecordStore
+from ucdr_handler import UCDRHandler
+
+def build_packets(count: int) -> List[bytes]:
+    """
+    Build GUARANTEE_DATA temperature packets between the known services
+    """
+    ucdr = UCDRHandler()
+    packets = []
+    for index in range(count):
+        payload = ucdr.create_temperature_ucdr(20.0 + (index % 100) / 10.0)
+        header = bytearray(32)
+        header[0:4] = b'ASOA'
+        header[4] = 1
+        header[5] = 0x02
+        struct.pack_into('<HHIIIQ', header, 6, 1 + index % 5, 2, index, len(payload), 0,
+                         int(time.time() * 1000000) + index)
+        packets.append(bytes(header) + payload)
+    return packets
+
+def measure(label: str, retain: Callable[[], object], count: int) -> float:
+    """
+    Measure traced bytes held by the retained structure, per message
+    """
+    gc.collect()
+    tracemalloc.start()
+    retained = retain()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_message = size / count
+    print(f"{label:<32} {per_message:10.1f} bytes/message")
+    del retained
+    return per_message
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per retained ASOA message")
+    parser.add_argument('--messages', type=int, default=20000, help='Number of messages to retain')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    analyzer = ASOAProtocolAnalyzer()
+    packets = build_packets(args.messages)
+    # Warm up the analyzer's per-flow state so it is not charged to the first measurement
+    for packet in packets:
+        analyzer.analyze_packet(packet)
+
+    print(f"📏 Retaining {args.messages} messages ({len(packets[0])} bytes each on the wire)")
+    results = {
+        'analysis dicts': measure(
+            "analysis dicts (before)",
+            lambda: [analyzer.analyze_packet(packet) for packet in packets],
+            args.messages
+        ),
+        'records': measure(
+            "PacketRecord tuples",
+            lambda: [PacketRecord.from_analysis(analyzer.analyze_packet(packet)) for packet in packets],
+            args.messages
+        ),
+    }
+
+    def fill_store():
+        store = PacketRecordStore()
+        for packet in packets:
+            store.append(analyzer.analyze_packet(packet))
+        return store
+
+    results['store'] = measure("PacketRecordStore", fill_store, args.messages)
+    print(f"Reduction: {results['analysis dicts'] / results['store']:.1f}x with PacketRecordStore")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Callback Dispatcher - Modification callbacks off the packet path
+The packet path only enqueues a compact event on a bounded SimpleQueue ring; a worker
+thread drains it and delivers events to the callbacks in batches, so a slow callback no
+longer delays forwarding.
+"""
+
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+DISPATCH_POLICIES = ('drop', 'block')
+
+class ModificationEvent(NamedTuple):
+    """Compact modification record; shares its field names with ModifiedMessage"""
+    modification_type: str
+    original_value: Any
+    new_value: Any
+    timestamp: float
+    packet_size: int
+
+class CallbackDispatcher:
+    """
+    Bounded event ring drained by a worker thread that delivers batches to callbacks.
+    When the ring is full, the 'drop' policy counts and discards the new event and the
+    'block' policy waits for room; stop() wakes waiting producers, which then drop theirs.
+    """
+
+    def __init__(self, capacity: int = 4096, policy: str = 'drop', batch_size: int = 256, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.callbacks: List[Callable[[ModificationEvent], None]] = []
+        self.batch_callbacks: List[Callable[[List[ModificationEvent]], None]] = []
+        self.stats = {'submitted': 0, 'dropped': 0, 'delivered': 0, 'batches': 0, 'callback_errors': 0}
+        self._queue = queue.SimpleQueue()
+        # Free ring slots; the producer takes one per event, the worker returns them per batch
+        self._slots = threading.Semaphore(capacity)
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def register_callback(self, callback: Callable[[ModificationEvent], None]):
+        """
+        Register a callback called once per event, from the worker thread
+        """
+        self.callbacks.append(callback)
+
+    def register_batch_callback(self, callback: Callable[[List[ModificationEvent]], None]):
+        """
+        Register a callback called once per delivered batch, from the worker thread
+        """
+        self.batch_callbacks.append(callback)
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            if self._closed:
+                self._slots = threading.Semaphore(self.capacity)
+                self._closed = False
+            self._worker = threading.Thread(target=self._run, name='modification-callbacks', daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """
+        Deliver the events already queued, then stop the worker; later submits are dropped
+        """
+        self._closed = True
+        # Producers blocked on a full ring would otherwise wait forever for the worker
+        self._slots.release(self.capacity)
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join(timeout)
+        self._worker = None
+
+    def submit(self, event: ModificationEvent) -> bool:
+        """
+        Enqueue an event from the packet path; returns False if it was dropped
+        """
+        if self._closed or not self._slots.acquire(self.policy == 'block') or self._closed:
+            # Full ring under 'drop', or stopped (possibly while this producer was blocked)
+            self.stats['dropped'] += 1
+            return False
+        self.stats['submitted'] += 1
+        self._queue.put(event)
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get dispatch counters plus the number of queued events
+        """
+        stats = dict(self.stats)
+        stats['pending'] = stats['submitted'] - stats['delivered']
+        return stats
+
+    def _run(self):
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+        while True:
+            event = get()
+            if event is None:
+                return
+            batch = [event]
+            stopping = False
+            try:
+                while len(batch) < self.batch_size:
+                    event = get_nowait()
+                    if event is None:
+                        stopping = True
+                        break
+                    batch.append(event)
+            except queue.Empty:
+                pass
+            for _ in batch:
+                self._slots.release()
+            self._deliver(batch)
+            if stopping:
+                return
+
+    def _deliver(self, batch: List[ModificationEvent]):
+        for callback in self.batch_callbacks:
+            try:
+                callback(batch)
+            except Exception as e:
+                self.stats['callback_errors'] += 1
+                self.logger.error(f"Batch callback error: {e}")
+        for callback in self.callbacks:
+            for event in batch:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self.stats['callback_errors'] += 1
+                    self.logger.error(f"Callback error: {e}")
+        self.stats['delivered'] += len(batch)
+        self.stats['batches'] += 1
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Checksum Engine - Vectorized and incremental ASOA XOR checksum
+The checksum is the XOR of the little-endian uint32 words of packet[:18] + packet[22:],
+zero-padding the tail. Removing the 4-byte checksum field keeps every other byte in the
+word lane given by its packet offset modulo 4, so the checksum can be computed without
+building that concatenation and updated from just the bytes that changed.
+"""
+
+import struct
+from typing import Union
+
+import numpy as np
+
+CHECKSUM_OFFSET = 18
+CHECKSUM_SIZE = 4
+CHECKSUM_FIELD = struct.Struct('<I')
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+def xor_words(data: Buffer, offset: int = 0) -> int:
+    """
+    XOR-reduce data as little-endian uint32 words, zero-padding a partial tail.
+    `offset` is the position of data[0] in the packet; bytes keep their lane offset % 4.
+    """
+    length = len(data)
+    lead = (-offset) % 4
+    if lead >= length:
+        return int.from_bytes(data, 'little') << (8 * (offset % 4))
+
+    checksum = int.from_bytes(data[:lead], 'little') << (8 * (offset % 4)) if lead else 0
+    count = (length - lead) // 4
+    if count:
+        words = np.frombuffer(data, dtype='<u4', count=count, offset=lead)
+        checksum ^= int(np.bitwise_xor.reduce(words))
+    tail = lead + count * 4
+    if tail < length:
+        checksum ^= int.from_bytes(data[tail:], 'little')
+    return checksum
+
+def packet_checksum(packet: Buffer) -> int:
+    """
+    Compute the checksum of a packet without copying it
+    """
+    checksum = xor_words(packet)
+    if len(packet) >= CHECKSUM_OFFSET + CHECKSUM_SIZE:
+        # Cancel the checksum field's own contribution
+        checksum ^= xor_words(packet[CHECKSUM_OFFSET:CHECKSUM_OFFSET + CHECKSUM_SIZE], CHECKSUM_OFFSET)
+    elif len(packet) > CHECKSUM_OFFSET:
+        checksum ^= xor_words(packet[CHECKSUM_OFFSET:], CHECKSUM_OFFSET)
+    return checksum
+
+def update_checksum(checksum: int, offset: int, old: Buffer, new: Buffer) -> int:
+    """
+    Update a checksum after the bytes at packet `offset` changed from `old` to `new`.
+    Costs O(len(old)) rather than a pass over the packet; the range must not overlap
+    the checksum field.
+    """
+    if len(old) != len(new):
+        raise ValueError("Incremental checksum update needs equal-length old and new bytes")
+    if len(old) <= 8:
+        delta = int.from_bytes(old, 'little') ^ int.from_bytes(new, 'little')
+        return checksum ^ _fold(delta << (8 * (offset % 4)))
+    return checksum ^ xor_words(old, offset) ^ xor_words(new, offset)
+
+def update_checksum_field(checksum: int, offset: int, old_value: int, new_value: int) -> int:
+    """
+    Update a checksum after the little-endian integer field at packet `offset` changed
+    from `old_value` to `new_value`, without materializing the bytes
+    """
+    return checksum ^ _fold((old_value ^ new_value) << (8 * (offset % 4)))
+
+def write_checksum(packet: Union[bytearray, memoryview], checksum: int):
+    """
+    Store a checksum in a writable packet buffer
+    """
+    CHECKSUM_FIELD.pack_into(packet, CHECKSUM_OFFSET, checksum)
+
+def read_checksum(packet: Buffer) -> int:
+    """
+    Read the checksum stored in a packet header
+    """
+    return CHECKSUM_FIELD.unpack_from(packet, CHECKSUM_OFFSET)[0]
+
+def _fold(value: int) -> int:
+    """
+    XOR the 32-bit words of a small non-negative integer together
+    """
+    checksum = 0
+    while value:
+        checksum ^= value & 0xFFFFFFFF
+        value >>= 32
+    return checksum
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Columnar Export - Analyzed traffic written once as typed column files
+A 'packets' table holds one row per analyzed packet and every decoded topic gets its own
+table. Columns are contiguous typed arrays written in fixed-size batches, as .npz files or,
+when pyarrow is installed, as one Arrow IPC file per table. Captures are collected per shard
+during the parallel analysis pass and the shard tables written in order. load_columns()
+reads them back without touching the capture again.
+"""
+
+import os
+import json
+import math
+import logging
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from pcap_reader import DEFAULT_PORTS
+from parallel_analysis import SERIES_COLUMNS, ParallelCaptureAnalyzer
+
+PACKETS_TABLE = 'packets'
+MANIFEST_NAME = 'manifest.json'
+EXPORT_FORMATS = ('auto', 'npz', 'arrow')
+
+# Leading columns of every topic table
+TOPIC_COLUMNS = {
+    'timestamp': 'd',
+    'service_id': 'H',
+    'sequence_number': 'I'
+}
+
+class _TableBatch:
+    """
+    Typed array columns of the rows accumulated since the last flush
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns: Dict[str, str]):
+        self.columns = {name: array(typecode) for name, typecode in columns.items()}
+        self.rows = 0
+
+    def reset(self):
+        self.columns = {name: array(column.typecode) for name, column in self.columns.items()}
+        self.rows = 0
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        # Zero-copy: reset() replaces the arrays instead of reusing them
+        return {name: np.frombuffer(column, dtype=column.typecode) for name, column in self.columns.items()}
+
+class ColumnarTables:
+    """
+    Packets and topic tables of analyze_packet() results, accumulated in memory.
+    Used as the parallel analyzer's collector to gather one capture shard per worker.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, _TableBatch] = {PACKETS_TABLE: _TableBatch(SERIES_COLUMNS)}
+
+    def add(self, analysis: Dict[str, Any], timestamp: Optional[float] = None):
+        """
+        Append one analyzed packet; without a capture timestamp the header's microsecond timestamp is used
+        """
+        if timestamp is None:
+            timestamp = analysis['timestamp'] / 1e6
+        header = analysis['header']
+        if header is None:
+            # RTPS message: no ASOA service IDs or message type
+            service_id, target_service_id, message_type = 0, 0, 0
+            sequence_number = analysis['sequence'] & 0xFFFFFFFF
+        else:
+            service_id, target_service_id = header.service_id, header.target_service_id
+            message_type, sequence_number = int(header.message_type), header.sequence_number
+
+        packets = self.tables[PACKETS_TABLE]
+        columns = packets.columns
+        columns['timestamp'].append(timestamp)
+        columns['service_id'].append(service_id)
+        columns['target_service_id'].append(target_service_id)
+        columns['message_type'].append(message_type)
+        columns['sequence_number'].append(sequence_number)
+        packets.rows += 1
+        self._added(PACKETS_TABLE)
+
+        for topic, fields in analysis.get('topic_data', {}).items():
+            table = self.tables.get(topic)
+            if table is None:
+                table = self.tables[topic] = self._topic_table(fields)
+            columns = table.columns
+            columns['timestamp'].append(timestamp)
+            columns['service_id'].append(service_id)
+            columns['sequence_number'].append(sequence_number)
+            for name, column in columns.items():
+                if name not in TOPIC_COLUMNS:
+                    value = fields.get(name)
+                    column.append(value if isinstance(value, (int, float)) else _missing(column.typecode))
+            table.rows += 1
+            self._added(topic)
+
+    def to_numpy(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Get the accumulated rows as {table: {column: array}}, leaving out empty tables
+        """
+        return {name: table.to_numpy() for name, table in self.tables.items() if table.rows}
+
+    def _added(self, name: str):
+        pass
+
+    def _topic_table(self, fields: Dict[str, Any]) -> _TableBatch:
+        """
+        Topic table columns: the leading columns, then float64 or int64 per numeric field
+        """
+        columns = dict(TOPIC_COLUMNS)
+        for name, value in fields.items():
+            if name == 'topic_id' or isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            columns[name] = 'q' if isinstance(value, int) else 'd'
+        return _TableBatch(columns)
+
+class ColumnarExporter(ColumnarTables):
+    """
+    Streams analyze_packet() results or collected shard tables into per-table column files in fixed-size batches
+    """
+
+    def __init__(self, directory: str, batch_size: int = 65536, format: str = 'auto', logger=None):
+        super().__init__()
+        self.logger = logger or logging.getLogger(__name__)
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        if format == 'auto':
+            format = 'npz' if pa is None else 'arrow'
+        elif format == 'arrow' and pa is None:
+            self.logger.warning("pyarrow is not installed, exporting .npz batches instead")
+            format = 'npz'
+        self.format = format
+        self.directory = directory
+        self.batch_size = batch_size
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self._writers: Dict[str, Any] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def extend(self, tables: Dict[str, Dict[str, np.ndarray]]):
+        """
+        Append tables gathered by a ColumnarTables collector, batched exactly as add() would.
+        A table's columns are fixed by its first rows; later columns it lacks are dropped
+        and columns missing from the appended rows are filled like absent fields.
+        """
+        for name, values in tables.items():
+            table = self.tables.get(name)
+            if table is None:
+                table = self.tables[name] = _TableBatch({column: data.dtype.char for column, data in values.items()})
+            rows = len(values['timestamp'])
+            start = 0
+            while start < rows:
+                end = min(rows, start + self.batch_size - table.rows)
+                for column_name, column in table.columns.items():
+                    source = values.get(column_name)
+                    if source is None:
+                        column.extend([_missing(column.typecode)] * (end - start))
+                    else:
+                        column.frombytes(source[start:end].astype(column.typecode, copy=False).tobytes())
+                table.rows += end - start
+                start = end
+                self._added(name)
+
+    def flush(self):
+        """
+        Write every table's pending rows as a (possibly short) batch
+        """
+        for name in list(self.tables):
+            self._flush_table(name)
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Flush, close Arrow writers and write the manifest; returns the per-table manifest
+        """
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        with open(os.path.join(self.directory, MANIFEST_NAME), 'w') as f:
+            json.dump({'format': self.format, 'batch_size': self.batch_size, 'tables': self.manifest}, f, indent=2)
+        return self.manifest
+
+    def _added(self, name: str):
+        if self.tables[name].rows >= self.batch_size:
+            self._flush_table(name)
+
+    def _flush_table(self, name: str):
+        table = self.tables[name]
+        if not table.rows:
+            return
+        columns = table.to_numpy()
+        entry = self.manifest.get(name)
+        if entry is None:
+            entry = self.manifest[name] = {
+                'rows': 0,
+                'files': [],
+                'columns': {column: str(values.dtype) for column, values in columns.items()}
+            }
+
+        if self.format == 'arrow':
+            batch = pa.record_batch([pa.array(values) for values in columns.values()], names=list(columns))
+            writer = self._writers.get(name)
+            if writer is None:
+                file_name = f"{name}.arrow"
+                writer = self._writers[name] = pa.ipc.new_file(os.path.join(self.directory, file_name), batch.schema)
+                entry['files'].append(file_name)
+            writer.write_batch(batch)
+        else:
+            file_name = f"{name}-{len(entry['files']):05d}.npz"
+            np.savez(os.path.join(self.directory, file_name), **columns)
+            entry['files'].append(file_name)
+
+        entry['rows'] += table.rows
+        table.reset()
+
+def _missing(typecode: str):
+    return math.nan if typecode == 'd' else 0
+
+def load_columns(directory: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Load an export as {table: {column: array}}, concatenating its batches
+    """
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+
+    tables = {}
+    for name, entry in manifest['tables'].items():
+        parts: List[Dict[str, np.ndarray]] = []
+        for file_name in entry['files']:
+            path = os.path.join(directory, file_name)
+            if manifest['format'] == 'arrow':
+                if pa is None:
+                    raise ImportError("pyarrow is required to load Arrow exports")
+                table = pa.ipc.open_file(path).read_all()
+                parts.append({column: table.column(column).to_numpy() for column in table.column_names})
+            else:
+                with np.load(path) as batch:
+                    parts.append({column: batch[column] for column in batch.files})
+        tables[name] = {
+            column: np.concatenate([part[column] for part in parts]) if parts else np.empty(0, dtype=dtype)
+            for column, dtype in entry['columns'].items()
+        }
+    return tables
+
+def export_tables(parts: Iterable[Dict[str, Dict[str, np.ndarray]]], directory: str, batch_size: int = 65536,
+                  format: str = 'auto', logger=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Write tables collected per capture shard, in shard order, as one columnar export
+    """
+    with ColumnarExporter(directory, batch_size, format, logger) as exporter:
+        for tables in parts:
+            exporter.extend(tables)
+    return exporter.manifest
+
+def export_capture(path: str, directory: str, ports: Optional[Iterable[int]] = DEFAULT_PORTS,
+                   batch_size: int = 65536, format: str = 'auto', workers: Optional[int] = 1,
+                   logger=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyze a pcap/pcapng capture, sharded across `workers` processes, into a columnar export
+    """
+    logger = logger or logging.getLogger(__name__)
+    result = ParallelCaptureAnalyzer(workers, ports, collector=ColumnarTables, logger=logger).analyze(path)
+    manifest = export_tables(result['collected'], directory, batch_size, format, logger)
+    logger.info(f"Exported {manifest.get(PACKETS_TABLE, {}).get('rows', 0)} packets from {path} to {directory}")
+    return manifest
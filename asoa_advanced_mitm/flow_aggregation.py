@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Flow Aggregation - Constant-memory per-flow summaries of analyzed ASOA traffic
+Keeps counters and running value statistics per flow instead of every analysis dict
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from packet_records import PacketRecord
+
+class RunningStats:
+    """
+    Count, min, max, mean and variance of a stream of values (Welford), mergeable across shards
+    """
+
+    __slots__ = ('count', 'minimum', 'maximum', 'mean', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def merge(self, other: 'RunningStats'):
+        """
+        Fold another accumulator into this one
+        """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'min': self.minimum if self.count else None,
+            'max': self.maximum if self.count else None,
+            'mean': self.mean if self.count else None,
+            'std': math.sqrt(self.variance) if self.count else None
+        }
+
+class FlowAggregate:
+    """
+    Summary of one service flow: counters, time span, sequence gaps and decoded value statistics
+    """
+
+    __slots__ = ('flow', 'packets', 'bytes', 'first_timestamp', 'last_timestamp', 'first_sequence',
+                 'last_sequence', 'sequence_gaps', 'out_of_order', 'values', 'samples')
+
+    def __init__(self, flow: str, max_samples: int = 0):
+        self.flow = flow
+        self.packets = 0
+        self.bytes = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.first_sequence = None
+        self.last_sequence = None
+        self.sequence_gaps = 0
+        self.out_of_order = 0
+        self.values: Dict[str, RunningStats] = {}
+        self.samples = deque(maxlen=max_samples) if max_samples else None
+
+    def update(self, analysis: Dict[str, Any], timestamp: float, size: int):
+        """
+        Account one analyzed packet
+        """
+        self.packets += 1
+        self.bytes += size
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+        sequence = analysis['sequence']
+        if self.first_sequence is None:
+            self.first_sequence = sequence
+        last_sequence = self.last_sequence
+        if last_sequence is None or sequence > last_sequence:
+            if last_sequence is not None and sequence > last_sequence + 1:
+                self.sequence_gaps += sequence - last_sequence - 1
+            self.last_sequence = sequence
+        else:
+            self.out_of_order += 1
+
+        for name, value in _decoded_values(analysis):
+            stats = self.values.get(name)
+            if stats is None:
+                stats = self.values[name] = RunningStats()
+            stats.add(value)
+
+        if self.samples is not None:
+            self.samples.append(PacketRecord.from_analysis(analysis))
+
+    def merge(self, other: 'FlowAggregate'):
+        """
+        Fold the aggregate of the same flow from a later part of the capture into this one.
+        Exact for in-order streams; packets the later part saw as in order after a sequence
+        jump in this part are not reclassified as out of order.
+        """
+        # Account the boundary between the two parts as if they had been streamed together
+        if self.last_sequence is not None and other.first_sequence is not None:
+            if other.first_sequence > self.last_sequence + 1:
+                self.sequence_gaps += other.first_sequence - self.last_sequence - 1
+            elif other.first_sequence <= self.last_sequence:
+                self.out_of_order += 1
+        if self.first_sequence is None:
+            self.first_sequence = other.first_sequence
+        self.packets += other.packets
+        self.bytes += other.bytes
+        if other.first_timestamp is not None:
+            if self.first_timestamp is None or other.first_timestamp < self.first_timestamp:
+                self.first_timestamp = other.first_timestamp
+            if self.last_timestamp is None or other.last_timestamp > self.last_timestamp:
+                self.last_timestamp = other.last_timestamp
+        if other.last_sequence is not None and (self.last_sequence is None or other.last_sequence > self.last_sequence):
+            self.last_sequence = other.last_sequence
+        self.sequence_gaps += other.sequence_gaps
+        self.out_of_order += other.out_of_order
+        for name, stats in other.values.items():
+            if name not in self.values:
+                self.values[name] = RunningStats()
+            self.values[name].merge(stats)
+        if self.samples is not None and other.samples is not None:
+            self.samples.extend(other.samples)
+
+    @property
+    def duration(self) -> float:
+        if self.first_timestamp is None:
+            return 0.0
+        return self.last_timestamp - self.first_timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = {
+            'flow': self.flow,
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'first_timestamp': self.first_timestamp,
+            'last_timestamp': self.last_timestamp,
+            'duration': self.duration,
+            'sequence_gaps': self.sequence_gaps,
+            'out_of_order': self.out_of_order,
+            'values': {name: stats.to_dict() for name, stats in self.values.items()}
+        }
+        if self.samples is not None:
+            summary['samples'] = len(self.samples)
+        return summary
+
+class FlowAggregator:
+    """
+    Streams analyzed packets into per-flow aggregates with bounded memory
+    """
+
+    def __init__(self, max_samples: int = 0):
+        self.max_samples = max_samples
+        self.flows: Dict[str, FlowAggregate] = {}
+
+    def add(self, analysis: Dict[str, Any], timestamp: Optional[float] = None, size: Optional[int] = None):
+        """
+        Account an analyze_packet() result; without a capture timestamp the header's
+        microsecond timestamp is used
+        """
+        flow = f"{analysis['source_service']}->{analysis['target_service']}"
+        aggregate = self.flows.get(flow)
+        if aggregate is None:
+            aggregate = self.flows[flow] = FlowAggregate(flow, self.max_samples)
+        if timestamp is None:
+            timestamp = analysis['timestamp'] / 1e6
+        if size is None:
+            size = 32 + len(analysis['payload'])
+        aggregate.update(analysis, timestamp, size)
+
+    def merge(self, other: 'FlowAggregator'):
+        """
+        Fold another aggregator's flows into this one
+        """
+        for flow, aggregate in other.flows.items():
+            if flow in self.flows:
+                self.flows[flow].merge(aggregate)
+            else:
+                self.flows[flow] = aggregate
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {flow: aggregate.to_dict() for flow, aggregate in sorted(self.flows.items())}
+
+def iter_timestamped(packets: Iterable[Any]) -> Iterator[Tuple[Optional[float], Any]]:
+    """
+    Normalize an iterable of packets or (timestamp, packet) pairs, such as a PcapReader
+    """
+    for item in packets:
+        if isinstance(item, tuple):
+            yield item
+        else:
+            yield None, item
+
+def _decoded_values(analysis: Dict[str, Any]) -> Iterator[Tuple[str, float]]:
+    """
+    Numeric values decoded from a packet, named topic.field
+    """
+    temperature_data = analysis.get('temperature_data')
+    if temperature_data is not None:
+        yield 'temperature', temperature_data.temperature_value
+    for topic, fields in analysis.get('topic_data', {}).items():
+        for name, value in fields.items():
+            if name != 'topic_id' and isinstance(value, (int, float)):
+                yield f"{topic}.{name}", value
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Fragment Reassembly - Bounded-memory RTPS DATA_FRAG reassembly
+Each fragmented sample gets one buffer of its announced size, and fragments are copied
+into place through memoryview slices. Incomplete samples are evicted least recently
+updated first, on a memory cap or after a timeout.
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from rtps_parser import RTPSFragment, RTPSSample, ENCAPSULATION_SIZE, ENCAPSULATION_HEADER
+
+SampleKey = Tuple[bytes, int, int]  # (writer GUID prefix, writer entity ID, sequence number)
+
+class PartialSample:
+    """
+    Buffer and fragment bookkeeping of one sample being reassembled
+    """
+
+    __slots__ = ('key', 'buffer', 'received', 'fragment_size', 'missing', 'timestamp', 'reader_id',
+                 'key_only', 'last_update')
+
+    def __init__(self, fragment: RTPSFragment, now: float):
+        self.key = (fragment.writer_guid_prefix, fragment.writer_id, fragment.sequence_number)
+        self.buffer = bytearray(fragment.sample_size)
+        fragments = -(-fragment.sample_size // fragment.fragment_size)
+        self.received = bytearray(fragments)
+        self.fragment_size = fragment.fragment_size
+        self.missing = fragments
+        self.timestamp = fragment.timestamp
+        self.reader_id = fragment.reader_id
+        self.key_only = fragment.key_only
+        self.last_update = now
+
+    def add(self, fragment: RTPSFragment) -> int:
+        """
+        Copy a DATA_FRAG's fragments into place, returning how many were new
+        """
+        view = memoryview(self.buffer)
+        size = self.fragment_size
+        sample_size = len(self.buffer)
+        added = 0
+        for index in range(fragment.fragment_start - 1, fragment.fragment_start - 1 + fragment.fragments_in_submessage):
+            if index >= len(self.received):
+                break
+            start = index * size
+            end = min(start + size, sample_size)
+            source = (index - fragment.fragment_start + 1) * size
+            if source + end - start > len(fragment.data):
+                break
+            if self.received[index]:
+                continue
+            view[start:end] = fragment.data[source:source + end - start]
+            self.received[index] = 1
+            added += 1
+        self.missing -= added
+        return added
+
+    def to_sample(self) -> RTPSSample:
+        """
+        Wrap the completed buffer as a sample; payload_offset is relative to the buffer
+        """
+        writer_guid_prefix, writer_id, sequence_number = self.key
+        encapsulation = None
+        payload = None
+        if len(self.buffer) >= ENCAPSULATION_SIZE:
+            encapsulation = ENCAPSULATION_HEADER.unpack_from(self.buffer)[0]
+            payload = memoryview(self.buffer)[ENCAPSULATION_SIZE:]
+        return RTPSSample(writer_guid_prefix, self.reader_id, writer_id, sequence_number, self.timestamp, None,
+                          encapsulation, ENCAPSULATION_SIZE, payload, None, self.key_only)
+
+def _in_sample(fragment: RTPSFragment) -> bool:
+    """
+    Check that the fragment numbers lie inside the sample and that the data holds the first one,
+    so a fragment that would copy nothing never allocates or refreshes a partial sample
+    """
+    fragments = -(-fragment.sample_size // fragment.fragment_size)
+    first = fragment.fragment_start - 1
+    if first + fragment.fragments_in_submessage > fragments:
+        return False
+    return len(fragment.data) >= min(fragment.fragment_size, fragment.sample_size - first * fragment.fragment_size)
+
+class FragmentReassembler:
+    """
+    Reassembles DATA_FRAG fragments keyed by (writer GUID, sequence number)
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, timeout: float = 5.0, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.pending: 'OrderedDict[SampleKey, PartialSample]' = OrderedDict()
+        self.pending_bytes = 0
+        self.stats = {
+            'fragments': 0,
+            'duplicates': 0,
+            'completed': 0,
+            'evicted_memory': 0,
+            'evicted_timeout': 0,
+            'oversized': 0,
+            'malformed': 0
+        }
+
+    def add(self, fragment: RTPSFragment, now: Optional[float] = None) -> Optional[RTPSSample]:
+        """
+        Account one DATA_FRAG submessage; returns the whole sample once its last fragment arrives
+        """
+        now = time.time() if now is None else now
+        self.stats['fragments'] += 1
+        self.expire(now)
+
+        if (fragment.fragment_size == 0 or fragment.fragment_start < 1 or
+                fragment.sample_size == 0 or fragment.fragments_in_submessage == 0 or
+                not _in_sample(fragment)):
+            self.stats['malformed'] += 1
+            return None
+
+        key = (fragment.writer_guid_prefix, fragment.writer_id, fragment.sequence_number)
+        partial = self.pending.get(key)
+        if partial is None:
+            if fragment.sample_size > self.max_bytes:
+                self.stats['oversized'] += 1
+                self.logger.debug(f"Dropping {fragment.sample_size}-byte sample over the {self.max_bytes}-byte cap")
+                return None
+            self._make_room(fragment.sample_size)
+            partial = self.pending[key] = PartialSample(fragment, now)
+            self.pending_bytes += fragment.sample_size
+        elif len(partial.buffer) != fragment.sample_size or partial.fragment_size != fragment.fragment_size:
+            self.stats['malformed'] += 1
+            return None
+        else:
+            self.pending.move_to_end(key)
+            partial.last_update = now
+
+        if not partial.add(fragment):
+            self.stats['duplicates'] += 1
+            return None
+        if partial.missing:
+            return None
+
+        del self.pending[key]
+        self.pending_bytes -= len(partial.buffer)
+        self.stats['completed'] += 1
+        return partial.to_sample()
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Evict incomplete samples not updated within the timeout; the LRU order makes this O(evicted)
+        """
+        now = time.time() if now is None else now
+        evicted = 0
+        while self.pending:
+            partial = next(iter(self.pending.values()))
+            if now - partial.last_update <= self.timeout:
+                break
+            self._evict_oldest()
+            evicted += 1
+        self.stats['evicted_timeout'] += evicted
+        return evicted
+
+    def clear(self):
+        self.pending.clear()
+        self.pending_bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get reassembly counters plus the current pending sample count and bytes
+        """
+        stats = dict(self.stats)
+        stats['pending'] = len(self.pending)
+        stats['pending_bytes'] = self.pending_bytes
+        return stats
+
+    def _make_room(self, size: int):
+        """
+        Evict least recently updated samples until `size` more bytes fit under the cap
+        """
+        while self.pending and self.pending_bytes + size > self.max_bytes:
+            self._evict_oldest()
+            self.stats['evicted_memory'] += 1
+
+    def _evict_oldest(self):
+        _, partial = self.pending.popitem(last=False)
+        self.pending_bytes -= len(partial.buffer)
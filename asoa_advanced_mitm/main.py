@@ -18,6 +18,8 @@ from ucdr_handler import UCDRHandler
 from asoa_message_modifier import ASOAMessageModifier
 from network_discovery import ASOANetworkDiscovery
 from platform_detector import PlatformDetector
+from parallel_analysis import ParallelCaptureAnalyzer
+from columnar_export import ColumnarTables, export_tables
 
 # Import MITM engines
 from mitm_engines.macos_asoa_mitm import MacOSASOAMITM
@@ -148,12 +150,26 @@ class ASOAAdvancedMITM:
                 self.logger.info(f"🔄 Message replay attack configured")
                 self.logger.info(f"   Replay count: {kwargs.get('replay_count', 1)}")
                 
+            elif attack_type == "rules":
+                if not self.message_modifier.load_rules(kwargs.get('rules_file')):
+                    self.logger.error(f"❌ No modification rules loaded from {kwargs.get('rules_file')}")
+                    return False
+                self.logger.info(f"📋 Rule-based modification attack configured")
+                self.logger.info(f"   Rules: {len(self.message_modifier.rule_engine.rules)} from {kwargs.get('rules_file')}")
+                
             else:
                 self.logger.error(f"❌ Unknown attack type: {attack_type}")
                 return False
             
-            # Configure message modifier
-            self.message_modifier.register_modification_callback(self._on_message_modified)
+            # Configure message modifier; the per-modification log lines only show at INFO, and
+            # then run on the callback worker thread instead of the packet path
+            if self.logger.isEnabledFor(logging.INFO):
+                self.message_modifier.register_modification_callback(self._on_message_modified)
+            if self.message_modifier.modification_callbacks:
+                self.message_modifier.enable_async_callbacks()
+            # The history arena is only allocated when --history will save it
+            if self.config.get('history_file'):
+                self.message_modifier.enable_history()
             
             self.logger.info("✅ Attack setup completed")
             return True
@@ -242,6 +258,14 @@ class ASOAAdvancedMITM:
                 self.mitm_engine.stop_attack()
                 self.logger.info("✅ MITM engine stopped")
             
+            # Deliver queued modification callbacks and keep the modification history
+            if self.message_modifier:
+                self.message_modifier.close()
+                history_file = self.config.get('history_file')
+                if history_file and self.message_modifier.history is not None:
+                    self.message_modifier.history.dump(history_file)
+                    self.logger.info(f"✅ Modification history saved to {history_file}")
+            
             # Stop network discovery
             if self.network_discovery:
                 self.network_discovery.stop_discovery()
@@ -272,6 +296,7 @@ class ASOAAdvancedMITM:
             'running': self.running,
             'platform': self.platform_detector.get_platform_capabilities() if self.platform_detector else {},
             'modification_stats': self.message_modifier.get_modification_stats() if self.message_modifier else {},
+            'flow_health': self.message_modifier.protocol_analyzer.get_flow_health() if self.message_modifier else {},
             'discovery_summary': self.network_discovery.get_discovery_summary() if self.network_discovery else {}
         }
         
@@ -299,6 +324,27 @@ class ASOAAdvancedMITM:
         print(f"  Modified Packets: {mod_stats.get('modified_packets', 0)}")
         print(f"  Temperature Modifications: {mod_stats.get('temperature_modifications', 0)}")
         print(f"  Failed Modifications: {mod_stats.get('failed_modifications', 0)}")
+        print(f"  Offset Cache Hits/Misses: {mod_stats.get('offset_cache_hits', 0)}/{mod_stats.get('offset_cache_misses', 0)}")
+        dispatch = mod_stats.get('callback_dispatch')
+        if dispatch:
+            print(f"  Callback Events Delivered/Dropped: {dispatch['delivered']}/{dispatch['dropped']} "
+                  f"in {dispatch['batches']} batches")
+        rules = mod_stats.get('rules')
+        if rules:
+            print(f"  Rules: {rules['matched']}/{rules['packets']} packets matched, {rules['applied']} actions applied")
+        history = mod_stats.get('history')
+        if history:
+            print(f"  History: {history['entries']}/{history['capacity']} modifications "
+                  f"({history['overwritten']} overwritten, {history['footprint_bytes'] // 1024} KiB)")
+        
+        # Flow health
+        flow_health = stats.get('flow_health', {})
+        if flow_health:
+            print(f"\nFlows:")
+            for flow, counters in flow_health.items():
+                rate = f"{counters['rate']:.1f} pkt/s" if counters['rate'] else "n/a"
+                print(f"  {flow}: {counters['packets']} packets, {counters['sequence_gaps']} gaps, "
+                      f"{counters['reorders']} reorders, {rate}")
         
         # Discovery summary
         discovery_summary = stats.get('discovery_summary', {})
@@ -308,6 +354,41 @@ class ASOAAdvancedMITM:
         
         print("=" * 50)
 
+def analyze_capture(path: str, workers: Optional[int], port: int, logger, export: Optional[str] = None) -> bool:
+    """
+    Analyze a recorded capture across all cores and print per-flow summaries,
+    optionally exporting the decoded traffic as column files for reloading
+    """
+    print("📼 ASOA Capture Analysis Mode")
+    print("=" * 40)
+    
+    try:
+        # The export tables are collected by the same sharded pass, not a second read of the capture
+        result = ParallelCaptureAnalyzer(workers, (port,), collector=ColumnarTables if export else None,
+                                         logger=logger).analyze(path)
+    except Exception as e:
+        logger.error(f"❌ Capture analysis failed: {e}")
+        return False
+    
+    stats = result['stats']
+    print(f"Datagrams: {stats['datagrams']} of {stats['records']} records "
+          f"({result['shards']} shards, {result['elapsed']:.2f}s)")
+    for flow, aggregate in result['flows'].items():
+        print(f"   🔀 {flow}: {aggregate.packets} packets, {aggregate.bytes} bytes, "
+              f"{aggregate.sequence_gaps} sequence gaps, {aggregate.duration:.1f}s")
+        for name, values in sorted(aggregate.values.items()):
+            print(f"      {name}: min {values.minimum:.3f} / mean {values.mean:.3f} / max {values.maximum:.3f}")
+    
+    if export:
+        try:
+            manifest = export_tables(result['collected'], export, logger=logger)
+        except Exception as e:
+            logger.error(f"❌ Columnar export failed: {e}")
+            return False
+        tables = ', '.join(f"{name} ({entry['rows']} rows)" for name, entry in manifest.items())
+        print(f"🗄️  Exported {tables} to {export}")
+    return True
+
 def signal_handler(signum, frame):
     """
     Handle interrupt signals
@@ -338,15 +419,27 @@ Examples:
   # Message replay attack
   sudo python3 main.py --attack message-replay --replay-count 10
 
+  # Rule-driven fault injection
+  sudo python3 main.py --attack rules --rules bench_rules.json
+
   # Attack specific target
   sudo python3 main.py --attack temperature-spoof --target-ip 192.168.1.100 --target-temp 85.0
+
+  # Offline analysis of a recorded capture on all cores
+  python3 main.py --analyze-capture bench.pcapng --workers 32 --export bench_columns/
         """
     )
     
     # Main options
     parser.add_argument('--scan-asoa', action='store_true',
                        help='Scan network for ASOA services')
-    parser.add_argument('--attack', choices=['temperature-spoof', 'service-disrupt', 'message-replay'],
+    parser.add_argument('--analyze-capture', type=str, metavar='PCAP',
+                       help='Analyze a recorded pcap/pcapng capture offline')
+    parser.add_argument('--export', type=str, metavar='DIR',
+                       help='With --analyze-capture, also write decoded traffic as column files to DIR')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for capture analysis (default: all cores)')
+    parser.add_argument('--attack', choices=['temperature-spoof', 'service-disrupt', 'message-replay', 'rules'],
                        help='Type of attack to perform')
     
     # Attack parameters
@@ -356,6 +449,10 @@ Examples:
                        help='Target service for disruption')
     parser.add_argument('--replay-count', type=int, default=1,
                        help='Number of times to replay messages (default: 1)')
+    parser.add_argument('--rules', type=str, metavar='FILE',
+                       help='JSON modification rules for the rules attack')
+    parser.add_argument('--history', type=str, metavar='FILE',
+                       help='Save the latest modifications (.npz) to FILE when the attack stops')
     
     # Network options
     parser.add_argument('--target-ip', type=str,
@@ -391,6 +488,11 @@ Examples:
     log_level = 'DEBUG' if args.verbose else args.log_level
     mitm_system.setup_logging(log_level, args.log_file)
     
+    # Offline capture analysis needs no privileges or MITM engine
+    if args.analyze_capture:
+        sys.exit(0 if analyze_capture(args.analyze_capture, args.workers, args.target_port,
+                                    mitm_system.logger, args.export) else 1)
+    
     # Initialize components
     if not mitm_system.initialize_components():
         sys.exit(1)
@@ -425,7 +527,10 @@ Examples:
                 attack_kwargs['target_service'] = args.target_service
             elif args.attack == 'message-replay':
                 attack_kwargs['replay_count'] = args.replay_count
+            elif args.attack == 'rules':
+                attack_kwargs['rules_file'] = args.rules
             
+            mitm_system.config['history_file'] = args.history
             if not mitm_system.setup_attack(args.attack, **attack_kwargs):
                 sys.exit(1)
             
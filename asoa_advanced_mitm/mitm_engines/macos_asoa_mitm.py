@@ -10,11 +10,15 @@ import signal
 import threading
 import subprocess
 import os
+import socket
 from scapy.all import *
 import netifaces
 import logging
 from typing import Optional, Dict, Any
 
+from flow_table import FlowTable
+from asoa_protocol_analyzer import ASOA_HEADER_STRUCT, ASOA_HEADER_SIZE, ASOA_MAGIC
+
 class MacOSASOAMITM:
     """
     macOS-specific ASOA MITM Engine
@@ -30,6 +34,8 @@ class MacOSASOAMITM:
         self.intercepted_packets = 0
         self.modified_packets = 0
         self.arp_spoofing_active = False
+        # Per-flow health keyed by (source IP, destination IP, source port, destination port) as integers
+        self.flow_table = FlowTable(ring_size=64)
         
     def get_gateway_ip(self) -> str:
         """Get default gateway IP"""
@@ -94,6 +100,7 @@ class MacOSASOAMITM:
         try:
             if packet.haslayer(UDP) and packet[UDP].dport == 7400:
                 self.intercepted_packets += 1
+                self._update_flow(packet)
                 
                 self.logger.info(f"📡 Intercepted ASOA packet #{self.intercepted_packets}: "
                                f"{packet[IP].src}:{packet[UDP].sport} -> "
@@ -114,6 +121,29 @@ class MacOSASOAMITM:
         except Exception as e:
             self.logger.error(f"Packet handler error: {e}")
     
+    def _update_flow(self, packet):
+        """Account an intercepted packet in the flow table"""
+        ip = packet[IP]
+        udp = packet[UDP]
+        payload = bytes(udp.payload)
+        sequence = None
+        if len(payload) >= ASOA_HEADER_SIZE and payload[:4] == ASOA_MAGIC:
+            sequence = ASOA_HEADER_STRUCT.unpack_from(payload)[5]
+        key = (
+            int.from_bytes(socket.inet_aton(ip.src), 'big'),
+            int.from_bytes(socket.inet_aton(ip.dst), 'big'),
+            udp.sport,
+            udp.dport
+        )
+        self.flow_table.update(key, len(payload), sequence, float(packet.time))
+    
+    def get_flow_health(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-flow counters keyed by src:port -> dst:port"""
+        return {
+            f"{socket.inet_ntoa(src.to_bytes(4, 'big'))}:{sport} -> {socket.inet_ntoa(dst.to_bytes(4, 'big'))}:{dport}": counters
+            for (src, dst, sport, dport), counters in self.flow_table.snapshot().items()
+        }
+    
     def modify_asoa_packet(self, packet) -> bool:
         """Modify temperature data in ASOA packet"""
         try:
@@ -248,6 +278,9 @@ class MacOSASOAMITM:
         self.logger.info(f"📊 Attack Summary:")
         self.logger.info(f"   - Intercepted packets: {self.intercepted_packets}")
         self.logger.info(f"   - Modified packets: {self.modified_packets}")
+        for flow, counters in self.get_flow_health().items():
+            self.logger.info(f"   - {flow}: {counters['packets']} packets, "
+                             f"{counters['sequence_gaps']} gaps, {counters['reorders']} reorders")
         self.logger.info("✅ MITM attack stopped")
     
     def get_status(self) -> Dict[str, Any]:
@@ -259,5 +292,6 @@ class MacOSASOAMITM:
             'interface': self.interface,
             'intercepted_packets': self.intercepted_packets,
             'modified_packets': self.modified_packets,
-            'arp_spoofing_active': self.arp_spoofing_active
+            'arp_spoofing_active': self.arp_spoofing_active,
+            'flows': self.get_flow_health()
         }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Modification History - Fixed-footprint record of the latest modifications
+Packets are copied into slots of one preallocated bytearray arena and their metadata into
+a preallocated NumPy record array; both are rings that overwrite the oldest entry, so the
+last `capacity` modifications stay available for review at a constant memory cost.
+"""
+
+import math
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+HISTORY_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('type', '<u1'),
+    ('original_value', '<f8'),
+    ('new_value', '<f8'),
+    ('original_offset', '<u8'),
+    ('original_length', '<u4'),
+    ('modified_offset', '<u8'),
+    ('modified_length', '<u4'),
+    ('packet_size', '<u4')
+])
+
+def _as_float(value: Any) -> float:
+    """
+    Numeric modification values as float; service names and other values become NaN
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+class ModificationHistory:
+    """
+    Ring of the last `capacity` modifications with their original and modified packets.
+    Every entry owns one arena slot of 2 * max_packet_size bytes; longer packets are
+    truncated (their lengths are the stored ones, packet_size the real one). One spare
+    slot receives staged packets, so staging never clobbers the oldest entry.
+    """
+
+    def __init__(self, capacity: int = 4096, max_packet_size: int = 1024, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        if capacity <= 0 or max_packet_size <= 0:
+            raise ValueError("History capacity and max packet size must be positive")
+        self.capacity = capacity
+        self.max_packet_size = max_packet_size
+        self.slot_size = 2 * max_packet_size
+        self.arena = bytearray((capacity + 1) * self.slot_size)
+        self.records = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        self.type_names: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self._next = 0
+        self._count = 0
+        self._spare = capacity * self.slot_size
+        self.stats = {'recorded': 0, 'overwritten': 0, 'truncated': 0}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stage(self, packet) -> int:
+        """
+        Copy a packet into the spare slot before it is modified in place; the entry only
+        exists once commit() is called, so an unmodified packet is simply overwritten later
+        """
+        return self._copy(self._spare, packet)
+
+    def commit(self, modification_type: str, original_value: Any, new_value: Any, timestamp: float,
+               modified_packet, original_length: int) -> int:
+        """
+        Complete the staged entry with its modified packet and metadata; returns its record index
+        """
+        slot = self._next
+        offset = self._spare
+        # The overwritten entry's arena slot (or a never used one) becomes the spare
+        if self._count == self.capacity:
+            self._spare = int(self.records[slot]['original_offset'])
+        else:
+            self._spare = slot * self.slot_size
+        modified_length = self._copy(offset + self.max_packet_size, modified_packet)
+
+        record = self.records[slot]
+        record['timestamp'] = timestamp
+        record['type'] = self._type_code(modification_type)
+        record['original_value'] = _as_float(original_value)
+        record['new_value'] = _as_float(new_value)
+        record['original_offset'] = offset
+        record['original_length'] = original_length
+        record['modified_offset'] = offset + self.max_packet_size
+        record['modified_length'] = modified_length
+        record['packet_size'] = len(modified_packet)
+
+        if len(modified_packet) > self.max_packet_size:
+            self.stats['truncated'] += 1
+        if self._count == self.capacity:
+            self.stats['overwritten'] += 1
+        else:
+            self._count += 1
+        self.stats['recorded'] += 1
+        self._next = (slot + 1) % self.capacity
+        return slot
+
+    def record(self, modification_type: str, original_value: Any, new_value: Any, timestamp: float,
+               original_packet, modified_packet) -> int:
+        """
+        Add one modification whose original and modified packets are separate buffers
+        """
+        original_length = self.stage(original_packet)
+        return self.commit(modification_type, original_value, new_value, timestamp, modified_packet, original_length)
+
+    def entries(self) -> np.ndarray:
+        """
+        Get a copy of the metadata records, oldest first
+        """
+        return self.records[self._order()]
+
+    def packets(self, index: int) -> Tuple[memoryview, memoryview]:
+        """
+        Get the (original, modified) packets of the index-th entry, oldest first, without copying
+        """
+        if not -self._count <= index < self._count:
+            raise IndexError("history index out of range")
+        record = self.records[self._order()[index]]
+        view = memoryview(self.arena)
+        return (view[record['original_offset']:record['original_offset'] + record['original_length']],
+                view[record['modified_offset']:record['modified_offset'] + record['modified_length']])
+
+    def dump(self, path: str) -> int:
+        """
+        Write the entries, oldest first, to an .npz file; packets are compacted into one
+        byte array and the record offsets rewritten to point into it. Returns the entry count.
+        """
+        records = self.entries()
+        packets = bytearray()
+        arena = memoryview(self.arena)
+        for record in records:
+            for field in ('original', 'modified'):
+                start = int(record[f'{field}_offset'])
+                record[f'{field}_offset'] = len(packets)
+                packets += arena[start:start + int(record[f'{field}_length'])]
+        np.savez(path, records=records, packets=np.frombuffer(packets, dtype=np.uint8),
+                 types=np.array(self.type_names, dtype=str))
+        self.logger.info(f"Dumped {len(records)} modifications to {path}")
+        return len(records)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+        self._spare = self.capacity * self.slot_size
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get history counters plus the current entry count and the fixed footprint in bytes
+        """
+        stats = dict(self.stats)
+        stats['entries'] = self._count
+        stats['capacity'] = self.capacity
+        stats['footprint_bytes'] = len(self.arena) + self.records.nbytes
+        return stats
+
+    def _order(self) -> np.ndarray:
+        if self._count < self.capacity:
+            return np.arange(self._count)
+        return (np.arange(self.capacity) + self._next) % self.capacity
+
+    def _copy(self, offset: int, packet) -> int:
+        length = min(len(packet), self.max_packet_size)
+        self.arena[offset:offset + length] = memoryview(packet)[:length]
+        return length
+
+    def _type_code(self, modification_type: str) -> int:
+        code = self._type_codes.get(modification_type)
+        if code is None:
+            if len(self.type_names) > 255:
+                raise ValueError("Too many modification types for the history")
+            code = self._type_codes[modification_type] = len(self.type_names)
+            self.type_names.append(modification_type)
+        return code
+
+def load_history(path: str) -> Tuple[np.ndarray, bytes, List[str]]:
+    """
+    Load a dump as (records, packet bytes, type names); a record's packets are
+    packets[original_offset:original_offset + original_length] and likewise for modified
+    """
+    with np.load(path) as dump:
+        return dump['records'], dump['packets'].tobytes(), [str(name) for name in dump['types']]
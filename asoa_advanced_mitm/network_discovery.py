@@ -13,9 +13,10 @@ from dataclasses import dataclass
 import subprocess
 import platform
 import ipaddress
-import struct
 import netifaces
 
+from asoa_protocol_analyzer import ASOAPacketHeader, ASOAMessageType, ASOA_HEADER_STRUCT, ASOA_MAGIC
+
 @dataclass
 class ASOAService:
     """Represents a discovered ASOA service"""
@@ -308,37 +309,20 @@ class ASOANetworkDiscovery:
         Create ASOA service discovery probe
         """
         try:
-            # ASOA service discovery packet
-            probe = bytearray(32)
-            
-            # Magic bytes
-            probe[0:4] = b'ASOA'
-            
-            # Version
-            probe[4] = 1
-            
-            # Message type (service discovery)
-            probe[5] = 0x01
-            
-            # Service ID (discovery)
-            probe[6:8] = struct.pack('<H', 0)
-            
-            # Target ID (broadcast)
-            probe[8:10] = struct.pack('<H', 0xFFFF)
-            
-            # Sequence number
-            probe[10:14] = struct.pack('<I', int(time.time()))
-            
-            # Payload length
-            probe[14:18] = struct.pack('<I', 0)
-            
-            # Checksum
-            probe[18:22] = struct.pack('<I', 0)
-            
-            # Timestamp
-            probe[22:30] = struct.pack('<Q', int(time.time() * 1000000))
+            # ASOA service discovery packet: discovery service ID, broadcast target, no payload
+            probe = ASOAPacketHeader(
+                magic=ASOA_MAGIC,
+                version=1,
+                message_type=ASOAMessageType.SERVICE_DISCOVERY,
+                service_id=0,
+                target_service_id=0xFFFF,
+                sequence_number=int(time.time()),
+                payload_length=0,
+                checksum=0,
+                timestamp=int(time.time() * 1000000)
+            )
             
-            return bytes(probe)
+            return probe.pack()
             
         except Exception as e:
             self.logger.error(f"Failed to create ASOA probe: {e}")
@@ -353,13 +337,10 @@ class ASOANetworkDiscovery:
                 return self._guess_service_type("", 0)
             
             # Parse ASOA header
-            magic = response[0:4]
-            if magic != b'ASOA':
+            magic, _, message_type, service_id = ASOA_HEADER_STRUCT.unpack_from(response)[:4]
+            if magic != ASOA_MAGIC:
                 return self._guess_service_type("", 0)
             
-            service_id = struct.unpack('<H', response[6:8])[0]
-            message_type = response[5]
-            
             # Map service ID to known services
             service_mapping = {
                 1: "SensorModule",
@@ -418,8 +399,8 @@ class ASOANetworkDiscovery:
         """
         try:
             # This would require deeper analysis of traffic patterns
-                    # ASOA uses UDP port 7400 for main communication
-        return port == 7400
+            # ASOA uses UDP port 7400 for main communication
+            return port == 7400
             
         except Exception as e:
             self.logger.debug(f"Failed to check temperature flows: {e}")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Packet Records - Compact storage for analyzed ASOA packets
+Long captures keep one small tuple or a few array columns per message instead of an analysis dict
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+class PacketRecord(NamedTuple):
+    """Analyzed ASOA packet reduced to its header fields and payload"""
+    message_type: int
+    service_id: int
+    target_service_id: int
+    sequence_number: int
+    timestamp: int
+    checksum: int
+    temperature: float  # NaN when the packet carries no temperature
+    accuracy: float
+    payload: bytes
+
+    @classmethod
+    def from_analysis(cls, analysis: Dict[str, Any]) -> 'PacketRecord':
+        """
+        Build a record from an ASOAProtocolAnalyzer.analyze_packet() result
+        """
+        header = analysis['header']
+        temperature_data = analysis.get('temperature_data')
+        if header is None:
+            # RTPS message: no ASOA header, keep what the analysis carries
+            return cls(
+                0, 0, 0, analysis['sequence'], analysis['timestamp'], 0,
+                temperature_data.temperature_value if temperature_data else math.nan,
+                temperature_data.accuracy if temperature_data else math.nan,
+                bytes(analysis['payload'])
+            )
+        return cls(
+            int(header.message_type),
+            header.service_id,
+            header.target_service_id,
+            header.sequence_number,
+            header.timestamp,
+            header.checksum,
+            temperature_data.temperature_value if temperature_data else math.nan,
+            temperature_data.accuracy if temperature_data else math.nan,
+            bytes(analysis['payload'])
+        )
+
+class PacketRecordStore:
+    """
+    Array-backed store of analyzed packets
+    Header fields live in typed array columns and payloads in one contiguous arena,
+    so a retained message costs its payload plus a few dozen bytes.
+    """
+
+    # Column name -> array typecode, matching the header field widths
+    # (sequence numbers are 64-bit to hold RTPS ones)
+    COLUMNS = {
+        'message_type': 'B',
+        'service_id': 'H',
+        'target_service_id': 'H',
+        'sequence_number': 'Q',
+        'timestamp': 'Q',
+        'checksum': 'I',
+        'temperature': 'f',
+        'accuracy': 'f'
+    }
+
+    def __init__(self):
+        self._columns = {name: array(typecode) for name, typecode in self.COLUMNS.items()}
+        self._payloads = bytearray()
+        self._payload_offsets = array('Q', [0])
+
+    def append(self, analysis: Dict[str, Any]):
+        """
+        Append an ASOAProtocolAnalyzer.analyze_packet() result
+        """
+        self.append_record(PacketRecord.from_analysis(analysis))
+
+    def append_record(self, record: PacketRecord):
+        """
+        Append a PacketRecord
+        """
+        columns = self._columns
+        for name in self.COLUMNS:
+            columns[name].append(getattr(record, name))
+        self._payloads += record.payload
+        self._payload_offsets.append(len(self._payloads))
+
+    def __len__(self) -> int:
+        return len(self._payload_offsets) - 1
+
+    def __getitem__(self, index: int) -> PacketRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        values = [self._columns[name][index] for name in self.COLUMNS]
+        return PacketRecord(*values, bytes(self.payload(index)))
+
+    def __iter__(self) -> Iterator[PacketRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def payload(self, index: int) -> memoryview:
+        """
+        Get a packet's payload without copying it out of the arena
+        """
+        start = self._payload_offsets[index]
+        end = self._payload_offsets[index + 1]
+        return memoryview(self._payloads)[start:end]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Get zero-copy NumPy views of the header columns (invalidated by later appends)
+        """
+        return {
+            name: np.frombuffer(column, dtype=column.typecode) if len(column) else np.empty(0, dtype=column.typecode)
+            for name, column in self._columns.items()
+        }
+
+    def temperature(self, index: int) -> Optional[float]:
+        """
+        Get a packet's temperature, None when it carried none
+        """
+        value = self._columns['temperature'][index]
+        return None if math.isnan(value) else value
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the columns and the payload arena
+        """
+        return (sum(column.itemsize * len(column) for column in self._columns.values()) +
+                len(self._payloads) + self._payload_offsets.itemsize * len(self._payload_offsets))
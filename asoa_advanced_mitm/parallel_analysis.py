@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Parallel Analysis - Multi-core sharded capture analysis
+Splits a capture into record-aligned shards, analyzes them in worker processes and merges
+flow aggregates and time-series columns in capture order. A light first pass collects each
+shard's SEDP/SPDP discovery, so every shard starts with the writer topics and participant
+names a serial pass would have learned by then. Other analyzer state is per shard: DATA_FRAG
+samples whose fragments straddle a shard boundary are not reassembled, and FlowTable rates
+restart per shard (merged flow aggregates are exact).
+"""
+
+import os
+import math
+import time
+import logging
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from asoa_protocol_analyzer import ASOAProtocolAnalyzer
+from pcap_reader import PcapReader, CaptureShard, DEFAULT_PORTS
+from flow_aggregation import FlowAggregate, FlowAggregator
+from rtps_parser import is_rtps
+from topic_demux import WriterKey
+
+Discovery = Tuple[Dict[WriterKey, str], Dict[bytes, str]]  # TopicDemultiplexer.get_discovery()
+
+# Fixed time-series columns and their array typecodes
+SERIES_COLUMNS = {
+    'timestamp': 'd',
+    'service_id': 'H',
+    'target_service_id': 'H',
+    'message_type': 'B',
+    'sequence_number': 'I'
+}
+
+class SeriesBuilder:
+    """
+    Accumulates per-packet time-series columns in typed arrays.
+    Decoded topic fields become float64 columns named topic.field, NaN where absent.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {name: array(typecode) for name, typecode in SERIES_COLUMNS.items()}
+        self.values: Dict[str, array] = {}
+
+    def add(self, analysis: Dict[str, Any], timestamp: float):
+        header = analysis['header']
+        columns = self.columns
+        columns['timestamp'].append(timestamp)
+        if header is None:
+            # RTPS message: no ASOA service IDs or message type
+            for name in ('service_id', 'target_service_id', 'message_type'):
+                columns[name].append(0)
+            columns['sequence_number'].append(analysis['sequence'] & 0xFFFFFFFF)
+        else:
+            columns['service_id'].append(header.service_id)
+            columns['target_service_id'].append(header.target_service_id)
+            columns['message_type'].append(int(header.message_type))
+            columns['sequence_number'].append(header.sequence_number)
+
+        for topic, fields in analysis.get('topic_data', {}).items():
+            for name, value in fields.items():
+                if name == 'topic_id' or not isinstance(value, (int, float)):
+                    continue
+                key = f"{topic}.{name}"
+                column = self.values.get(key)
+                if column is None:
+                    column = self.values[key] = array('d', [math.nan]) * self.rows
+                column.append(value)
+        self.rows += 1
+        # Pad value columns this packet did not carry
+        for column in self.values.values():
+            if len(column) < self.rows:
+                column.append(math.nan)
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        result = {name: np.array(column, dtype=column.typecode) for name, column in self.columns.items()}
+        result.update({name: np.array(column, dtype=np.float64) for name, column in self.values.items()})
+        return result
+
+def merge_series(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Concatenate per-shard columns in shard order, NaN-filling value columns a shard lacks
+    """
+    names = list(SERIES_COLUMNS)
+    for part in parts:
+        for name in sorted(part):
+            if name not in names:
+                names.append(name)
+
+    merged = {}
+    for name in names:
+        pieces = []
+        for part in parts:
+            rows = len(part['timestamp'])
+            if name in part:
+                pieces.append(part[name])
+            else:
+                pieces.append(np.full(rows, math.nan))
+        if pieces:
+            merged[name] = np.concatenate(pieces)
+        else:
+            merged[name] = np.empty(0, dtype=SERIES_COLUMNS.get(name, 'd'))
+    return merged
+
+def discover_shard(path: str, shard: Optional[CaptureShard],
+                   ports: Optional[Iterable[int]] = DEFAULT_PORTS) -> Discovery:
+    """
+    Learn the SEDP/SPDP discovery announced in one shard; ASOA datagrams and
+    application samples are skipped without decoding
+    """
+    analyzer = ASOAProtocolAnalyzer(logging.getLogger(__name__))
+    demux = analyzer.topic_demux
+    with PcapReader(path, ports, shard=shard) as reader:
+        for _, packet in reader:
+            if not is_rtps(packet):
+                continue
+            message = analyzer.rtps_parser.parse(packet)
+            if message is None:
+                continue
+            for sample in message.samples:
+                if sample.payload is not None:
+                    demux.learn(sample)
+    return demux.get_discovery()
+
+def discovery_seeds(learned: List[Discovery]) -> List[Optional[Discovery]]:
+    """
+    Per shard, the discovery of all earlier shards (later announcements win), None for nothing learned
+    """
+    seeds = []
+    writers: Dict[WriterKey, str] = {}
+    participants: Dict[bytes, str] = {}
+    for shard_writers, shard_participants in learned:
+        seeds.append((dict(writers), dict(participants)) if writers or participants else None)
+        writers.update(shard_writers)
+        participants.update(shard_participants)
+    return seeds
+
+def analyze_shard(path: str, shard: Optional[CaptureShard], ports: Optional[Iterable[int]] = DEFAULT_PORTS,
+                  max_samples: int = 0, collector: Optional[type] = None, discovery: Optional[Discovery] = None
+                  ) -> Tuple[Dict[str, FlowAggregate], Dict[str, np.ndarray], Dict[str, int], Any]:
+    """
+    Analyze one shard (or the whole capture for shard=None) in the current process,
+    starting from the `discovery` learned in earlier shards.
+    An instance of `collector` (add(analysis, timestamp) / to_numpy()) sees every analysis
+    too; its to_numpy() result is returned last, None without a collector.
+    """
+    analyzer = ASOAProtocolAnalyzer(logging.getLogger(__name__))
+    if discovery is not None:
+        analyzer.topic_demux.seed(*discovery)
+    aggregator = FlowAggregator(max_samples)
+    series = SeriesBuilder()
+    collected = collector() if collector is not None else None
+    with PcapReader(path, ports, shard=shard) as reader:
+        for timestamp, packet in reader:
+            analysis = analyzer.analyze_packet(packet, timestamp)
+            if analysis:
+                aggregator.add(analysis, timestamp, len(packet))
+                series.add(analysis, timestamp)
+                if collected is not None:
+                    collected.add(analysis, timestamp)
+        stats = dict(reader.stats)
+    return aggregator.flows, series.to_numpy(), stats, collected.to_numpy() if collected is not None else None
+
+class ParallelCaptureAnalyzer:
+    """
+    Analyzes a capture across processes and merges the results deterministically
+    """
+
+    def __init__(self, workers: Optional[int] = None, ports: Optional[Iterable[int]] = DEFAULT_PORTS,
+                 max_samples: int = 0, collector: Optional[type] = None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.workers = workers or os.cpu_count() or 1
+        self.ports = tuple(ports) if ports is not None else None
+        self.max_samples = max_samples
+        self.collector = collector
+
+    def analyze(self, path: str) -> Dict[str, Any]:
+        """
+        Analyze a pcap/pcapng capture, returning merged 'flows', time-series 'columns',
+        reader 'stats', the number of 'shards' and 'elapsed' seconds, plus the per-shard
+        'collected' results of the collector in shard order (empty without one)
+        """
+        started = time.time()
+        with PcapReader(path, self.ports, self.logger) as reader:
+            # A few shards per worker balances uneven packet mixes
+            shards = reader.shards(self.workers * 4 if self.workers > 1 else 1)
+
+        if self.workers > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                learned = list(executor.map(discover_shard, [path] * len(shards), shards, [self.ports] * len(shards)))
+                results = list(executor.map(
+                    analyze_shard, [path] * len(shards), shards,
+                    [self.ports] * len(shards), [self.max_samples] * len(shards), [self.collector] * len(shards),
+                    discovery_seeds(learned)
+                ))
+        else:
+            results = [analyze_shard(path, shard, self.ports, self.max_samples, self.collector) for shard in shards]
+
+        # executor.map preserves shard order, so merging is deterministic
+        aggregator = FlowAggregator(self.max_samples)
+        stats = {'records': 0, 'datagrams': 0, 'skipped': 0}
+        for flows, _, shard_stats, _ in results:
+            partial = FlowAggregator(self.max_samples)
+            partial.flows = flows
+            aggregator.merge(partial)
+            for key in stats:
+                stats[key] += shard_stats[key]
+
+        elapsed = time.time() - started
+        self.logger.info(f"Analyzed {stats['datagrams']} datagrams in {len(shards)} shards "
+                         f"with {self.workers} workers in {elapsed:.2f}s")
+        return {
+            'flows': dict(sorted(aggregator.flows.items())),
+            'columns': merge_series([series for _, series, _, _ in results]),
+            'collected': [collected for _, _, _, collected in results] if self.collector is not None else [],
+            'stats': stats,
+            'shards': len(shards),
+            'elapsed': elapsed
+        }
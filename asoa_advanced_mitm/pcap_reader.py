@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Pcap Reader - Streaming pcap/pcapng reader for offline ASOA analysis
+Memory-maps the capture and yields zero-copy UDP payload views without scapy dissection
+"""
+
+import os
+import mmap
+import time
+import struct
+import logging
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# ASOA main communication port
+DEFAULT_PORTS = (7400,)
+
+# Link-layer types (http://www.tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+
+_PCAP_MAGICS = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6),
+    b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9),
+    b'\xa1\xb2\x3c\x4d': ('>', 1e-9)
+}
+_PCAPNG_SHB = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+_PCAPNG_IDB = 0x00000001
+_PCAPNG_SPB = 0x00000003
+_PCAPNG_EPB = 0x00000006
+_PCAPNG_OPTION_TSRESOL = 9
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_VLAN = (0x8100, 0x88A8)
+_IP_PROTO_UDP = 17
+
+_ETHERTYPE = struct.Struct('!H')
+_IPV4_HEADER = struct.Struct('!BxHxxHxB')  # version/IHL, total length, flags/fragment, protocol
+_UDP_HEADER = struct.Struct('!HHH')  # source port, destination port, length
+_SLL_PROTOCOL = struct.Struct('!14xH')
+
+class CaptureShard(NamedTuple):
+    """Record-aligned byte range of a capture that can be read independently"""
+    start: int
+    end: int
+    state: Optional[Tuple[str, Tuple[Tuple[int, float], ...]]]  # pcapng (byte order, interfaces)
+
+class PcapReader:
+    """
+    Streaming reader for pcap and pcapng captures
+    Iterating yields (timestamp, payload) for IPv4 UDP datagrams on the configured ports;
+    payloads are memoryviews into the mapped file, valid until the reader is closed.
+    """
+
+    def __init__(self, path: str, ports: Optional[Iterable[int]] = DEFAULT_PORTS, logger=None,
+                 shard: Optional[CaptureShard] = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.path = path
+        self.ports = frozenset(ports) if ports is not None else None
+        self.shard = shard
+        self.format = None
+        self.stats = {'records': 0, 'datagrams': 0, 'skipped': 0}
+        self._file = None
+        self._mmap = None
+        self._data = None
+
+    def open(self) -> 'PcapReader':
+        """
+        Memory-map the capture file
+        """
+        self._file = open(self.path, 'rb')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._data = memoryview(b'')
+        else:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = memoryview(self._mmap)
+        return self
+
+    def close(self):
+        """
+        Release the mapping; payload views handed out earlier become invalid
+        """
+        if self._data is not None:
+            self._data.release()
+            self._data = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Payload views are still referenced; the mapping is freed with them
+                self.logger.debug("Capture mapping still referenced, deferring unmap")
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'PcapReader':
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[float, memoryview]]:
+        if self._data is None:
+            self.open()
+        data = self._data
+        shard = self.shard
+        capture_format = self._detect_format(data)
+        if capture_format is None:
+            return
+        if capture_format == 'pcap':
+            frames = self._pcap_frames(data, *(shard[:2] if shard else (24, len(data))))
+        elif shard:
+            frames = self._pcapng_frames(data, shard.start, shard.end, shard.state)
+        else:
+            frames = self._pcapng_frames(data, 0, len(data), ('<', ()))
+
+        stats = self.stats
+        ports = self.ports
+        for timestamp, link_type, frame in frames:
+            stats['records'] += 1
+            datagram = _udp_payload(frame, link_type)
+            if datagram is None or (ports is not None and datagram[0] not in ports and datagram[1] not in ports):
+                stats['skipped'] += 1
+                continue
+            stats['datagrams'] += 1
+            yield timestamp, datagram[2]
+
+    def payloads(self) -> Iterator[memoryview]:
+        """
+        Yield only the payloads, e.g. for ASOAProtocolAnalyzer.identify_service_communication
+        """
+        for _, payload in self:
+            yield payload
+
+    def shards(self, count: int) -> List['CaptureShard']:
+        """
+        Split the capture into at most `count` record-aligned byte ranges of similar size.
+        Only record/block headers are read; each shard carries the pcapng section state
+        (byte order, interfaces) needed to decode it independently.
+        """
+        if self._data is None:
+            self.open()
+        data = self._data
+        capture_format = self._detect_format(data)
+        if capture_format is None:
+            return []
+        if capture_format == 'pcap':
+            first = 24
+            positions = self._pcap_boundaries(data)
+            states = None
+        else:
+            first = 0
+            positions, states = self._pcapng_boundaries(data)
+        end = len(data)
+        if not positions:
+            return []
+
+        count = max(1, min(count, len(positions)))
+        target = (end - first) / count
+        shards = []
+        start_index = 0
+        for index, position in enumerate(positions):
+            if len(shards) < count - 1 and index > start_index and position - positions[start_index] >= target:
+                shards.append(CaptureShard(positions[start_index], position,
+                                           states[start_index] if states else None))
+                start_index = index
+        shards.append(CaptureShard(positions[start_index], end, states[start_index] if states else None))
+        return shards
+
+    def _detect_format(self, data: memoryview) -> Optional[str]:
+        """
+        Identify pcap or pcapng from the leading magic
+        """
+        if len(data) < 4:
+            return None
+        if bytes(data[:4]) in _PCAP_MAGICS:
+            self.format = 'pcap'
+        elif struct.unpack_from('<I', data)[0] == _PCAPNG_SHB:
+            self.format = 'pcapng'
+        else:
+            raise ValueError(f"{self.path} is not a pcap or pcapng capture")
+        return self.format
+
+    def _pcap_frames(self, data: memoryview, position: int, end: int) -> Iterator[Tuple[float, int, memoryview]]:
+        """
+        Walk classic pcap records in [position, end)
+        """
+        if len(data) < 24:
+            return
+        endian, resolution = _PCAP_MAGICS[bytes(data[:4])]
+        link_type = struct.unpack_from(endian + 'I', data, 20)[0] & 0x0FFFFFFF
+        record_header = struct.Struct(endian + 'IIII')
+        header_size = record_header.size
+        unpack_from = record_header.unpack_from
+
+        while position + header_size <= end:
+            seconds, fraction, captured, _ = unpack_from(data, position)
+            position += header_size
+            if position + captured > end:
+                self.logger.warning(f"Truncated pcap record at offset {position - header_size}")
+                return
+            yield seconds + fraction * resolution, link_type, data[position:position + captured]
+            position += captured
+
+    def _pcap_boundaries(self, data: memoryview) -> List[int]:
+        """
+        Offsets of every classic pcap record
+        """
+        if len(data) < 24:
+            return []
+        captured_length = struct.Struct(_PCAP_MAGICS[bytes(data[:4])][0] + '8xI').unpack_from
+        positions = []
+        position = 24
+        end = len(data) - 16
+        while position <= end:
+            positions.append(position)
+            position += 16 + captured_length(data, position)[0]
+        return positions
+
+    def _pcapng_blocks(self, data: memoryview, position: int, end: int,
+                       state: Tuple[str, Tuple[Tuple[int, float], ...]]) -> Iterator[Tuple[int, int, int, int, str, list]]:
+        """
+        Walk pcapng blocks in [position, end), yielding
+        (position, block type, body start, body end, byte order, interfaces) with the
+        section state updated by header and interface blocks
+        """
+        endian, interfaces = state[0], list(state[1])
+        block_header = struct.Struct(endian + 'II')
+
+        while position + 12 <= end:
+            if struct.unpack_from('<I', data, position)[0] == _PCAPNG_SHB:
+                # Each section declares its own byte order
+                magic = struct.unpack_from('<I', data, position + 8)[0]
+                endian = '<' if magic == _PCAPNG_BYTE_ORDER_MAGIC else '>'
+                block_header = struct.Struct(endian + 'II')
+                interfaces = []
+
+            block_type, block_length = block_header.unpack_from(data, position)
+            if block_length < 12 or position + block_length > end:
+                self.logger.warning(f"Truncated pcapng block at offset {position}")
+                return
+            body = position + 8
+            body_end = position + block_length - 4
+            if block_type == _PCAPNG_IDB:
+                link_type = struct.unpack_from(endian + 'H', data, body)[0]
+                interfaces.append((link_type, _pcapng_resolution(data, body + 8, body_end, endian)))
+
+            yield position, block_type, body, body_end, endian, interfaces
+            position += block_length
+
+    def _pcapng_frames(self, data: memoryview, position: int, end: int,
+                       state: Tuple[str, Tuple[Tuple[int, float], ...]]) -> Iterator[Tuple[float, int, memoryview]]:
+        """
+        Walk pcapng packet blocks, tracking the interfaces of each section
+        """
+        for _, block_type, body, body_end, endian, interfaces in self._pcapng_blocks(data, position, end, state):
+            if block_type == _PCAPNG_EPB:
+                interface_id, high, low, captured = struct.unpack_from(endian + 'IIII', data, body)
+                if interface_id < len(interfaces):
+                    link_type, resolution = interfaces[interface_id]
+                    frame_start = body + 20
+                    frame_end = min(frame_start + captured, body_end)
+                    yield ((high << 32) | low) * resolution, link_type, data[frame_start:frame_end]
+            elif block_type == _PCAPNG_SPB:
+                if interfaces:
+                    original = struct.unpack_from(endian + 'I', data, body)[0]
+                    frame_start = body + 4
+                    frame_end = min(frame_start + original, body_end)
+                    yield 0.0, interfaces[0][0], data[frame_start:frame_end]
+
+    def _pcapng_boundaries(self, data: memoryview) -> Tuple[List[int], List[Tuple[str, tuple]]]:
+        """
+        Offsets of every pcapng block with the section state in effect before it
+        """
+        positions = []
+        states = []
+        state = ('<', ())
+        for position, block_type, _, _, endian, interfaces in self._pcapng_blocks(data, 0, len(data), state):
+            positions.append(position)
+            states.append(state)
+            state = (endian, tuple(interfaces))
+        return positions, states
+
+def _pcapng_resolution(data: memoryview, position: int, end: int, endian: str) -> float:
+    """
+    Read the if_tsresol option of an interface description block (default microseconds)
+    """
+    option = struct.Struct(endian + 'HH')
+    while position + 4 <= end:
+        code, length = option.unpack_from(data, position)
+        if code == 0:
+            break
+        if code == _PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = data[position + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        position += 4 + ((length + 3) & ~3)
+    return 1e-6
+
+def _udp_payload(frame: memoryview, link_type: int) -> Optional[Tuple[int, int, memoryview]]:
+    """
+    Strip link, IPv4 and UDP headers, returning (source port, destination port, payload)
+    """
+    try:
+        if link_type == LINKTYPE_ETHERNET:
+            ethertype = _ETHERTYPE.unpack_from(frame, 12)[0]
+            offset = 14
+            while ethertype in _ETHERTYPE_VLAN:
+                ethertype = _ETHERTYPE.unpack_from(frame, offset + 2)[0]
+                offset += 4
+            if ethertype != _ETHERTYPE_IPV4:
+                return None
+        elif link_type in (LINKTYPE_RAW, LINKTYPE_IPV4):
+            offset = 0
+        elif link_type in (LINKTYPE_NULL, LINKTYPE_LOOP):
+            # 4-byte address family in the capturing host's byte order
+            offset = 4
+        elif link_type == LINKTYPE_LINUX_SLL:
+            if _SLL_PROTOCOL.unpack_from(frame)[0] != _ETHERTYPE_IPV4:
+                return None
+            offset = 16
+        else:
+            return None
+
+        version_ihl, total_length, fragment, protocol = _IPV4_HEADER.unpack_from(frame, offset)
+        # Only unfragmented IPv4 UDP (first fragments lack the rest of the payload)
+        if version_ihl >> 4 != 4 or protocol != _IP_PROTO_UDP or fragment & 0x3FFF:
+            return None
+        ip_end = min(offset + total_length, len(frame))
+        offset += (version_ihl & 0x0F) * 4
+
+        source_port, destination_port, udp_length = _UDP_HEADER.unpack_from(frame, offset)
+        payload_end = min(offset + udp_length, ip_end)
+        return source_port, destination_port, frame[offset + 8:payload_end]
+    except struct.error:
+        return None
+
+def write_pcap(path: str, payloads: Iterable[bytes], port: int = DEFAULT_PORTS[0],
+               timestamps: Optional[Iterable[float]] = None):
+    """
+    Write UDP payloads as an Ethernet/IPv4 pcap (loopback addresses, zero checksums)
+    """
+    timestamps = iter(timestamps) if timestamps is not None else None
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+        for payload in payloads:
+            timestamp = next(timestamps) if timestamps is not None else time.time()
+            udp = struct.pack('!HHHH', port, port, 8 + len(payload), 0)
+            ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp) + len(payload), 0, 0, 64,
+                             _IP_PROTO_UDP, 0, b'\x7f\x00\x00\x01', b'\x7f\x00\x00\x01')
+            frame = b'\x00' * 12 + _ETHERTYPE.pack(_ETHERTYPE_IPV4) + ip + udp + bytes(payload)
+            seconds = int(timestamp)
+            microseconds = min(int(round((timestamp - seconds) * 1e6)), 999999)
+            f.write(struct.pack('<IIII', seconds, microseconds, len(frame), len(frame)))
+            f.write(frame)
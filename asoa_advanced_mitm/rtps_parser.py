@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+RTPS Parser - Zero-copy RTPS wire-format parsing for the ASOA driver traffic
+The ECUs talk RTPS (asoa/driver/rtps.h) on port 7400; this walks the RTPS header and
+submessages and exposes serialized payloads as memoryviews for the ucdr codecs.
+"""
+
+import struct
+import logging
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+RTPS_MAGIC = b'RTPS'
+RTPS_HEADER_SIZE = 20
+
+# Submessage IDs (DDSI-RTPS 2.x, 9.4.5.1.1)
+PAD = 0x01
+ACKNACK = 0x06
+HEARTBEAT = 0x07
+GAP = 0x08
+INFO_TS = 0x09
+INFO_SRC = 0x0c
+INFO_REPLY_IP4 = 0x0d
+INFO_DST = 0x0e
+INFO_REPLY = 0x0f
+NACK_FRAG = 0x12
+HEARTBEAT_FRAG = 0x13
+DATA = 0x15
+DATA_FRAG = 0x16
+
+SUBMESSAGE_NAMES = {
+    PAD: 'PAD', ACKNACK: 'ACKNACK', HEARTBEAT: 'HEARTBEAT', GAP: 'GAP', INFO_TS: 'INFO_TS',
+    INFO_SRC: 'INFO_SRC', INFO_REPLY_IP4: 'INFO_REPLY_IP4', INFO_DST: 'INFO_DST',
+    INFO_REPLY: 'INFO_REPLY', NACK_FRAG: 'NACK_FRAG', HEARTBEAT_FRAG: 'HEARTBEAT_FRAG',
+    DATA: 'DATA', DATA_FRAG: 'DATA_FRAG'
+}
+
+# Submessage flags
+FLAG_ENDIANNESS = 0x01
+FLAG_INLINE_QOS = 0x02
+FLAG_DATA = 0x04
+FLAG_KEY = 0x08
+FLAG_FRAG_KEY = 0x04
+FLAG_INVALIDATE = 0x02
+FLAG_FINAL = 0x02
+
+# Parameter IDs used by the discovery protocols
+PID_SENTINEL = 0x0001
+PID_TOPIC_NAME = 0x0005
+PID_TYPE_NAME = 0x0007
+PID_PARTICIPANT_GUID = 0x0050
+PID_ENDPOINT_GUID = 0x005a
+PID_ENTITY_NAME = 0x0062
+
+# Built-in discovery writers (SPDP participants, SEDP publications)
+ENTITYID_SPDP_PARTICIPANT_WRITER = 0x000100c2
+ENTITYID_SEDP_PUBLICATIONS_WRITER = 0x000003c2
+
+# Serialized payload encapsulation schemes (big-endian on the wire)
+CDR_BE = 0x0000
+CDR_LE = 0x0001
+PL_CDR_BE = 0x0002
+PL_CDR_LE = 0x0003
+ENCAPSULATION_SIZE = 4
+
+_ENTITY_IDS = struct.Struct('>II')
+ENCAPSULATION_HEADER = struct.Struct('>HH')
+_STRUCTS = {
+    endian: {
+        'u16': struct.Struct(endian + 'H'),
+        'data': struct.Struct(endian + 'HH8xiI'),
+        'data_frag': struct.Struct(endian + 'HH8xiIIHHI'),
+        'heartbeat': struct.Struct(endian + '8xiIiIi'),
+        'sequence_set': struct.Struct(endian + 'iII'),
+        'time': struct.Struct(endian + 'iI'),
+        'parameter': struct.Struct(endian + 'HH'),
+        'count': struct.Struct(endian + 'i')
+    }
+    for endian in '<>'
+}
+
+class RTPSHeader(NamedTuple):
+    """RTPS message header"""
+    version: Tuple[int, int]
+    vendor_id: bytes
+    guid_prefix: bytes
+
+class RTPSSample(NamedTuple):
+    """DATA submessage with its serialized payload"""
+    writer_guid_prefix: bytes
+    reader_id: int
+    writer_id: int
+    sequence_number: int
+    timestamp: Optional[float]
+    destination: Optional[bytes]
+    encapsulation: Optional[int]
+    payload_offset: int  # Offset of the CDR data (after the encapsulation header) in the message
+    payload: Optional[memoryview]
+    inline_qos: Optional[memoryview]
+    key_only: bool
+
+class RTPSFragment(NamedTuple):
+    """DATA_FRAG submessage carrying one or more fragments of a sample"""
+    writer_guid_prefix: bytes
+    reader_id: int
+    writer_id: int
+    sequence_number: int
+    fragment_start: int  # 1-based
+    fragments_in_submessage: int
+    fragment_size: int
+    sample_size: int
+    timestamp: Optional[float]
+    data: memoryview
+    key_only: bool
+
+class RTPSHeartbeat(NamedTuple):
+    """HEARTBEAT submessage"""
+    writer_guid_prefix: bytes
+    reader_id: int
+    writer_id: int
+    first_sequence: int
+    last_sequence: int
+    count: int
+    final: bool
+
+class RTPSAckNack(NamedTuple):
+    """ACKNACK submessage; `missing` lists the requested sequence numbers"""
+    reader_guid_prefix: bytes
+    reader_id: int
+    writer_id: int
+    base_sequence: int
+    missing: Tuple[int, ...]
+    count: int
+
+class RTPSGap(NamedTuple):
+    """
+    GAP submessage: sequence numbers in range(gap_start, gap_end) plus those in `listed` are irrelevant.
+    The contiguous range is kept as bounds since the sender controls its length.
+    """
+    writer_guid_prefix: bytes
+    reader_id: int
+    writer_id: int
+    gap_start: int
+    gap_end: int
+    listed: Tuple[int, ...]
+
+    def is_irrelevant(self, sequence_number: int) -> bool:
+        return self.gap_start <= sequence_number < self.gap_end or sequence_number in self.listed
+
+class RTPSMessage(NamedTuple):
+    """Parsed RTPS message"""
+    header: RTPSHeader
+    samples: List[RTPSSample]
+    fragments: List[RTPSFragment]
+    heartbeats: List[RTPSHeartbeat]
+    acknacks: List[RTPSAckNack]
+    gaps: List[RTPSGap]
+    submessages: int
+
+def is_rtps(data) -> bool:
+    """
+    Check for the RTPS magic without copying
+    """
+    return len(data) >= RTPS_HEADER_SIZE and data[:4] == RTPS_MAGIC
+
+class RTPSParser:
+    """
+    Zero-copy RTPS message parser
+    Payloads and fragments are memoryview slices of the input buffer.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = {name: 0 for name in SUBMESSAGE_NAMES.values()}
+        self.stats.update({'messages': 0, 'unknown_submessages': 0, 'malformed': 0, 'undecodable_payloads': 0})
+
+    def parse(self, data) -> Optional[RTPSMessage]:
+        """
+        Parse an RTPS message, None if it is not RTPS or is malformed
+        """
+        if not is_rtps(data):
+            return None
+        data = data if isinstance(data, memoryview) else memoryview(data)
+        header = RTPSHeader((data[4], data[5]), bytes(data[6:8]), bytes(data[8:20]))
+        message = RTPSMessage(header, [], [], [], [], [], 0)
+
+        source_prefix = header.guid_prefix
+        destination = None
+        timestamp = None
+        submessages = 0
+        position = RTPS_HEADER_SIZE
+        length = len(data)
+        stats = self.stats
+
+        try:
+            while position + 4 <= length:
+                submessage_id = data[position]
+                flags = data[position + 1]
+                structs = _STRUCTS['<' if flags & FLAG_ENDIANNESS else '>']
+                octets = structs['u16'].unpack_from(data, position + 2)[0]
+                body = position + 4
+                if octets == 0 and submessage_id not in (PAD, INFO_TS):
+                    # Zero length: the submessage extends to the end of the message
+                    end = length
+                else:
+                    end = body + octets
+                if end > length:
+                    stats['malformed'] += 1
+                    break
+                submessages += 1
+
+                if submessage_id == DATA:
+                    message.samples.append(self._parse_data(data, flags, structs, body, end,
+                                                            source_prefix, timestamp, destination))
+                elif submessage_id == INFO_TS:
+                    if flags & FLAG_INVALIDATE:
+                        timestamp = None
+                    else:
+                        seconds, fraction = structs['time'].unpack_from(data, body)
+                        timestamp = seconds + fraction / 4294967296.0
+                elif submessage_id == INFO_DST:
+                    destination = bytes(data[body:body + 12])
+                    if destination == bytes(12):
+                        destination = None
+                elif submessage_id == INFO_SRC:
+                    source_prefix = bytes(data[body + 8:body + 20])
+                elif submessage_id == DATA_FRAG:
+                    message.fragments.append(self._parse_data_frag(data, flags, structs, body, end,
+                                                                   source_prefix, timestamp))
+                elif submessage_id == HEARTBEAT:
+                    reader_id, writer_id = _ENTITY_IDS.unpack_from(data, body)
+                    first_high, first_low, last_high, last_low, count = structs['heartbeat'].unpack_from(data, body)
+                    message.heartbeats.append(RTPSHeartbeat(
+                        source_prefix, reader_id, writer_id, (first_high << 32) | first_low,
+                        (last_high << 32) | last_low, count, bool(flags & FLAG_FINAL)
+                    ))
+                elif submessage_id == ACKNACK:
+                    reader_id, writer_id = _ENTITY_IDS.unpack_from(data, body)
+                    base, missing, set_end = _parse_sequence_set(data, structs, body + 8)
+                    count = structs['count'].unpack_from(data, set_end)[0]
+                    message.acknacks.append(RTPSAckNack(source_prefix, reader_id, writer_id, base, missing, count))
+                elif submessage_id == GAP:
+                    reader_id, writer_id = _ENTITY_IDS.unpack_from(data, body)
+                    start_high, start_low = structs['time'].unpack_from(data, body + 8)
+                    gap_start = (start_high << 32) | start_low
+                    base, listed, _ = _parse_sequence_set(data, structs, body + 16)
+                    message.gaps.append(RTPSGap(source_prefix, reader_id, writer_id, gap_start, base, listed))
+
+                name = SUBMESSAGE_NAMES.get(submessage_id)
+                if name is None:
+                    stats['unknown_submessages'] += 1
+                else:
+                    stats[name] += 1
+                position = end
+        except (struct.error, IndexError, ValueError) as e:
+            stats['malformed'] += 1
+            self.logger.debug(f"Malformed RTPS submessage at offset {position}: {e}")
+
+        stats['messages'] += 1
+        return message._replace(submessages=submessages)
+
+    def decode_sample(self, sample: RTPSSample, codec) -> Optional[Dict[str, Any]]:
+        """
+        Decode a sample's payload with a compiled ucdr codec (little-endian CDR only)
+        """
+        if sample.payload is None or sample.encapsulation not in (CDR_LE, PL_CDR_LE):
+            self.stats['undecodable_payloads'] += 1
+            return None
+        return codec.unpack(sample.payload)
+
+    def _parse_data(self, data: memoryview, flags: int, structs: Dict[str, struct.Struct], body: int, end: int,
+                    source_prefix: bytes, timestamp: Optional[float], destination: Optional[bytes]) -> RTPSSample:
+        """
+        Parse a DATA submessage body
+        """
+        reader_id, writer_id = _ENTITY_IDS.unpack_from(data, body + 4)
+        _, inline_qos_offset, high, low = structs['data'].unpack_from(data, body)
+        position = body + 4 + inline_qos_offset
+
+        inline_qos = None
+        if flags & FLAG_INLINE_QOS:
+            qos_end = _parameter_list_end(data, structs, position, end)
+            inline_qos = data[position:qos_end]
+            position = qos_end
+
+        encapsulation = None
+        payload = None
+        payload_offset = position
+        if flags & (FLAG_DATA | FLAG_KEY) and position + ENCAPSULATION_SIZE <= end:
+            encapsulation = ENCAPSULATION_HEADER.unpack_from(data, position)[0]
+            payload_offset = position + ENCAPSULATION_SIZE
+            payload = data[payload_offset:end]
+
+        return RTPSSample(source_prefix, reader_id, writer_id, (high << 32) | low, timestamp, destination,
+                          encapsulation, payload_offset, payload, inline_qos, not flags & FLAG_DATA and bool(flags & FLAG_KEY))
+
+    def _parse_data_frag(self, data: memoryview, flags: int, structs: Dict[str, struct.Struct], body: int, end: int,
+                         source_prefix: bytes, timestamp: Optional[float]) -> RTPSFragment:
+        """
+        Parse a DATA_FRAG submessage body
+        """
+        reader_id, writer_id = _ENTITY_IDS.unpack_from(data, body + 4)
+        (_, inline_qos_offset, high, low, fragment_start, fragments,
+         fragment_size, sample_size) = structs['data_frag'].unpack_from(data, body)
+        position = body + 4 + inline_qos_offset
+        if flags & FLAG_INLINE_QOS:
+            position = _parameter_list_end(data, structs, position, end)
+        return RTPSFragment(source_prefix, reader_id, writer_id, (high << 32) | low, fragment_start, fragments,
+                            fragment_size, sample_size, timestamp, data[position:end], bool(flags & FLAG_FRAG_KEY))
+
+def iter_parameters(data, little_endian: bool = True) -> Iterator[Tuple[int, memoryview]]:
+    """
+    Iterate (parameter ID, value view) over a parameter list up to its sentinel,
+    such as a PL_CDR discovery payload
+    """
+    data = data if isinstance(data, memoryview) else memoryview(data)
+    parameter = _STRUCTS['<' if little_endian else '>']['parameter']
+    position = 0
+    while position + 4 <= len(data):
+        pid, length = parameter.unpack_from(data, position)
+        position += 4
+        if pid == PID_SENTINEL or position + length > len(data):
+            return
+        yield pid, data[position:position + length]
+        position += length
+
+def read_string(value: memoryview, little_endian: bool = True) -> Optional[str]:
+    """
+    Decode a CDR string parameter value (uint32 length including the NUL, then the characters)
+    """
+    if len(value) < 4:
+        return None
+    length = _STRUCTS['<' if little_endian else '>']['count'].unpack_from(value)[0]
+    if length < 1 or 4 + length > len(value):
+        return None
+    return bytes(value[4:4 + length - 1]).decode('utf-8', errors='replace')
+
+def _parameter_list_end(data: memoryview, structs: Dict[str, struct.Struct], position: int, end: int) -> int:
+    """
+    Offset just past a parameter list's PID_SENTINEL
+    """
+    parameter = structs['parameter']
+    while position + 4 <= end:
+        pid, length = parameter.unpack_from(data, position)
+        position += 4
+        if pid == PID_SENTINEL:
+            return position
+        position += length
+    raise ValueError("Parameter list without sentinel")
+
+def _parse_sequence_set(data: memoryview, structs: Dict[str, struct.Struct], position: int) -> Tuple[int, Tuple[int, ...], int]:
+    """
+    Parse a SequenceNumberSet into (base, listed sequence numbers, end offset)
+    """
+    high, low, num_bits = structs['sequence_set'].unpack_from(data, position)
+    if num_bits > 256:
+        raise ValueError(f"Sequence number set with {num_bits} bits")
+    base = (high << 32) | low
+    words = (num_bits + 31) // 32
+    position += 12
+    bitmap = struct.unpack_from(structs['u16'].format[0] + f'{words}I', data, position)
+    listed = tuple(
+        base + bit for bit in range(num_bits)
+        if bitmap[bit // 32] & (0x80000000 >> (bit % 32))
+    )
+    return base, listed, position + words * 4
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Rule Engine - Declarative modification rules compiled to a decision table
+Rules loaded from a JSON file match ASOA packets on service, target, message type, topic
+and the current field value, and set, bias, scale or clamp one header or topic field.
+Rules are indexed by service and message type when they are loaded; the entries with their
+field offsets for each (service, target, message type, topic) are then kept in an LRU table,
+so evaluating a packet is a dict hit plus precompiled actions.
+"""
+
+import json
+import math
+import struct
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from asoa_protocol_analyzer import ASOA_HEADER_SIZE, ASOAMessageType
+from checksum_engine import update_checksum_field
+from topic_locator import TopicLocator
+from topic_registry import TopicDefinition, TopicRegistry
+from ucdr_handler import UCDRCodec, record_field_offset
+
+RULE_ACTIONS = ('set', 'bias', 'scale', 'clamp')
+
+# Header fields rules may rewrite: name -> (packet offset, struct)
+HEADER_FIELDS = {
+    'target_service_id': (8, struct.Struct('<H')),
+    'sequence_number': (10, struct.Struct('<I'))
+}
+
+_NAME_LENGTH = struct.Struct('<I')
+
+RuleKey = Tuple[int, int, int, Optional[int]]  # (service ID, target service ID, message type, topic ID)
+
+# Stands for every service ID or message type that no rule names
+_OTHER = -1
+
+def _compile_action(action: str, operand: Any) -> Callable[[float], float]:
+    """
+    Turn an action and its operand into a function of the current field value
+    """
+    if action == 'set':
+        value = float(operand)
+        return lambda current: value
+    if action == 'bias':
+        offset = float(operand)
+        return lambda current: current + offset
+    if action == 'scale':
+        factor = float(operand)
+        return lambda current: current * factor
+    low = -math.inf if operand[0] is None else float(operand[0])
+    high = math.inf if operand[1] is None else float(operand[1])
+    return lambda current: min(max(current, low), high)
+
+class CompiledRule:
+    """
+    One rule with its match constraints resolved to IDs and its action precompiled
+    """
+
+    __slots__ = ('index', 'name', 'service_id', 'target_id', 'message_type', 'topic_id', 'low', 'high',
+                 'field', 'header_field', 'apply', 'hits')
+
+    def __init__(self, index: int, name: str, service_id: Optional[int], target_id: Optional[int],
+                 message_type: Optional[int], topic_id: Optional[int], low: float, high: float,
+                 field: str, apply: Callable[[float], float]):
+        self.index = index
+        self.name = name
+        self.service_id = service_id
+        self.target_id = target_id
+        self.message_type = message_type
+        self.topic_id = topic_id
+        self.low = low
+        self.high = high
+        self.field = field
+        self.header_field = HEADER_FIELDS.get(field)
+        self.apply = apply
+        self.hits = 0
+
+RuleEntry = Tuple[CompiledRule, struct.Struct, Optional[int]]  # (rule, field struct, field offset)
+
+class RuleEngine:
+    """
+    Decision table of modification rules; the first matching rule per field wins
+    """
+
+    def __init__(self, registry: TopicRegistry, services: Dict[int, str], locator: Optional[TopicLocator] = None,
+                 max_entries: int = 4096, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.registry = registry
+        self.services = services
+        self.locator = locator or TopicLocator(registry.by_id or None)
+        self.max_entries = max_entries
+        self.rules: List[CompiledRule] = []
+        # Topic ID -> expected record prefix (topic_id, name length, name)
+        self._record_guards = {
+            definition.topic_id: _NAME_LENGTH.pack(definition.topic_id) + _NAME_LENGTH.pack(
+                len(definition.topic_name.encode('utf-8'))) + definition.topic_name.encode('utf-8')
+            for definition in registry.by_id.values()
+        }
+        self._needs_topics = False
+        # (service ID, message type) -> candidate rules in file order, built by set_rules()
+        self._candidates: Dict[Tuple[int, int], Tuple[CompiledRule, ...]] = {(_OTHER, _OTHER): ()}
+        self._named_services = frozenset()
+        self._named_types = frozenset()
+        # LRU decision table: rule key -> (header rule entries, topic rule entries), both in file order
+        self._table: 'OrderedDict[RuleKey, Tuple[Tuple[RuleEntry, ...], Tuple[RuleEntry, ...]]]' = OrderedDict()
+        self.stats = {'packets': 0, 'matched': 0, 'applied': 0, 'errors': 0}
+
+    def load(self, path: str) -> int:
+        """
+        Load rules from a JSON file ({"rules": [...]} or a plain list), replacing the current ones.
+        Returns the number of rules, 0 if the file is invalid.
+        """
+        try:
+            with open(path) as f:
+                document = json.load(f)
+            rules = document['rules'] if isinstance(document, dict) else document
+            count = self.set_rules(rules)
+            self.logger.info(f"Loaded {count} modification rules from {path}")
+            return count
+
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"Failed to load modification rules from {path}: {e}")
+            return 0
+
+    def set_rules(self, rules: List[Dict[str, Any]]) -> int:
+        """
+        Compile rule dicts, replacing the current rules; raises ValueError on an invalid rule
+        """
+        compiled = [self._compile(index, rule) for index, rule in enumerate(rules)]
+        # Values no rule names only match wildcard constraints, so they share the _OTHER candidates
+        services = {rule.service_id for rule in compiled if rule.service_id is not None}
+        message_types = {rule.message_type for rule in compiled if rule.message_type is not None}
+        self._candidates = {
+            (service_id, message_type): tuple(
+                rule for rule in compiled
+                if rule.service_id in (None, service_id) and rule.message_type in (None, message_type)
+            )
+            for service_id in services | {_OTHER} for message_type in message_types | {_OTHER}
+        }
+        self._named_services = frozenset(services)
+        self._named_types = frozenset(message_types)
+        self.rules = compiled
+        self._needs_topics = any(rule.topic_id is not None or rule.header_field is None for rule in compiled)
+        self._table.clear()
+        return len(compiled)
+
+    def apply(self, buffer: Union[bytearray, memoryview], service_id: int, target_service_id: int,
+              message_type: int, payload_length: int, checksum: int) -> Optional[Tuple[int, Any, Any]]:
+        """
+        Apply the matching rules to an ASOA packet in place.
+        Returns (updated checksum, original value, new value) of the first applied action, or None.
+        """
+        self.stats['packets'] += 1
+        end = ASOA_HEADER_SIZE + payload_length
+        if end > len(buffer):
+            return None
+
+        records = self._topic_records(buffer, end) if self._needs_topics else []
+        values = None
+
+        # Header rules: once per packet, keyed on the first topic record
+        header_rules, _ = self._lookup((service_id, target_service_id, message_type,
+                                        records[0][1] if records else None))
+        applied = set()
+        for rule, field_struct, offset in header_rules:
+            if rule.field in applied:
+                continue
+            result = self._apply_rule(rule, buffer, offset, field_struct, checksum)
+            if result is not None:
+                applied.add(rule.field)
+                checksum = result[0]
+                values = values or result[1:]
+
+        # Topic rules: once per topic record
+        for record_offset, topic_id in records:
+            _, topic_rules = self._lookup((service_id, target_service_id, message_type, topic_id))
+            if not topic_rules:
+                continue
+            applied = set()
+            for rule, field_struct, relative_offset in topic_rules:
+                if rule.field in applied:
+                    continue
+                if relative_offset is not None:
+                    field_offset = record_offset + relative_offset
+                else:
+                    field_offset = self._codec(topic_id).field_offset(buffer, rule.field, record_offset)
+                if field_offset is None or field_offset + field_struct.size > end:
+                    continue
+                result = self._apply_rule(rule, buffer, field_offset, field_struct, checksum)
+                if result is not None:
+                    applied.add(rule.field)
+                    checksum = result[0]
+                    values = values or result[1:]
+
+        if values is None:
+            return None
+        self.stats['matched'] += 1
+        return (checksum,) + values
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get evaluation counters, per-rule hits and the decision table size
+        """
+        stats = dict(self.stats)
+        stats['rules'] = {rule.name: rule.hits for rule in self.rules}
+        stats['table_entries'] = len(self._table)
+        return stats
+
+    def _lookup(self, key: RuleKey) -> Tuple[Tuple[RuleEntry, ...], Tuple[RuleEntry, ...]]:
+        """
+        Get the (rule, field struct, offset) entries matching a key, resolved from the precompiled
+        candidates once per key and then kept in the LRU table.
+        Header offsets are absolute, topic offsets relative to the record (None if not fixed).
+        """
+        table = self._table
+        entry = table.get(key)
+        if entry is not None:
+            table.move_to_end(key)
+            return entry
+
+        service_id, target_id, message_type, topic_id = key
+        candidates = self._candidates[(service_id if service_id in self._named_services else _OTHER,
+                                       message_type if message_type in self._named_types else _OTHER)]
+        header_rules = []
+        topic_rules = []
+        definition = self.registry.by_id[topic_id] if topic_id is not None else None
+        codec = self.registry.codecs[definition.name] if definition is not None else None
+        for rule in candidates:
+            if rule.target_id not in (None, target_id) or rule.topic_id not in (None, topic_id):
+                continue
+            if rule.header_field is not None:
+                offset, field_struct = rule.header_field
+                header_rules.append((rule, field_struct, offset))
+            elif codec is not None and rule.field in codec.field_structs:
+                topic_rules.append((rule, codec.field_structs[rule.field],
+                                    record_field_offset(codec, rule.field, definition.topic_name)))
+
+        if len(table) >= self.max_entries:
+            table.popitem(last=False)
+        entry = table[key] = (tuple(header_rules), tuple(topic_rules))
+        return entry
+
+    def _codec(self, topic_id: int) -> UCDRCodec:
+        return self.registry.codecs[self.registry.by_id[topic_id].name]
+
+    def _apply_rule(self, rule: CompiledRule, buffer, offset: int, field_struct: struct.Struct,
+                    checksum: int) -> Optional[Tuple[int, Any, Any]]:
+        """
+        Apply one rule's action to the field at `offset` if its value is in the rule's range
+        """
+        original_value = field_struct.unpack_from(buffer, offset)[0]
+        if not rule.low <= original_value <= rule.high:
+            return None
+        new_value = rule.apply(original_value)
+        if isinstance(original_value, int):
+            new_value = int(round(new_value))
+        old_raw = int.from_bytes(buffer[offset:offset + field_struct.size], 'little')
+        try:
+            field_struct.pack_into(buffer, offset, new_value)
+        except (struct.error, OverflowError) as e:
+            self.stats['errors'] += 1
+            self.logger.debug(f"Rule {rule.name} produced an invalid {rule.field} value {new_value}: {e}")
+            return None
+        checksum = update_checksum_field(checksum, offset, old_raw,
+                                         int.from_bytes(buffer[offset:offset + field_struct.size], 'little'))
+        rule.hits += 1
+        self.stats['applied'] += 1
+        return checksum, original_value, field_struct.unpack_from(buffer, offset)[0]
+
+    def _topic_records(self, buffer, end: int) -> List[Tuple[int, int]]:
+        """
+        Absolute (offset, topic ID) of each registered topic record in the payload, first per topic
+        """
+        payload = memoryview(buffer)[ASOA_HEADER_SIZE:end]
+        records = []
+        seen = set()
+        for offset, topic_id in self.locator.find_all(payload):
+            guard = self._record_guards.get(topic_id)
+            # The embedded topic name guards against topic ID look-alikes in float data
+            if topic_id in seen or guard is None or payload[offset:offset + len(guard)] != guard:
+                continue
+            seen.add(topic_id)
+            records.append((ASOA_HEADER_SIZE + offset, topic_id))
+        payload.release()
+        return records
+
+    def _compile(self, index: int, rule: Dict[str, Any]) -> CompiledRule:
+        name = rule.get('name', f"rule-{index}")
+        match = rule.get('match', {})
+        action = rule.get('action', {})
+        operations = [operation for operation in RULE_ACTIONS if operation in action]
+        if len(operations) != 1:
+            raise ValueError(f"Rule {name}: action needs exactly one of {', '.join(RULE_ACTIONS)}")
+        operation = operations[0]
+        operand = action[operation]
+        if operation == 'clamp' and (not isinstance(operand, (list, tuple)) or len(operand) != 2):
+            raise ValueError(f"Rule {name}: clamp takes [low, high]")
+
+        topic = None
+        if match.get('topic') is not None:
+            topic = self.registry.get(match['topic'])
+            if topic is None:
+                raise ValueError(f"Rule {name}: unknown topic {match['topic']}")
+
+        field = action.get('field', 'topic_data')
+        if field not in HEADER_FIELDS and not self._is_topic_field(field, topic):
+            raise ValueError(f"Rule {name}: unknown field {field}")
+
+        low, high = match.get('range') or (None, None)
+        return CompiledRule(
+            index, name,
+            self._service_id(match.get('service'), name),
+            self._service_id(match.get('target'), name),
+            self._message_type(match.get('message_type'), name),
+            topic.topic_id if topic is not None else None,
+            -math.inf if low is None else float(low),
+            math.inf if high is None else float(high),
+            field,
+            _compile_action(operation, operand)
+        )
+
+    def _is_topic_field(self, field: str, topic: Optional[TopicDefinition]) -> bool:
+        topics = [topic] if topic is not None else self.registry.by_id.values()
+        return any(field in self.registry.codecs[definition.name].field_structs for definition in topics)
+
+    def _service_id(self, service: Union[str, int, None], rule_name: str) -> Optional[int]:
+        if service is None or isinstance(service, int):
+            return service
+        for service_id, name in self.services.items():
+            if name == service:
+                return service_id
+        raise ValueError(f"Rule {rule_name}: unknown service {service}")
+
+    def _message_type(self, message_type: Union[str, int, None], rule_name: str) -> Optional[int]:
+        if message_type is None or isinstance(message_type, int):
+            return message_type
+        try:
+            return int(ASOAMessageType[message_type])
+        except KeyError:
+            raise ValueError(f"Rule {rule_name}: unknown message type {message_type}")
@@ -11,8 +11,21 @@ from typing import Dict, Any
 
 # Import ASOA MITM components
 from asoa_protocol_analyzer import ASOAProtocolAnalyzer
-from ucdr_handler import UCDRHandler
+from ucdr_handler import UCDRHandler, TEMPERATURE_SCHEMA, TEMPERATURE_VALUE_OFFSET, compile_schema, record_field_offset
 from asoa_message_modifier import ASOAMessageModifier
+from callback_dispatcher import CallbackDispatcher, ModificationEvent
+from modification_history import load_history
+from topic_locator import TopicLocator
+from topic_registry import TopicRegistry
+from packet_records import PacketRecordStore
+from pcap_reader import PcapReader, write_pcap
+from parallel_analysis import ParallelCaptureAnalyzer
+from columnar_export import export_capture, load_columns
+from flow_table import FlowTable
+from rtps_parser import RTPSParser, CDR_LE
+from fragment_reassembly import FragmentReassembler
+from topic_demux import TopicDemultiplexer
+from checksum_engine import packet_checksum, read_checksum, update_checksum, write_checksum
 from network_discovery import ASOANetworkDiscovery
 from platform_detector import PlatformDetector
 from utils.logger import setup_logger
@@ -103,6 +116,223 @@ def test_ucdr_handling():
     
     return success
 
+def test_compiled_ucdr_codec():
+    """Test compiled ucdr schema codecs"""
+    print("\n⚡ Testing Compiled ucdr Codec...")
+    
+    ucdr = UCDRHandler()
+    codec = ucdr.compile_schema(TEMPERATURE_SCHEMA)
+    
+    # Compiled codecs are cached per schema
+    if ucdr.compile_schema(dict(TEMPERATURE_SCHEMA)) is not codec:
+        print("   ❌ Codec was not cached")
+        return False
+    
+    temp_data = ucdr.create_temperature_ucdr(25.5, 0.5)
+    values = codec.unpack(temp_data)
+    print(f"   Decoded values: {values}")
+    
+    # Round trip through the codec must reproduce the original bytes
+    if codec.pack(values) != temp_data:
+        print("   ❌ Codec round trip mismatch")
+        return False
+    
+    # Truncated payloads are rejected
+    if codec.unpack(temp_data[:-2]) is not None:
+        print("   ❌ Truncated payload was decoded")
+        return False
+    
+    # Record-relative offsets keep the alignment padding after topic names of any length
+    speed = compile_schema({'topic_id': 'uint32', 'topic_name': 'string', 'speed': 'float64'})
+    speed_data = speed.pack({'topic_id': 7, 'topic_name': 'Speed', 'speed': 1.5})
+    aligned = (record_field_offset(speed, 'speed', 'Speed') == speed.field_offset(speed_data, 'speed') == 16 and
+               TEMPERATURE_VALUE_OFFSET == codec.field_offset(temp_data, 'temperature_value'))
+    print(f"   Record field offsets aligned: {aligned}")
+    
+    success = values['topic_name'] == 'Temp' and values['temperature_value'] == 25.5 and aligned
+    if success:
+        print("   ✅ Compiled codec decode/encode successful")
+    else:
+        print("   ❌ Compiled codec decode failed")
+    
+    return success
+
+def test_in_place_temperature_patch():
+    """Test in-place temperature patching on writable buffers"""
+    print("\n🩹 Testing In-Place Temperature Patch...")
+    
+    ucdr = UCDRHandler()
+    buffer = bytearray(ucdr.create_temperature_ucdr(25.5))
+    
+    # First patch locates the field, later patches reuse the returned offset
+    offset = ucdr.patch_temperature_in_ucdr(buffer, 80.0)
+    print(f"   Temperature value located at offset {offset}")
+    if offset is None:
+        print("   ❌ Temperature field not found")
+        return False
+    
+    view = memoryview(buffer)
+    ucdr.patch_temperature_in_ucdr(view, 99.9, offset)
+    final_temp = ucdr.extract_temperature_from_ucdr(bytes(buffer))
+    print(f"   Final temperature: {final_temp}°C")
+    
+    # A record behind other payload bytes is patched where it is, on both modifier paths
+    import struct
+    prefixed = bytearray(create_mock_asoa_packet()[:32]) + bytes(8) + ucdr.create_temperature_ucdr(25.5)
+    struct.pack_into('<I', prefixed, 14, len(prefixed) - 32)
+    write_checksum(prefixed, packet_checksum(prefixed))
+    modifier = ASOAMessageModifier()
+    modified = modifier.modify_asoa_packet(bytes(prefixed), 'temperature-spoof', target_temperature=80.0)
+    in_place = bytearray(prefixed)
+    modifier.modify_in_place(in_place, 'temperature-spoof', target_temperature=80.0)
+    reanalyzed = modifier.protocol_analyzer.analyze_packet(modified) if modified else None
+    prefixed_temp = reanalyzed['temperature_data'].temperature_value if reanalyzed and reanalyzed.get('temperature_data') else None
+    print(f"   Prefixed record temperature: {prefixed_temp}°C")
+    
+    success = (abs(final_temp - 99.9) < 0.1 and prefixed_temp is not None and abs(prefixed_temp - 80.0) < 0.1 and
+               modified == bytes(in_place) and modifier.validate_modified_packet(modified))
+    if success:
+        print("   ✅ In-place temperature patch successful")
+    else:
+        print("   ❌ In-place temperature patch failed")
+    
+    return success
+
+def test_batch_decode():
+    """Test columnar batch decoding of fixed-layout topics"""
+    print("\n📊 Testing Batch Decode...")
+    
+    ucdr = UCDRHandler()
+    payloads = [ucdr.create_temperature_ucdr(float(i)) for i in range(100)]
+    payloads.append(b'\x0f\x00')  # Truncated payload
+    
+    columns = ucdr.decode_batch(payloads, 'Temperature')
+    print(f"   Decoded {int(columns['valid'].sum())}/{len(payloads)} payloads")
+    print(f"   Temperature column: {columns['temperature_value'][:5]}...")
+    
+    success = (
+        int(columns['valid'].sum()) == 100 and
+        not columns['valid'][-1] and
+        columns['temperature_value'][42] == 42.0 and
+        columns['topic_name'][0] == 'Temp'
+    )
+    if success:
+        print("   ✅ Batch decode successful")
+    else:
+        print("   ❌ Batch decode failed")
+    
+    return success
+
+def test_ucdr_sequences():
+    """Test bulk sequence and fixed-array ucdr types"""
+    print("\n📏 Testing ucdr Sequences/Arrays...")
+    
+    from array import array
+    
+    ucdr = UCDRHandler()
+    schema = {
+        'topic_id': 'uint32',
+        'ranges': 'sequence<float32>',
+        'sector_ids': 'uint16[4]',
+        'confidence': 'float64'
+    }
+    codec = ucdr.compile_schema(schema)
+    
+    values = {
+        'topic_id': 12,
+        'ranges': array('f', [1.5, 2.5, 3.5]),
+        'sector_ids': array('H', [1, 2, 3, 4]),
+        'confidence': 0.75
+    }
+    data = codec.pack(values)
+    decoded = codec.unpack(data)
+    print(f"   Encoded {len(data)} bytes, decoded ranges: {list(decoded['ranges'])}")
+    
+    columns = ucdr.decode_batch([data, data], schema)
+    print(f"   Batch sector_ids shape: {columns['sector_ids'].shape}")
+    
+    success = decoded == values and columns['sector_ids'].shape == (2, 4) and list(columns['ranges'][1]) == [1.5, 2.5, 3.5]
+    if success:
+        print("   ✅ ucdr sequences/arrays working")
+    else:
+        print("   ❌ ucdr sequences/arrays failed")
+    
+    return success
+
+def test_ucdr_view():
+    """Test lazy zero-copy ucdr message views"""
+    print("\n👓 Testing Lazy ucdr View...")
+    
+    ucdr = UCDRHandler()
+    values = {'topic_id': 15, 'topic_name': 'Temp', 'temperature_value': 21.5, 'accuracy': 0.5}
+    data = ucdr.compile_schema(TEMPERATURE_SCHEMA).pack(values)
+    
+    view = ucdr.view(data, TEMPERATURE_SCHEMA)
+    print(f"   Temperature: {view.temperature_value}°C, accuracy offset: {view.offset('accuracy')}")
+    
+    name = view.raw('topic_name')
+    truncated = ucdr.view(data[:12], TEMPERATURE_SCHEMA)
+    
+    success = (view.temperature_value == 21.5 and view['topic_name'] == 'Temp' and
+               isinstance(name, memoryview) and name.tobytes() == b'Temp' and
+               view.offset('accuracy') == 16 and truncated.accuracy is None)
+    if success:
+        print("   ✅ Lazy ucdr view working")
+    else:
+        print("   ❌ Lazy ucdr view failed")
+    
+    return success
+
+def test_topic_registry():
+    """Test topic schema registry generated from the interface headers"""
+    print("\n📚 Testing Topic Registry...")
+    
+    import os
+    import tempfile
+    
+    import shutil
+    
+    cache_path = os.path.join(tempfile.mkdtemp(), 'topic_registry.pickle')
+    registry = TopicRegistry(cache_path=cache_path)
+    topics = registry.load()
+    print(f"   Parsed topics: {sorted((t.topic_id, t.topic_name) for t in topics.values())}")
+    
+    # The first load() persists what it parsed, so the next startup reuses it; refresh() reparses
+    cached = TopicRegistry(cache_path=cache_path)
+    cached.load()
+    refreshed = TopicRegistry(cache_path=cache_path)
+    refreshed.refresh()
+    print(f"   Loaded from cache: {cached.loaded_from_cache}")
+    
+    # Several topic classes in one header each keep their own name and ID
+    interface_dir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(registry.interface_dir, 't_simple.hpp'), interface_dir)
+    with open(os.path.join(interface_dir, 't_pair.hpp'), 'w') as f:
+        f.write('#include "t_simple.hpp"\n'
+                'class Pressure : public FloatTopic {\npublic:\n    Pressure() : FloatTopic() {\n'
+                '        topic_name = "Press";\n        topic_id = 40;\n    }\n};\n'
+                'class Humidity : public FloatTopic {\npublic:\n    Humidity() : FloatTopic() {\n'
+                '        topic_id = 41;\n        topic_name = "Humid";\n    }\n};\n')
+    pair = TopicRegistry(interface_dir, cache_path=None).load()
+    
+    ucdr = UCDRHandler()
+    values = cached.codec('Temp').unpack(ucdr.create_temperature_ucdr(21.5))
+    print(f"   Decoded with registry codec: {values}")
+    
+    success = (
+        not registry.loaded_from_cache and cached.loaded_from_cache and not refreshed.loaded_from_cache and
+        os.path.exists(cache_path) and
+        {(t.name, t.topic_id, t.topic_name) for t in pair.values()} == {('Pressure', 40, 'Press'), ('Humidity', 41, 'Humid')} and
+        {t.topic_id for t in topics.values()} == {12, 13, 14, 15, 16} and
+        values['topic_data'] == 21.5
+    )
+    if success:
+        print("   ✅ Topic registry working")
+    else:
+        print("   ❌ Topic registry failed")
+    
+    return success
+
 def test_asoa_protocol_analyzer():
     """Test ASOA protocol analyzer"""
     print("\n📦 Testing ASOA Protocol Analyzer...")
@@ -131,6 +361,451 @@ def test_asoa_protocol_analyzer():
     
     return analysis is not None
 
+def test_header_codec():
+    """Test shared precompiled ASOA header codec"""
+    print("\n🧾 Testing ASOA Header Codec...")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    mock_packet = create_mock_asoa_packet()
+    
+    header = analyzer._parse_header(memoryview(mock_packet))
+    repacked = bytearray(32)
+    header.pack_into(repacked)
+    print(f"   Parsed header: service {header.service_id} -> {header.target_service_id}, seq {header.sequence_number}")
+    
+    success = (bytes(repacked) == mock_packet[:32] and header.pack() == mock_packet[:32] and
+               analyzer._parse_header(b'XXXX' + mock_packet[4:]) is None)
+    if success:
+        print("   ✅ Header codec round trip working")
+    else:
+        print("   ❌ Header codec round trip failed")
+    
+    return success
+
+def test_checksum_engine():
+    """Test vectorized and incremental XOR checksum"""
+    print("\n🧮 Testing Checksum Engine...")
+    
+    import struct
+    
+    analyzer = ASOAProtocolAnalyzer()
+    mock_packet = create_mock_asoa_packet()
+    checksum = read_checksum(mock_packet)
+    print(f"   Packet checksum: 0x{checksum:08x}")
+    
+    # Patch the temperature and fold only the changed bytes into the checksum
+    patched = bytearray(mock_packet)
+    value_offset = len(patched) - 8
+    old_value = bytes(patched[value_offset:value_offset + 4])
+    struct.pack_into('<f', patched, value_offset, 99.9)
+    write_checksum(patched, update_checksum(checksum, value_offset, old_value, patched[value_offset:value_offset + 4]))
+    
+    modifier = ASOAMessageModifier()
+    modified_packet = modifier.modify_asoa_packet(mock_packet, 'temperature-spoof', target_temperature=99.9)
+    
+    success = (packet_checksum(mock_packet) == checksum and analyzer.validate_checksum(mock_packet) and
+               analyzer.validate_checksum(bytes(patched)) and modified_packet is not None and
+               modifier.validate_modified_packet(modified_packet))
+    if success:
+        print("   ✅ Incremental checksum update working")
+    else:
+        print("   ❌ Checksum engine failed")
+    
+    return success
+
+def test_packet_record_store():
+    """Test compact storage of analyzed packets"""
+    print("\n🗃️  Testing Packet Record Store...")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    packets = [create_mock_asoa_packet() for _ in range(3)]
+    
+    flows = analyzer.identify_service_communication(packets, compact=True)
+    store = flows.get('SensorModule->Dashboard')
+    if store is None:
+        print("   ❌ Packet record store failed")
+        return False
+    
+    record = store[0]
+    columns = store.columns()
+    
+    # RTPS sequence numbers are 64-bit
+    rtps_store = PacketRecordStore()
+    rtps_store.append(analyzer.analyze_packet(create_mock_rtps_packet(sequence=(1 << 32) + 5)))
+    print(f"   Stored {len(store)} packets in {store.nbytes} bytes, temperature: {store.temperature(0)}°C")
+    
+    success = (isinstance(store, PacketRecordStore) and len(store) == 3 and
+               record.service_id == 1 and record.payload == packets[0][32:] and
+               store.temperature(0) == 25.5 and list(columns['sequence_number']) == [12345] * 3 and
+               rtps_store[0].sequence_number == (1 << 32) + 5)
+    if success:
+        print("   ✅ Packet record store working")
+    else:
+        print("   ❌ Packet record store failed")
+    
+    return success
+
+def test_pcap_reader():
+    """Test streaming pcap reader feeding the analyzer"""
+    print("\n📼 Testing Pcap Reader...")
+    
+    import os
+    import tempfile
+    
+    capture = os.path.join(tempfile.mkdtemp(), 'asoa.pcap')
+    packets = [create_mock_asoa_packet() for _ in range(3)]
+    write_pcap(capture, packets)
+    write_pcap(capture + '.other', packets, port=9999)
+    
+    with PcapReader(capture) as reader:
+        payloads = [bytes(payload) for _, payload in reader]
+        stats = dict(reader.stats)
+    with PcapReader(capture + '.other') as reader:
+        filtered = list(reader)
+    print(f"   Read {stats['datagrams']} of {stats['records']} records ({len(filtered)} on other ports)")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    flows = analyzer.analyze_capture(capture)
+    store = flows.get('SensorModule->Dashboard')
+    
+    success = (payloads == packets and not filtered and store is not None and
+               len(store) == 3 and store.temperature(2) == 25.5)
+    if success:
+        print("   ✅ Pcap reader working")
+    else:
+        print("   ❌ Pcap reader failed")
+    
+    return success
+
+def test_columnar_export():
+    """Test batched columnar export and reload"""
+    print("\n🗄️  Testing Columnar Export...")
+    
+    import os
+    import tempfile
+    
+    directory = tempfile.mkdtemp()
+    capture = os.path.join(directory, 'asoa.pcap')
+    write_pcap(capture, [create_mock_asoa_packet() for _ in range(5)], timestamps=[float(i) for i in range(5)])
+    
+    manifest = export_capture(capture, os.path.join(directory, 'export'), batch_size=2, format='npz')
+    tables = load_columns(os.path.join(directory, 'export'))
+    packets = tables['packets']
+    temperature = tables.get('Temperature', {})
+    print(f"   {manifest['packets']['rows']} packet rows in {len(manifest['packets']['files'])} batches, "
+          f"tables: {sorted(tables)}")
+    
+    # Sharded across processes: the same batches and rows as the single-shard export
+    sharded_manifest = export_capture(capture, os.path.join(directory, 'sharded'), batch_size=2, format='npz', workers=2)
+    sharded = load_columns(os.path.join(directory, 'sharded'))
+    same = sharded_manifest == manifest and all(
+        sharded[table][column].tolist() == tables[table][column].tolist()
+        for table in tables for column in tables[table]
+    )
+    print(f"   Sharded export matches: {same}")
+    
+    success = (same and manifest['packets']['rows'] == 5 and len(manifest['packets']['files']) == 3 and
+               packets['timestamp'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0] and
+               packets['service_id'].dtype.name == 'uint16' and set(packets['message_type'].tolist()) == {0x02} and
+               len(temperature.get('topic_data', [])) == 5 and abs(temperature['topic_data'][0] - 25.5) < 0.01)
+    if success:
+        print("   ✅ Columnar export working")
+    else:
+        print("   ❌ Columnar export failed")
+    
+    return success
+
+def test_flow_aggregation():
+    """Test streaming per-flow aggregation"""
+    print("\n🌊 Testing Flow Aggregation...")
+    
+    import struct
+    
+    analyzer = ASOAProtocolAnalyzer()
+    
+    def packets():
+        # Sequence 3 is missing from the stream
+        for sequence in (1, 2, 4, 5):
+            packet = bytearray(create_mock_asoa_packet())
+            struct.pack_into('<I', packet, 10, sequence)
+            yield float(sequence), bytes(packet)
+    
+    flows = analyzer.summarize_service_communication(packets(), max_samples=2)
+    flow = flows.get('SensorModule->Dashboard')
+    if flow is None:
+        print("   ❌ Flow aggregation failed")
+        return False
+    
+    temperature = flow.values['temperature']
+    print(f"   {flow.packets} packets, {flow.bytes} bytes, gaps: {flow.sequence_gaps}, "
+          f"mean temperature: {temperature.mean}°C")
+    
+    temperature_flows = analyzer.summarize_temperature_flows(packets())
+    
+    success = (flow.packets == 4 and flow.sequence_gaps == 1 and flow.duration == 4.0 and
+               temperature.minimum == temperature.maximum == 25.5 and len(flow.samples) == 2 and
+               list(temperature_flows) == ['SensorModule->Dashboard'])
+    if success:
+        print("   ✅ Flow aggregation working")
+    else:
+        print("   ❌ Flow aggregation failed")
+    
+    return success
+
+def test_parallel_analysis():
+    """Test sharded multi-process capture analysis"""
+    print("\n🧵 Testing Parallel Capture Analysis...")
+    
+    import os
+    import struct
+    import tempfile
+    import numpy as np
+    
+    packets = []
+    for sequence in range(200):
+        packet = bytearray(create_mock_asoa_packet())
+        struct.pack_into('<I', packet, 10, sequence * 2)
+        packets.append(bytes(packet))
+    capture = os.path.join(tempfile.mkdtemp(), 'asoa.pcap')
+    write_pcap(capture, packets, timestamps=[sequence * 0.01 for sequence in range(200)])
+    
+    serial = ParallelCaptureAnalyzer(workers=1).analyze(capture)
+    parallel = ParallelCaptureAnalyzer(workers=2).analyze(capture)
+    flow = parallel['flows'].get('SensorModule->Dashboard')
+    print(f"   {parallel['shards']} shards, {parallel['stats']['datagrams']} datagrams, "
+          f"gaps: {flow.sequence_gaps if flow else None}")
+    
+    # SEDP discovery in the first shard must route the Velocity writer's samples in every shard
+    discovery = [create_mock_sedp_packet()] + [create_mock_rtps_packet(sequence=sequence, writer_id=0x00aa0002)
+                                               for sequence in range(1, 100)]
+    discovery_capture = os.path.join(os.path.dirname(capture), 'discovery.pcap')
+    write_pcap(discovery_capture, discovery, timestamps=[sequence * 0.01 for sequence in range(100)])
+    serial_discovery = ParallelCaptureAnalyzer(workers=1).analyze(discovery_capture)['columns']
+    sharded = ParallelCaptureAnalyzer(workers=2).analyze(discovery_capture)
+    sharded_discovery = sharded['columns']
+    velocity = [name for name in sharded_discovery if name.startswith('Velocity.')]
+    print(f"   Discovery capture: {sharded['shards']} shards, Velocity columns: {len(velocity)}")
+    same_routing = (sorted(sharded_discovery) == sorted(serial_discovery) and bool(velocity) and all(
+        np.array_equal(sharded_discovery[name], serial_discovery[name], equal_nan=True) for name in serial_discovery
+    ) and int(np.count_nonzero(~np.isnan(sharded_discovery[velocity[0]]))) == 99)
+    
+    success = (flow is not None and flow.packets == 200 and
+               flow.sequence_gaps == serial['flows']['SensorModule->Dashboard'].sequence_gaps == 199 and
+               list(parallel['columns']['sequence_number']) == list(serial['columns']['sequence_number']) and
+               len(parallel['columns']['Temperature.topic_data']) == 200 and same_routing)
+    if success:
+        print("   ✅ Parallel capture analysis working")
+    else:
+        print("   ❌ Parallel capture analysis failed")
+    
+    return success
+
+def test_message_type_dispatch():
+    """Test per-type payload decoder dispatch"""
+    print("\n🗃️  Testing Message Type Dispatch...")
+    
+    def with_type(message_type):
+        packet = bytearray(create_mock_asoa_packet())
+        packet[5] = message_type
+        return bytes(packet)
+    
+    analyzer = ASOAProtocolAnalyzer()
+    analyzer.register_decoder(0x05, lambda analysis, payload: analysis.update(heartbeat_bytes=len(payload)))
+    heartbeat = analyzer.analyze_packet(with_type(0x05))
+    fusion = analyzer.analyze_packet(with_type(0x11))
+    unknown = analyzer.analyze_packet(with_type(0x7f))
+    ack = analyzer.analyze_packet(with_type(0x04))
+    counts = analyzer.get_message_type_stats()
+    print(f"   Counts: {counts}")
+    
+    success = (heartbeat is not None and heartbeat.get('heartbeat_bytes') == len(heartbeat['payload']) and
+               fusion is not None and 'Temperature' in fusion.get('topic_data', {}) and
+               unknown is not None and unknown['message_type'] == 0x7f and 'topic_data' not in unknown and
+               ack is not None and 'topic_data' not in ack and
+               counts == {'HEARTBEAT': 1, 'SENSOR_FUSION': 1, '0x7f': 1, 'ACKNOWLEDGMENT': 1})
+    if success:
+        print("   ✅ Message type dispatch working")
+    else:
+        print("   ❌ Message type dispatch failed")
+    
+    return success
+
+def test_flow_table():
+    """Test O(1) flow table counters"""
+    print("\n📊 Testing Flow Table...")
+    
+    import struct
+    
+    table = FlowTable(ring_size=3)
+    for sequence, timestamp in ((1, 0.0), (2, 0.1), (5, 0.2), (4, 0.3)):
+        table.update((1, 2, 0x02), 52, sequence, timestamp)
+    counters = table.get((1, 2, 0x02))
+    print(f"   {counters.packets} packets, gaps: {counters.sequence_gaps}, reorders: {counters.reorders}, "
+          f"inter-arrival: {counters.interarrival_ewma:.3f}s")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    for sequence in (10, 12):
+        packet = bytearray(create_mock_asoa_packet())
+        struct.pack_into('<I', packet, 10, sequence)
+        analyzer.analyze_packet(bytes(packet), timestamp=float(sequence))
+    health = analyzer.get_flow_health().get('SensorModule->Dashboard (0x02)')
+    
+    # Service IDs sharing a name are one flow
+    analyzer.add_service_mapping(9, "SensorModule")
+    packets = [bytearray(create_mock_asoa_packet()) for _ in range(3)]
+    for packet in packets[1:]:
+        struct.pack_into('<H', packet, 6, 9)
+    flows = analyzer.identify_service_communication(bytes(packet) for packet in packets)
+    
+    success = (counters.packets == 4 and counters.bytes == 208 and counters.sequence_gaps == 2 and
+               counters.reorders == 1 and abs(counters.interarrival_ewma - 0.1) < 1e-9 and
+               counters.recent_timestamps() == [0.1, 0.2, 0.3] and
+               health is not None and health['packets'] == 2 and health['sequence_gaps'] == 1 and
+               list(flows) == ['SensorModule->Dashboard'] and len(flows['SensorModule->Dashboard']) == 3)
+    if success:
+        print("   ✅ Flow table working")
+    else:
+        print("   ❌ Flow table failed")
+    
+    return success
+
+def test_rtps_parser():
+    """Test zero-copy RTPS wire-format parsing"""
+    print("\n📡 Testing RTPS Parser...")
+    
+    import struct
+    
+    packet = create_mock_rtps_packet(25.5, sequence=7)
+    # Reader side chatter: HEARTBEAT, ACKNACK requesting 3 and 5, GAP of 1-2 and 4
+    packet += struct.pack('<BBH', 0x07, 0x01, 28) + struct.pack('>II', 0, 0x102) + struct.pack('<iIiIi', 0, 1, 0, 7, 3)
+    packet += struct.pack('<BBH', 0x06, 0x01, 28) + struct.pack('>II', 0, 0x102) + struct.pack('<iIII', 0, 3, 3, 0xA0000000) + struct.pack('<i', 1)
+    packet += struct.pack('<BBH', 0x08, 0x01, 32) + struct.pack('>II', 0, 0x102) + struct.pack('<iIiIII', 0, 1, 0, 3, 2, 0x40000000)
+    
+    parser = RTPSParser()
+    message = parser.parse(packet)
+    sample = message.samples[0]
+    
+    # A GAP announcing billions of irrelevant sequence numbers must stay cheap
+    huge_gap = create_mock_rtps_packet(25.5, sequence=8)
+    huge_gap += struct.pack('<BBH', 0x08, 0x01, 32) + struct.pack('>II', 0, 0x102) + struct.pack('<iIiIII', 0, 1, 4, 0, 32, 0x80000000)
+    started = time.time()
+    gap = parser.parse(huge_gap).gaps[0]
+    gap_time = time.time() - started
+    values = parser.decode_sample(sample, compile_schema(TEMPERATURE_SCHEMA))
+    print(f"   {message.submessages} submessages, writer {sample.writer_id:#010x} SN {sample.sequence_number}, "
+          f"temperature {values['temperature_value'] if values else None}")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    analysis = analyzer.analyze_packet(packet)
+    
+    success = (message.submessages == 5 and sample.encapsulation == CDR_LE and sample.sequence_number == 7 and
+               isinstance(sample.payload, memoryview) and abs(sample.timestamp - 1700000000.5) < 1e-6 and
+               values is not None and abs(values['temperature_value'] - 25.5) < 0.01 and
+               message.heartbeats[0].last_sequence == 7 and message.acknacks[0].missing == (3, 5) and
+               message.gaps[0].gap_start == 1 and message.gaps[0].gap_end == 3 and message.gaps[0].listed == (4,) and
+               message.gaps[0].is_irrelevant(2) and not message.gaps[0].is_irrelevant(3) and
+               gap.gap_end == 2 ** 34 and gap.listed == (2 ** 34,) and gap.is_irrelevant(2 ** 33) and gap_time < 0.1 and
+               parser.parse(b'ASOA' + bytes(40)) is None and
+               analysis is not None and analysis['protocol'] == 'rtps' and
+               abs(analysis['temperature_data'].temperature_value - 25.5) < 0.01)
+    if success:
+        print("   ✅ RTPS parser working")
+    else:
+        print("   ❌ RTPS parser failed")
+    
+    return success
+
+def test_fragment_reassembly():
+    """Test RTPS DATA_FRAG reassembly with bounded memory"""
+    print("\n🧩 Testing Fragment Reassembly...")
+    
+    import struct
+    
+    sample = b'\x00\x01\x00\x00' + UCDRHandler().create_temperature_ucdr(31.5)
+    fragment_size = 8
+    count = -(-len(sample) // fragment_size)
+    
+    def data_frag(number, sequence=1, writer_id=0x102):
+        chunk = sample[(number - 1) * fragment_size:number * fragment_size]
+        body = (struct.pack('<HH', 0, 28) + struct.pack('>II', 0, writer_id) +
+                struct.pack('<iIIHHI', 0, sequence, number, 1, fragment_size, len(sample)) + chunk)
+        return b'RTPS' + bytes((2, 3)) + b'\x01\x0f' + bytes(range(1, 13)) + struct.pack('<BBH', 0x16, 0x01, len(body)) + body
+    
+    # Out of order with a duplicate; only the last fragment completes the sample
+    analyzer = ASOAProtocolAnalyzer()
+    order = [count] + list(range(1, count))
+    analyses = [analyzer.analyze_packet(data_frag(number), timestamp=1.0) for number in order[:2] + order[1:2] + order[2:]]
+    completed = analyses[-1]
+    stats = analyzer.get_reassembly_stats()
+    print(f"   {count} fragments -> {stats['completed']} sample, duplicates: {stats['duplicates']}, "
+          f"temperature {completed['temperature_data'].temperature_value if 'temperature_data' in completed else None}")
+    
+    # Memory cap and timeout eviction of incomplete samples
+    parser = RTPSParser()
+    reassembler = FragmentReassembler(max_bytes=len(sample) + 8, timeout=5.0)
+    reassembler.add(parser.parse(data_frag(1, sequence=1)).fragments[0], now=0.0)
+    reassembler.add(parser.parse(data_frag(1, sequence=2)).fragments[0], now=1.0)
+    expired = reassembler.expire(now=10.0)
+    eviction = reassembler.get_stats()
+    print(f"   evicted on memory: {eviction['evicted_memory']}, on timeout: {expired}, pending bytes: {eviction['pending_bytes']}")
+    
+    # Fragments outside the announced sample are rejected before a buffer is allocated for them
+    stray = parser.parse(data_frag(1, sequence=3)).fragments[0]
+    strays = FragmentReassembler()
+    strays.add(stray._replace(fragment_start=count + 1), now=0.0)
+    strays.add(stray._replace(data=stray.data[:2]), now=0.0)
+    rejected = strays.get_stats()
+    print(f"   out-of-range fragments: {rejected['malformed']} rejected, {rejected['pending']} pending")
+    
+    success = (rejected['malformed'] == 2 and rejected['pending'] == 0 and rejected['pending_bytes'] == 0 and
+               stats['completed'] == 1 and stats['duplicates'] == 1 and stats['pending'] == 0 and
+               all('temperature_data' not in analysis for analysis in analyses[:-1]) and
+               abs(completed['temperature_data'].temperature_value - 31.5) < 0.01 and
+               eviction['evicted_memory'] == 1 and expired == 1 and eviction['pending_bytes'] == 0)
+    if success:
+        print("   ✅ Fragment reassembly working")
+    else:
+        print("   ❌ Fragment reassembly failed")
+    
+    return success
+
+def test_topic_demux():
+    """Test writer GUID to topic routing"""
+    print("\n🔀 Testing Topic Demux...")
+    
+    import struct
+    
+    registry = TopicRegistry()
+    registry.load()
+    demux = TopicDemultiplexer(registry)
+    mapped = demux.load_legit_flows()
+    
+    # Temperature source endpoint 19 of legit_data_flows.xml as the writer's entityKey
+    parser = RTPSParser()
+    temperature_sample = parser.parse(create_mock_rtps_packet(writer_id=(19 << 8) | 0x02)).samples[0]
+    routed = [demux.decode(temperature_sample) for _ in range(3)]
+    
+    # SEDP announcement of a Velocity writer, then a sample from it
+    analyzer = ASOAProtocolAnalyzer()
+    analyzer.analyze_packet(create_mock_sedp_packet())
+    velocity = analyzer.analyze_packet(create_mock_rtps_packet(writer_id=0x00aa0002))
+    temperature = analyzer.analyze_packet(create_mock_rtps_packet(writer_id=(19 << 8) | 0x02))
+    stats = analyzer.topic_demux.get_stats()
+    print(f"   {mapped} legit flow endpoints, learned writers: {stats['learned_writers']}, "
+          f"routed: {stats['routed']}, unrouted: {stats['unrouted']}")
+    
+    success = (mapped > 0 and all(result is not None and result[0].name == 'Temperature' for result in routed) and
+               demux.get_stats()['writers'] == 1 and
+               stats['learned_writers'] == 1 and 'Velocity' in velocity.get('topic_data', {}) and
+               'temperature_data' not in velocity and 'Temperature' in temperature.get('topic_data', {}) and
+               abs(temperature['temperature_data'].temperature_value - 25.5) < 0.01)
+    if success:
+        print("   ✅ Topic demux working")
+    else:
+        print("   ❌ Topic demux failed")
+    
+    return success
+
 def create_mock_asoa_packet():
     """Create a mock ASOA packet for testing"""
     import struct
@@ -172,8 +847,8 @@ def create_mock_asoa_packet():
     # Set payload length
     struct.pack_into('<I', header, 14, len(payload))
     
-    # Calculate checksum
-    checksum_data = bytes(header[:18]) + bytes(header[22:30]) + payload
+    # Calculate checksum over the packet without the checksum field
+    checksum_data = bytes(header[:18]) + bytes(header[22:]) + payload
     checksum = 0
     for i in range(0, len(checksum_data), 4):
         chunk = checksum_data[i:i+4]
@@ -188,6 +863,101 @@ def create_mock_asoa_packet():
     # Combine header and payload
     return bytes(header) + payload
 
+def create_mock_rtps_packet(temperature: float = 25.5, sequence: int = 1, writer_id: int = 0x102,
+                            guid_prefix: bytes = bytes(range(1, 13))) -> bytes:
+    """Create a mock RTPS message: INFO_TS + DATA carrying a CDR_LE temperature sample"""
+    import struct
+    
+    header = b'RTPS' + bytes((2, 3)) + b'\x01\x0f' + guid_prefix
+    info_ts = struct.pack('<BBH', 0x09, 0x01, 8) + struct.pack('<iI', 1700000000, 1 << 31)
+    payload = b'\x00\x01\x00\x00' + UCDRHandler().create_temperature_ucdr(temperature)
+    body = (struct.pack('<HH', 0, 16) + struct.pack('>II', 0, writer_id) +
+            struct.pack('<iI', sequence >> 32, sequence & 0xFFFFFFFF) + payload)
+    data = struct.pack('<BBH', 0x15, 0x05, len(body)) + body
+    return header + info_ts + data
+
+def create_mock_sedp_packet(writer_id: int = 0x00aa0002, topic_name: str = 'Velocity',
+                            guid_prefix: bytes = bytes(range(1, 13))) -> bytes:
+    """Create a mock SEDP publication announcing that a writer publishes a topic"""
+    import struct
+    
+    name = topic_name.encode() + b'\x00'
+    name += bytes(-len(name) % 4)
+    parameters = (struct.pack('<HH', 0x005a, 16) + guid_prefix + struct.pack('>I', writer_id) +
+                  struct.pack('<HHI', 0x0005, 4 + len(name), len(topic_name) + 1) + name + struct.pack('<HH', 0x0001, 0))
+    body = (struct.pack('<HH', 0, 16) + struct.pack('>II', 0x000003c7, 0x000003c2) + struct.pack('<iI', 0, 1) +
+            b'\x00\x03\x00\x00' + parameters)
+    return b'RTPS' + bytes((2, 3)) + b'\x01\x0f' + guid_prefix + struct.pack('<BBH', 0x15, 0x05, len(body)) + body
+
+def test_flow_offset_cache():
+    """Test per-flow temperature offset cache"""
+    print("\n🗂️  Testing Flow Offset Cache...")
+    
+    analyzer = ASOAProtocolAnalyzer()
+    mock_packet = create_mock_asoa_packet()
+    
+    # Same flow three times: one scan, then cached offset hits
+    for _ in range(3):
+        analysis = analyzer.analyze_packet(mock_packet)
+    
+    stats = analyzer.get_offset_cache_stats()
+    print(f"   Cache hits: {stats['hits']}, misses: {stats['misses']}")
+    temp_value = analysis['temperature_data'].temperature_value
+    print(f"   Temperature: {temp_value}°C")
+    
+    # The public ucdr path resolves the record through the same cache
+    ucdr = UCDRHandler()
+    payload = b'\x00' * 8 + ucdr.create_temperature_ucdr(25.5)
+    flow_key = (1, 1, len(payload))
+    for _ in range(2):
+        modified = ucdr.modify_temperature_in_ucdr(payload, 60.0, flow_key)
+    ucdr_stats = ucdr.offset_cache.get_stats()
+    print(f"   ucdr cache hits: {ucdr_stats['hits']}, misses: {ucdr_stats['misses']}")
+    
+    success = (stats['hits'] == 2 and stats['misses'] == 1 and abs(temp_value - 25.5) < 0.1 and
+               ucdr_stats['hits'] == 1 and ucdr_stats['misses'] == 1 and
+               abs(ucdr.extract_temperature_from_ucdr(modified[8:]) - 60.0) < 0.1)
+    if success:
+        print("   ✅ Flow offset cache working")
+    else:
+        print("   ❌ Flow offset cache failed")
+    
+    return success
+
+def test_topic_locator():
+    """Test fast topic ID locator"""
+    print("\n🔎 Testing Topic Locator...")
+    
+    ucdr = UCDRHandler()
+    locator = TopicLocator()
+    
+    # Padding in front of the record exercises the raw search path
+    payloads = [ucdr.create_temperature_ucdr(20.0 + i) for i in range(3)]
+    payloads[1] = b'\x00' * 6 + payloads[1]
+    
+    matches = locator.find_all(payloads[1])
+    print(f"   Matches in single payload: {matches}")
+    
+    # Batch search over the concatenated payloads
+    offsets = [0, len(payloads[0]), len(payloads[0]) + len(payloads[1])]
+    batch = locator.find_all_batch(b''.join(payloads), offsets)
+    found = list(zip(batch['payload'].tolist(), batch['offset'].tolist(), batch['topic_id'].tolist()))
+    print(f"   Batch matches: {found}")
+    
+    # Memoryview searches (compiled once per pattern) agree with bytes.find
+    view = memoryview(payloads[1])
+    single = [locator.find(data, 15, start) for data in (payloads[1], view) for start in (0, 7)]
+    print(f"   Single-ID search (bytes, memoryview): {single}")
+    
+    success = (matches == [(6, 15)] and found == [(0, 0, 15), (1, 6, 15), (2, 0, 15)] and
+               single == [6, -1, 6, -1])
+    if success:
+        print("   ✅ Topic locator working")
+    else:
+        print("   ❌ Topic locator failed")
+    
+    return success
+
 def test_message_modifier():
     """Test ASOA message modifier"""
     print("\n🔧 Testing ASOA Message Modifier...")
@@ -224,6 +994,253 @@ def test_message_modifier():
     
     return modified_packet is not None
 
+def test_in_place_pipeline():
+    """Test zero-copy in-place modify pipeline"""
+    print("\n🔩 Testing In-Place Modify Pipeline...")
+    
+    modifier = ASOAMessageModifier()
+    forwarded = []
+    modifier.set_forwarder(forwarded.append)
+    analyzer = ASOAProtocolAnalyzer()
+    mock_packet = create_mock_asoa_packet()
+    
+    results = {}
+    for attack_type, kwargs in (('temperature-spoof', {'target_temperature': 99.9}),
+                                ('service-disrupt', {'target_service': 'Cerebrum'}),
+                                ('message-replay', {'replay_count': 2})):
+        buffer = bytearray(mock_packet)
+        modified = modifier.modify_in_place(buffer, attack_type, **kwargs)
+        analysis = analyzer.analyze_packet(bytes(buffer))
+        results[attack_type] = (modified and forwarded[-1] is buffer and analyzer.validate_checksum(bytes(buffer)), analysis)
+        print(f"   {attack_type}: modified {modified}, checksum valid {analyzer.validate_checksum(bytes(buffer))}")
+    
+    reference = modifier.modify_asoa_packet(mock_packet, 'temperature-spoof', target_temperature=99.9)
+    buffer = bytearray(mock_packet)
+    modifier.modify_in_place(buffer, 'temperature-spoof', target_temperature=99.9)
+    untouched = bytearray(b'not an ASOA packet' * 2)
+    
+    success = (all(ok for ok, _ in results.values()) and bytes(buffer) == reference and
+               abs(results['temperature-spoof'][1]['temperature_data'].temperature_value - 99.9) < 0.01 and
+               results['service-disrupt'][1]['target_service'] == 'Cerebrum' and
+               results['message-replay'][1]['sequence'] == 12347 and
+               not modifier.modify_in_place(untouched, 'temperature-spoof') and forwarded[-1] is untouched)
+    if success:
+        print("   ✅ In-place modify pipeline working")
+    else:
+        print("   ❌ In-place modify pipeline failed")
+    
+    return success
+
+def test_modify_batch():
+    """Test batch modification over a packed corpus"""
+    print("\n📦 Testing Batch Modification...")
+    
+    modifier = ASOAMessageModifier()
+    delivered = []
+    modifier.register_batch_callback(delivered.append)
+    analyzer = ASOAProtocolAnalyzer()
+    corpus = [create_mock_asoa_packet() for _ in range(4)] + [b'not an ASOA packet']
+    
+    batch = modifier.modify_batch(corpus, 'temperature-spoof', target_temperature=99.9)
+    # Feed the packed result back in as buffer + offsets
+    redirected = modifier.modify_batch(batch.buffer, 'service-disrupt', offsets=batch.offsets, target_service='Radar')
+    print(f"   {sum(batch.modified)} of {batch.count} packets modified, then {sum(redirected.modified)} redirected")
+    
+    first = analyzer.analyze_packet(bytes(redirected.packet(0)))
+    success = (batch.count == 5 and batch._replace(modified=bytearray(5)).count == 5 and list(batch.modified) == [1, 1, 1, 1, 0] and
+               bytes(batch.packet(4)) == corpus[4] and abs(batch.original_values[0] - 25.5) < 0.01 and
+               abs(first['temperature_data'].temperature_value - 99.9) < 0.01 and first['target_service'] == 'Radar' and
+               all(analyzer.validate_checksum(bytes(redirected.packet(i))) for i in range(4)) and
+               delivered == [batch, redirected])
+    if success:
+        print("   ✅ Batch modification working")
+    else:
+        print("   ❌ Batch modification failed")
+    
+    return success
+
+def test_callback_dispatcher():
+    """Test asynchronous batched callback delivery"""
+    print("\n📬 Testing Callback Dispatcher...")
+    
+    import threading
+    
+    # Slow callback behind the modifier: the packet path only enqueues
+    modifier = ASOAMessageModifier()
+    received = []
+    release = threading.Event()
+    modifier.register_modification_callback(lambda event: (release.wait(5), received.append(event)))
+    modifier.enable_async_callbacks(capacity=4, policy='drop')
+    mock_packet = create_mock_asoa_packet()
+    started = time.time()
+    for _ in range(10):
+        modifier.modify_in_place(bytearray(mock_packet), 'temperature-spoof', target_temperature=99.9)
+    elapsed = time.time() - started
+    release.set()
+    modifier.close()
+    dropping = modifier.dispatcher.get_stats() if modifier.dispatcher else None
+    stats = modifier.get_modification_stats()
+    
+    # Blocking policy delivers everything, in batches
+    batches = []
+    dispatcher = CallbackDispatcher(capacity=2, policy='block', batch_size=8)
+    dispatcher.register_batch_callback(lambda batch: batches.append(len(batch)))
+    dispatcher.start()
+    for index in range(50):
+        dispatcher.submit(ModificationEvent('temperature-spoof', 25.5, 99.9, float(index), 64))
+    dispatcher.stop()
+    blocking = dispatcher.get_stats()
+    
+    # stop() releases a producer blocked on a full ring instead of leaving it waiting
+    stalled = CallbackDispatcher(capacity=1, policy='block')
+    stalled.submit(ModificationEvent('temperature-spoof', 25.5, 99.9, 0.0, 64))
+    outcome = []
+    producer = threading.Thread(target=lambda: outcome.append(
+        stalled.submit(ModificationEvent('temperature-spoof', 25.5, 99.9, 1.0, 64))))
+    producer.start()
+    time.sleep(0.05)
+    stalled.stop()
+    producer.join(1.0)
+    released = not producer.is_alive() and outcome == [False] and stalled.get_stats()['dropped'] == 1
+    print(f"   Blocked producer released on stop: {released}")
+    print(f"   drop policy: {len(received)} delivered, {10 - len(received)} dropped in {elapsed * 1000:.1f} ms; "
+          f"block policy: {blocking['delivered']} delivered in {blocking['batches']} batches")
+    
+    success = (dropping is None and elapsed < 1.0 and 1 <= len(received) < 10 and
+               received[0].modification_type == 'temperature-spoof' and abs(received[0].new_value - 99.9) < 0.01 and
+               stats['modified_packets'] == 10 and 'callback_dispatch' not in stats and
+               blocking['delivered'] == 50 and blocking['dropped'] == 0 and sum(batches) == 50 and released)
+    if success:
+        print("   ✅ Callback dispatcher working")
+    else:
+        print("   ❌ Callback dispatcher failed")
+    
+    return success
+
+def test_modification_history():
+    """Test the fixed-capacity modification history"""
+    print("\n📜 Testing Modification History...")
+    
+    import os
+    import tempfile
+    import numpy as np
+    
+    modifier = ASOAMessageModifier()
+    history = modifier.enable_history(capacity=8, max_packet_size=256)
+    footprint = history.get_stats()['footprint_bytes']
+    
+    # 20 modifications through both paths: only the last 8 are kept
+    temperatures = [20.0 + index for index in range(20)]
+    for index, temperature in enumerate(temperatures):
+        packet = create_mock_asoa_packet()
+        if index % 2:
+            modifier.modify_in_place(bytearray(packet), 'temperature-spoof', target_temperature=temperature)
+        else:
+            modifier.modify_asoa_packet(packet, 'temperature-spoof', target_temperature=temperature)
+    # An unmodified packet is staged but must not become an entry
+    modifier.modify_in_place(bytearray(b'\x00' * 64), 'temperature-spoof', target_temperature=0.0)
+    
+    entries = history.entries()
+    original, modified = history.packets(-1)
+    stats = history.get_stats()
+    path = os.path.join(tempfile.mkdtemp(), 'history.npz')
+    dumped = history.dump(path)
+    records, packets, types = load_history(path)
+    first = records[0]
+    print(f"   {stats['entries']} of {stats['recorded']} modifications kept in {footprint} bytes, "
+          f"{dumped} dumped")
+    
+    success = (len(history) == 8 and stats['overwritten'] == 12 and stats['footprint_bytes'] == footprint and
+               np.allclose(entries['new_value'], temperatures[-8:], atol=0.01) and
+               bytes(original) == packet and bytes(modified) != bytes(original) and
+               modifier.validate_modified_packet(bytes(modified)) and
+               'history' in modifier.get_modification_stats() and
+               dumped == 8 and types == ['temperature-spoof'] and
+               np.array_equal(records['new_value'], entries['new_value']) and
+               packets[first['modified_offset']:first['modified_offset'] + first['modified_length']] ==
+               bytes(history.packets(0)[1]))
+    if success:
+        print("   ✅ Modification history working")
+    else:
+        print("   ❌ Modification history failed")
+    
+    return success
+
+def test_rule_engine():
+    """Test declarative modification rules"""
+    print("\n📋 Testing Rule Engine...")
+    
+    import os
+    import json
+    import tempfile
+    
+    rules = {'rules': [
+        {'name': 'freeze', 'match': {'service': 'SensorModule', 'topic': 'Temperature', 'range': [None, 0]},
+         'action': {'field': 'topic_data', 'set': -40}},
+        {'name': 'hot-engine', 'match': {'service': 'SensorModule', 'message_type': 'GUARANTEE_DATA',
+                                         'topic': 15, 'range': [0, 60]},
+         'action': {'field': 'topic_data', 'bias': 40.0}},
+        {'name': 'reroute', 'match': {'target': 'Dashboard'}, 'action': {'field': 'target_service_id', 'set': 3}},
+        {'name': 'accuracy', 'match': {'topic': 'Temp'}, 'action': {'field': 'current_accuracy', 'clamp': [None, 0.05]}},
+        {'name': 'other-service', 'match': {'service': 'Radar'}, 'action': {'field': 'topic_data', 'scale': 0.0}}
+    ]}
+    path = os.path.join(tempfile.mkdtemp(), 'rules.json')
+    with open(path, 'w') as f:
+        json.dump(rules, f)
+    
+    modifier = ASOAMessageModifier()
+    loaded = modifier.load_rules(path)
+    packet = create_mock_asoa_packet()
+    modified = modifier.modify_asoa_packet(packet, 'rules')
+    analysis = modifier.protocol_analyzer.analyze_packet(modified) if modified else None
+    buffer = bytearray(packet)
+    in_place = modifier.modify_in_place(buffer, 'rules')
+    stats = modifier.rule_engine.get_stats()
+    
+    # A full decision table evicts its least recently used key, not every key
+    engine = modifier.rule_engine
+    engine.max_entries = 2
+    keys = [(1, target, 0x02, 15) for target in (2, 4, 2, 5)]
+    for key in keys:
+        engine._lookup(key)
+    lru = list(engine._table) == [keys[0], keys[3]] and [rule.name for rule, _, _ in engine._lookup(keys[3])[1]] == ['freeze', 'hot-engine', 'accuracy']
+    print(f"   LRU decision table: {lru}")
+    
+    # Half-open clamps: a null bound leaves that side unbounded
+    clamped = []
+    for bounds in ([30, None], [None, 20]):
+        with open(path, 'w') as f:
+            json.dump([{'match': {'topic': 'Temperature'}, 'action': {'field': 'topic_data', 'clamp': bounds}}], f)
+        clamp_modifier = ASOAMessageModifier()
+        clamp_modifier.load_rules(path)
+        clamp_buffer = bytearray(packet)
+        clamp_modifier.modify_in_place(clamp_buffer, 'rules')
+        clamped.append(clamp_modifier.protocol_analyzer.analyze_packet(bytes(clamp_buffer))['temperature_data'].temperature_value)
+    
+    # Invalid rule files load nothing
+    with open(path, 'w') as f:
+        json.dump({'rules': [{'match': {'topic': 'NoSuchTopic'}, 'action': {'set': 1}}]}, f)
+    invalid = ASOAMessageModifier().load_rules(path)
+    
+    if analysis:
+        print(f"   temperature {analysis['temperature_data'].temperature_value:.1f}, "
+              f"target {analysis['header'].target_service_id}, rule hits {stats['rules']}")
+    
+    success = (loaded == 5 and analysis is not None and modifier.validate_modified_packet(modified) and
+               abs(analysis['temperature_data'].temperature_value - 65.5) < 0.01 and
+               abs(analysis['temperature_data'].accuracy - 0.05) < 0.001 and
+               analysis['header'].target_service_id == 3 and
+               in_place and bytes(buffer) == modified and
+               stats['rules'] == {'freeze': 0, 'hot-engine': 2, 'reroute': 2, 'accuracy': 2, 'other-service': 0} and
+               stats['table_entries'] == 1 and invalid == 0 and lru and
+               abs(clamped[0] - 30.0) < 0.01 and abs(clamped[1] - 20.0) < 0.01)
+    if success:
+        print("   ✅ Rule engine working")
+    else:
+        print("   ❌ Rule engine failed")
+    
+    return success
+
 def main():
     """Main test function"""
     print("🚀 ASOA Advanced MITM Attack System - Test Suite")
@@ -236,8 +1253,33 @@ def main():
         ("Platform Detection", test_platform_detection),
         ("Network Discovery", test_network_discovery),
         ("ucdr Handling", test_ucdr_handling),
+        ("Compiled ucdr Codec", test_compiled_ucdr_codec),
+        ("In-Place Temperature Patch", test_in_place_temperature_patch),
+        ("Batch Decode", test_batch_decode),
+        ("ucdr Sequences/Arrays", test_ucdr_sequences),
+        ("Lazy ucdr View", test_ucdr_view),
+        ("Topic Registry", test_topic_registry),
         ("ASOA Protocol Analyzer", test_asoa_protocol_analyzer),
+        ("ASOA Header Codec", test_header_codec),
+        ("Checksum Engine", test_checksum_engine),
+        ("Packet Record Store", test_packet_record_store),
+        ("Pcap Reader", test_pcap_reader),
+        ("Columnar Export", test_columnar_export),
+        ("Flow Aggregation", test_flow_aggregation),
+        ("Parallel Capture Analysis", test_parallel_analysis),
+        ("Message Type Dispatch", test_message_type_dispatch),
+        ("Flow Table", test_flow_table),
+        ("RTPS Parser", test_rtps_parser),
+        ("Fragment Reassembly", test_fragment_reassembly),
+        ("Topic Demux", test_topic_demux),
+        ("Flow Offset Cache", test_flow_offset_cache),
+        ("Topic Locator", test_topic_locator),
         ("Message Modifier", test_message_modifier),
+        ("In-Place Modify Pipeline", test_in_place_pipeline),
+        ("Batch Modification", test_modify_batch),
+        ("Callback Dispatcher", test_callback_dispatcher),
+        ("Modification History", test_modification_history),
+        ("Rule Engine", test_rule_engine),
     ]
     
     results = {}
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Topic Demux - Routes RTPS samples to their topic's compiled ucdr codec
+Learns which writer publishes which topic from SEDP discovery traffic or from the
+SecurityPlatform legit_data_flows.xml endpoint ids, and caches the decoder per writer
+so routing a sample is a single dict lookup.
+"""
+
+import os
+import glob
+import logging
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from ucdr_handler import UCDRCodec
+from topic_registry import TopicDefinition, TopicRegistry
+from rtps_parser import (
+    RTPSSample, CDR_LE, PL_CDR_BE, PL_CDR_LE, PID_TOPIC_NAME, PID_ENDPOINT_GUID, PID_PARTICIPANT_GUID,
+    PID_ENTITY_NAME, ENTITYID_SPDP_PARTICIPANT_WRITER, ENTITYID_SEDP_PUBLICATIONS_WRITER,
+    iter_parameters, read_string
+)
+
+# SecurityPlatform configuration shipped with the demo setup
+DEFAULT_SECURITY_PLATFORM_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', 'asoa_demo_my_machine_setup', 'SecurityPlatform'
+)
+
+WriterKey = Tuple[bytes, int]  # (writer GUID prefix, writer entity ID)
+
+class TopicRoute(NamedTuple):
+    """Topic and compiled codec a writer's samples decode with"""
+    topic: TopicDefinition
+    codec: UCDRCodec
+
+class TopicDemultiplexer:
+    """
+    Writer GUID -> topic decoder routing with a per-writer cache
+    """
+
+    def __init__(self, registry: TopicRegistry, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.registry = registry
+        # Learned from SEDP: full writer GUID -> topic
+        self.writer_topics: Dict[WriterKey, TopicDefinition] = {}
+        # From legit_data_flows.xml: ASOA source endpoint id (the RTPS entityKey) -> topic
+        self.endpoint_topics: Dict[int, TopicDefinition] = {}
+        # Learned from SPDP: participant GUID prefix -> participant name
+        self.participants: Dict[bytes, str] = {}
+        self._routes: Dict[WriterKey, Optional[TopicRoute]] = {}
+        self.stats = {'routed': 0, 'unrouted': 0, 'learned_writers': 0, 'learned_participants': 0}
+
+    def load_legit_flows(self, security_dir: str = DEFAULT_SECURITY_PLATFORM_DIR) -> int:
+        """
+        Map source endpoint ids of legit_data_flows.xml to registered topics.
+        Endpoint names come from the ECU descriptions in ecus/*.xml. Returns the number of mapped endpoints.
+        """
+        try:
+            endpoint_names = {}
+            for path in glob.glob(os.path.join(security_dir, 'ecus', '*.xml')):
+                for endpoint in ET.parse(path).getroot().iter('Endpoint'):
+                    endpoint_names[int(endpoint.get('id'))] = endpoint.get('name')
+
+            root = ET.parse(os.path.join(security_dir, 'legit_data_flows.xml')).getroot()
+            for flow in root.iter('DataFlow'):
+                for source in flow.iter('Source'):
+                    endpoint_id = int(source.get('endpointid'))
+                    topic = self._resolve_topic(endpoint_names.get(endpoint_id), flow.get('topicName'),
+                                                flow.get('permissionref'), flow.get('name'))
+                    if topic is not None:
+                        self.endpoint_topics[endpoint_id] = topic
+            self._routes.clear()
+            self.logger.info(f"Mapped {len(self.endpoint_topics)} legit data flow endpoints to topics")
+            return len(self.endpoint_topics)
+
+        except (OSError, ET.ParseError, TypeError, ValueError) as e:
+            self.logger.warning(f"Failed to load legit data flows from {security_dir}: {e}")
+            return 0
+
+    def learn(self, sample: RTPSSample) -> bool:
+        """
+        Learn from a built-in discovery sample; returns False for application samples
+        """
+        if sample.writer_id == ENTITYID_SEDP_PUBLICATIONS_WRITER:
+            self._learn_publication(sample)
+        elif sample.writer_id == ENTITYID_SPDP_PARTICIPANT_WRITER:
+            self._learn_participant(sample)
+        else:
+            return False
+        return True
+
+    def route(self, sample: RTPSSample) -> Optional[TopicRoute]:
+        """
+        Get the topic route of a sample's writer, resolved once per writer and then cached
+        """
+        key = (sample.writer_guid_prefix, sample.writer_id)
+        try:
+            route = self._routes[key]
+        except KeyError:
+            route = self._routes[key] = self._resolve_route(key)
+        if route is None:
+            self.stats['unrouted'] += 1
+        else:
+            self.stats['routed'] += 1
+        return route
+
+    def decode(self, sample: RTPSSample) -> Optional[Tuple[TopicDefinition, Dict[str, Any]]]:
+        """
+        Decode a routed sample's payload with its topic codec (little-endian CDR only)
+        """
+        route = self.route(sample)
+        if route is None or sample.payload is None or sample.encapsulation != CDR_LE:
+            return None
+        values = route.codec.unpack(sample.payload)
+        return (route.topic, values) if values is not None else None
+
+    def add_writer(self, writer_guid_prefix: bytes, writer_id: int, topic: str) -> bool:
+        """
+        Pin a writer to a topic by class name, wire name or topic ID
+        """
+        definition = self.registry.get(topic)
+        if definition is None:
+            return False
+        key = (writer_guid_prefix, writer_id)
+        self.writer_topics[key] = definition
+        self._routes.pop(key, None)
+        return True
+
+    def get_discovery(self) -> Tuple[Dict[WriterKey, str], Dict[bytes, str]]:
+        """
+        Learned discovery state as plain (writer -> topic name, participant GUID prefix -> name)
+        maps, e.g. to seed the demux of another capture shard
+        """
+        return {key: topic.name for key, topic in self.writer_topics.items()}, dict(self.participants)
+
+    def seed(self, writers: Dict[WriterKey, str], participants: Dict[bytes, str]):
+        """
+        Adopt discovery state from get_discovery() as if its SEDP/SPDP samples had been seen here
+        """
+        for (writer_guid_prefix, writer_id), topic in writers.items():
+            self.add_writer(writer_guid_prefix, writer_id, topic)
+        self.participants.update(participants)
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        stats['writers'] = len(self._routes)
+        return stats
+
+    def _resolve_route(self, key: WriterKey) -> Optional[TopicRoute]:
+        topic = self.writer_topics.get(key)
+        if topic is None:
+            # User entity IDs are entityKey(3) + entityKind(1); ASOA uses the endpoint id as the key
+            topic = self.endpoint_topics.get(key[1] >> 8)
+        if topic is None:
+            return None
+        return TopicRoute(topic, self.registry.codecs[topic.name])
+
+    def _resolve_topic(self, *names: Optional[str]) -> Optional[TopicDefinition]:
+        for name in names:
+            if not name:
+                continue
+            topic = self.registry.get(name) or self.registry.get(name.replace('_', '').replace(' ', ''))
+            if topic is not None:
+                return topic
+        return None
+
+    def _learn_publication(self, sample: RTPSSample):
+        """
+        SEDP publication: endpoint GUID and topic name
+        """
+        if sample.payload is None or sample.encapsulation not in (PL_CDR_LE, PL_CDR_BE):
+            return
+        little_endian = sample.encapsulation == PL_CDR_LE
+        topic_name = None
+        guid = None
+        for pid, value in iter_parameters(sample.payload, little_endian):
+            if pid == PID_TOPIC_NAME:
+                topic_name = read_string(value, little_endian)
+            elif pid == PID_ENDPOINT_GUID and len(value) >= 16:
+                guid = bytes(value[:16])
+        topic = self._resolve_topic(topic_name)
+        if guid is None or topic is None:
+            return
+        key = (guid[:12], int.from_bytes(guid[12:16], 'big'))
+        if self.writer_topics.get(key) is not topic:
+            self.writer_topics[key] = topic
+            self._routes.pop(key, None)
+            self.stats['learned_writers'] += 1
+            self.logger.debug(f"Writer {guid.hex()} publishes {topic.name}")
+
+    def _learn_participant(self, sample: RTPSSample):
+        """
+        SPDP participant announcement: GUID prefix and entity name
+        """
+        if sample.payload is None or sample.encapsulation not in (PL_CDR_LE, PL_CDR_BE):
+            return
+        little_endian = sample.encapsulation == PL_CDR_LE
+        prefix = sample.writer_guid_prefix
+        name = None
+        for pid, value in iter_parameters(sample.payload, little_endian):
+            if pid == PID_PARTICIPANT_GUID and len(value) >= 12:
+                prefix = bytes(value[:12])
+            elif pid == PID_ENTITY_NAME:
+                name = read_string(value, little_endian)
+        if name and self.participants.get(prefix) != name:
+            self.participants[prefix] = name
+            self.stats['learned_participants'] += 1
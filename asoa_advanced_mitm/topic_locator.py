@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Topic Locator - Fast topic ID search in ucdr payloads
+Finds little-endian topic ID patterns with C-level searches instead of per-byte struct unpacking
+"""
+
+import re
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Topic IDs from ECUs/include/interfaces/t_*.hpp
+KNOWN_TOPIC_IDS = {
+    12: "Obstacle",
+    13: "Velocity",
+    14: "RPM",
+    15: "Temp",
+    16: "FusedSens"
+}
+
+# Memoryviews have no find(); their searches are compiled once per pattern
+_PATTERN_REGEXES: Dict[bytes, 're.Pattern[bytes]'] = {}
+
+def find_pattern(data, pattern: bytes, start: int = 0) -> int:
+    """
+    Find a byte pattern in bytes, bytearray or memoryview, -1 if absent
+    """
+    if isinstance(data, memoryview):
+        regex = _PATTERN_REGEXES.get(pattern)
+        if regex is None:
+            regex = _PATTERN_REGEXES[pattern] = re.compile(re.escape(pattern))
+        match = regex.search(data, start)
+        return match.start() if match else -1
+    return data.find(pattern, start)
+
+class TopicLocator:
+    """
+    Locates 4-byte little-endian topic IDs in single payloads or whole captures
+    """
+
+    def __init__(self, topic_ids: Optional[Iterable[int]] = None):
+        self.topic_ids = tuple(sorted(topic_ids if topic_ids is not None else KNOWN_TOPIC_IDS))
+        self.patterns = {topic_id: struct.pack('<I', topic_id) for topic_id in self.topic_ids}
+        self._pattern_ids = {pattern: topic_id for topic_id, pattern in self.patterns.items()}
+
+        # Zero-width lookahead so overlapping matches are all reported in one pass
+        alternatives = b'|'.join(re.escape(pattern) for pattern in self.patterns.values())
+        self._regex = re.compile(b'(?=(' + alternatives + b'))', re.DOTALL)
+        self._id_array = np.array(self.topic_ids, dtype='<u4')
+
+    def find(self, data, topic_id: int, start: int = 0) -> int:
+        """
+        Find the first occurrence of one topic ID, -1 if absent
+        """
+        return find_pattern(data, self.patterns[topic_id], start)
+
+    def find_all(self, data) -> List[Tuple[int, int]]:
+        """
+        Find every (offset, topic_id) match of all configured topic IDs in one pass
+        """
+        pattern_ids = self._pattern_ids
+        return [(match.start(), pattern_ids[match.group(1)]) for match in self._regex.finditer(data)]
+
+    def find_all_batch(self, buffer, offsets) -> Dict[str, np.ndarray]:
+        """
+        Find all topic IDs in many concatenated payloads.
+        `offsets` holds the start of each payload in `buffer`; matches crossing a
+        payload boundary are dropped. Returns columns 'payload', 'offset' and 'topic_id'
+        sorted by position in the buffer.
+        """
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        starts = np.asarray(offsets, dtype=np.int64)
+        ends = np.append(starts[1:], len(data))
+
+        positions = []
+        topic_ids = []
+        # One unaligned uint32 view per byte phase covers every candidate offset without copying
+        for phase in range(4):
+            count = (len(data) - phase) // 4
+            if count <= 0:
+                continue
+            words = np.frombuffer(data, dtype='<u4', count=count, offset=phase)
+            hits = np.flatnonzero(np.isin(words, self._id_array))
+            positions.append(hits * 4 + phase)
+            topic_ids.append(words[hits])
+
+        if not positions:
+            empty = np.empty(0, dtype=np.int64)
+            return {'payload': empty, 'offset': empty, 'topic_id': empty.astype(np.uint32)}
+
+        position = np.concatenate(positions)
+        topic_id = np.concatenate(topic_ids)
+        order = np.argsort(position, kind='stable')
+        position = position[order]
+        topic_id = topic_id[order]
+
+        payload = np.searchsorted(starts, position, side='right') - 1
+        inside = (payload >= 0) & (position + 4 <= ends[payload.clip(0)])
+        payload = payload[inside]
+        return {
+            'payload': payload,
+            'offset': position[inside] - starts[payload],
+            'topic_id': topic_id[inside].astype(np.uint32)
+        }
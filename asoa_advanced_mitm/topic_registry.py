@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Topic Registry - ASOA topic schemas generated from the ECU interface headers
+Extracts topic IDs, names and field layouts from ECUs/include/interfaces/t_*.hpp
+"""
+
+import os
+import re
+import glob
+import pickle
+import logging
+from typing import Dict, List, Optional, Tuple, Any, Union
+from dataclasses import dataclass
+
+from ucdr_handler import UCDRCodec, compile_schema
+
+# Interface headers shipped with the demo setup
+DEFAULT_INTERFACE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', 'asoa_demo_my_machine_setup', 'ECUs', 'include', 'interfaces'
+)
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'asoa_mitm', 'topic_registry.pickle')
+
+# Bumped whenever the parsed representation changes
+REGISTRY_FORMAT_VERSION = 3
+
+# C++ member types used in the interfaces and their ucdr equivalents
+CPP_TO_UCDR_TYPES = {
+    'float': 'float32',
+    'double': 'float64',
+    'int32_t': 'int32',
+    'uint32_t': 'uint32',
+    'int16_t': 'int16',
+    'uint16_t': 'uint16',
+    'int8_t': 'int8',
+    'uint8_t': 'uint8',
+    'bool': 'uint8',
+    'std::string': 'string'
+}
+
+# Functionality components carried in a guarantee's data message, in wire order
+PAYLOAD_COMPONENTS = ('Data', 'Quality')
+
+_CLASS_PATTERN = re.compile(r'class\s+(\w+)\s*:\s*public\s+(\w+)')
+_TOPIC_NAME_PATTERN = re.compile(r'topic_name\s*=\s*"([^"]*)"')
+_TOPIC_ID_PATTERN = re.compile(r'topic_id\s*=\s*(\d+)')
+_COMPONENT_PATTERN = re.compile(r'struct\s+(\w+)\s*:\s*public\s+FuncComponentBase\s*\{(.*?)\}\s*\w+_\s*;', re.DOTALL)
+_MEMBER_PATTERN = re.compile(r'^\s*((?:std::)?\w+(?:<\s*[\w:]+\s*>)?)\s+(\w+)\s*(?:\[\s*(\d+)\s*\])?\s*;', re.MULTILINE)
+_VECTOR_PATTERN = re.compile(r'^std::vector<\s*([\w:]+)\s*>$')
+
+@dataclass
+class TopicDefinition:
+    """ASOA topic as declared in an interface header"""
+    name: str
+    topic_id: int
+    topic_name: str
+    base_class: str
+    schema: Dict[str, str]
+    header: str
+
+def _class_bodies(source: str) -> List[Tuple[str, str, str]]:
+    """
+    Find (class name, base class, body) of every derived class, the body being its braces' content
+    """
+    classes = []
+    for match in _CLASS_PATTERN.finditer(source):
+        start = source.find('{', match.end())
+        if start < 0:
+            continue
+        depth = 0
+        for position in range(start, len(source)):
+            if source[position] == '{':
+                depth += 1
+            elif source[position] == '}':
+                depth -= 1
+                if depth == 0:
+                    classes.append((match.group(1), match.group(2), source[start + 1:position]))
+                    break
+    return classes
+
+class TopicRegistry:
+    """
+    Registry of topic schemas parsed from the ECU interface headers
+    Parsed definitions are persisted in a pickle keyed by header mtimes: load() reuses it
+    when it is current and writes it after parsing, refresh() always reparses and rewrites it.
+    cache_path=None disables persistence.
+    """
+
+    def __init__(self, interface_dir: str = DEFAULT_INTERFACE_DIR, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.interface_dir = os.path.normpath(interface_dir)
+        self.cache_path = cache_path
+        self.topics: Dict[str, TopicDefinition] = {}
+        self.by_id: Dict[int, TopicDefinition] = {}
+        self.codecs: Dict[str, UCDRCodec] = {}
+        self.loaded_from_cache = False
+
+    def load(self) -> Dict[str, TopicDefinition]:
+        """
+        Load topic definitions, reusing the persisted registry when no header changed
+        and persisting a freshly parsed one for later startups
+        """
+        headers = self._headers()
+        if not headers:
+            return {}
+
+        fingerprint = self._fingerprint(headers)
+        topics = self._load_cache(fingerprint)
+        self.loaded_from_cache = topics is not None
+        if topics is None:
+            topics = self._parse_headers(headers)
+            self._save_cache(fingerprint, topics)
+        return self._install(topics)
+
+    def refresh(self) -> Dict[str, TopicDefinition]:
+        """
+        Reparse the headers regardless of the persisted registry and rewrite it
+        """
+        headers = self._headers()
+        if not headers:
+            return {}
+
+        topics = self._parse_headers(headers)
+        self._save_cache(self._fingerprint(headers), topics)
+        self.loaded_from_cache = False
+        return self._install(topics)
+
+    def get(self, topic: Union[str, int]) -> Optional[TopicDefinition]:
+        """
+        Look up a topic by class name, wire name or topic ID
+        """
+        if isinstance(topic, int):
+            return self.by_id.get(topic)
+        if topic in self.topics:
+            return self.topics[topic]
+        for definition in self.topics.values():
+            if definition.topic_name == topic:
+                return definition
+        return None
+
+    def codec(self, topic: Union[str, int]) -> Optional[UCDRCodec]:
+        """
+        Get the compiled codec for a topic
+        """
+        definition = self.get(topic)
+        return self.codecs.get(definition.name) if definition else None
+
+    def schemas(self) -> Dict[str, Dict[str, str]]:
+        """
+        Get {topic class name: schema} for every registered topic
+        """
+        return {name: topic.schema for name, topic in self.topics.items()}
+
+    def _headers(self) -> List[str]:
+        headers = sorted(glob.glob(os.path.join(self.interface_dir, 't_*.hpp')))
+        if not headers:
+            self.logger.warning(f"No interface headers found in {self.interface_dir}")
+        return headers
+
+    def _fingerprint(self, headers: List[str]) -> Tuple[Any, ...]:
+        return (REGISTRY_FORMAT_VERSION, tuple((os.path.basename(h), os.stat(h).st_mtime_ns) for h in headers))
+
+    def _install(self, topics: Dict[str, TopicDefinition]) -> Dict[str, TopicDefinition]:
+        self.topics = topics
+        self.by_id = {topic.topic_id: topic for topic in topics.values()}
+        # Compiled codecs hold struct.Struct objects, which do not pickle; compiling is cheap
+        self.codecs = {name: compile_schema(topic.schema) for name, topic in topics.items()}
+        return topics
+
+    def _parse_headers(self, headers: List[str]) -> Dict[str, TopicDefinition]:
+        """
+        Parse topic classes and the field layout of their base classes
+        """
+        sources = {}
+        for header in headers:
+            with open(header, 'r', encoding='utf-8', errors='ignore') as f:
+                sources[header] = f.read()
+
+        # Matches are scoped to each class body, so headers may declare several classes
+        classes = {header: _class_bodies(source) for header, source in sources.items()}
+
+        # Base classes declare the serialized components
+        base_fields = {}
+        for header_classes in classes.values():
+            for class_name, _, body in header_classes:
+                components = dict(_COMPONENT_PATTERN.findall(body))
+                if components:
+                    base_fields[class_name] = self._component_fields(components)
+
+        topics = {}
+        for header, header_classes in classes.items():
+            for class_name, base_class, body in header_classes:
+                name_match = _TOPIC_NAME_PATTERN.search(body)
+                id_match = _TOPIC_ID_PATTERN.search(body)
+                if not name_match or not id_match:
+                    continue
+                if base_class not in base_fields:
+                    self.logger.warning(f"Unknown base class {base_class} for topic {class_name}")
+                    continue
+
+                schema = {'topic_id': 'uint32', 'topic_name': 'string'}
+                schema.update(base_fields[base_class])
+                topics[class_name] = TopicDefinition(
+                    name=class_name,
+                    topic_id=int(id_match.group(1)),
+                    topic_name=name_match.group(1),
+                    base_class=base_class,
+                    schema=schema,
+                    header=os.path.basename(header)
+                )
+
+        self.logger.info(f"Parsed {len(topics)} topics from {len(headers)} interface headers")
+        return topics
+
+    def _component_fields(self, components: Dict[str, str]) -> Dict[str, str]:
+        """
+        Collect ucdr-typed member fields of the payload components in wire order.
+        std::vector<T> members map to sequences and T name[N] members to fixed arrays.
+        """
+        fields = {}
+        for component in PAYLOAD_COMPONENTS:
+            for cpp_type, member, array_size in _MEMBER_PATTERN.findall(components.get(component, '')):
+                vector = _VECTOR_PATTERN.match(cpp_type)
+                element = CPP_TO_UCDR_TYPES.get(vector.group(1) if vector else cpp_type)
+                if element is None or (element == 'string' and (vector or array_size)):
+                    continue
+                if vector:
+                    fields[member] = f"sequence<{element}>"
+                elif array_size:
+                    fields[member] = f"{element}[{array_size}]"
+                else:
+                    fields[member] = element
+        return fields
+
+    def _load_cache(self, fingerprint: Tuple[Any, ...]) -> Optional[Dict[str, TopicDefinition]]:
+        """
+        Load persisted definitions if they were built from the same headers
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('interface_dir') == self.interface_dir and cached.get('fingerprint') == fingerprint:
+                return cached['topics']
+        except Exception as e:
+            self.logger.debug(f"Ignoring unreadable topic registry cache: {e}")
+        return None
+
+    def _save_cache(self, fingerprint: Tuple[Any, ...], topics: Dict[str, TopicDefinition]):
+        """
+        Persist parsed definitions for later startups
+        """
+        if not self.cache_path:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            with open(self.cache_path, 'wb') as f:
+                pickle.dump({'interface_dir': self.interface_dir, 'fingerprint': fingerprint, 'topics': topics}, f)
+        except Exception as e:
+            self.logger.debug(f"Failed to write topic registry cache: {e}")
+
+if __name__ == "__main__":
+    # Force a rebuild of the persisted registry
+    logging.basicConfig(level=logging.INFO)
+    registry = TopicRegistry()
+    topics = registry.refresh()
+    print(f"Cached {len(topics)} topics in {registry.cache_path}")
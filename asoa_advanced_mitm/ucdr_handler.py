@@ -4,15 +4,86 @@ ucdr Handler - microCDR Serialization for ASOA Protocol
 Handles ucdr (microCDR) serialized data structures used in ASOA communication
 """
 
+import re
+import sys
 import struct
 import logging
-from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any, Union
 import time
 
-@dataclass
-class UCDRField:
-    """Represents a field in ucdr serialized data"""
+import numpy as np
+
+from topic_locator import find_pattern
+
+# Supported ucdr primitive types (little-endian wire format)
+# Sequences ('sequence<float32>') and fixed arrays ('float32[8]') of any non-string type are also supported
+UCDR_DATA_TYPES = {
+    'float32': {'size': 4, 'alignment': 4, 'unpack': '<f', 'pack': '<f', 'numpy': '<f4', 'array': 'f'},
+    'float64': {'size': 8, 'alignment': 8, 'unpack': '<d', 'pack': '<d', 'numpy': '<f8', 'array': 'd'},
+    'int32': {'size': 4, 'alignment': 4, 'unpack': '<i', 'pack': '<i', 'numpy': '<i4', 'array': 'i'},
+    'uint32': {'size': 4, 'alignment': 4, 'unpack': '<I', 'pack': '<I', 'numpy': '<u4', 'array': 'I'},
+    'int16': {'size': 2, 'alignment': 2, 'unpack': '<h', 'pack': '<h', 'numpy': '<i2', 'array': 'h'},
+    'uint16': {'size': 2, 'alignment': 2, 'unpack': '<H', 'pack': '<H', 'numpy': '<u2', 'array': 'H'},
+    'int8': {'size': 1, 'alignment': 1, 'unpack': '<b', 'pack': '<b', 'numpy': 'i1', 'array': 'b'},
+    'uint8': {'size': 1, 'alignment': 1, 'unpack': '<B', 'pack': '<B', 'numpy': 'u1', 'array': 'B'},
+    'string': {'size': -1, 'alignment': 4, 'unpack': None, 'pack': None, 'numpy': None, 'array': None}
+}
+
+# ASOA temperature schema based on t_simple.hpp
+TEMPERATURE_SCHEMA = {
+    'topic_id': 'uint32',
+    'topic_name': 'string',
+    'temperature_value': 'float32',
+    'accuracy': 'float32'
+}
+
+# Fixed-layout topics that decode_batch can resolve by name (see also topic_registry)
+TOPIC_SCHEMAS = {
+    'Temperature': TEMPERATURE_SCHEMA
+}
+
+_SEQUENCE_TYPE = re.compile(r'^sequence<(\w+)>$')
+_ARRAY_TYPE = re.compile(r'^(\w+)\[(\d+)\]$')
+_BIG_ENDIAN_HOST = sys.byteorder == 'big'
+
+_UINT32 = struct.Struct('<I')
+_FLOAT32 = struct.Struct('<f')
+_RECORD_GUARD = struct.Struct('<II')
+
+# Temperature topic from t_temperature.hpp
+TEMPERATURE_TOPIC_ID = 15
+TEMPERATURE_TOPIC_NAME = "Temp"
+_TEMPERATURE_RECORD_PATTERN = _RECORD_GUARD.pack(TEMPERATURE_TOPIC_ID, len(TEMPERATURE_TOPIC_NAME))
+
+def _align(offset: int, alignment: int) -> int:
+    """Align offset to specified alignment boundary"""
+    if alignment <= 1:
+        return offset
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+def parse_ucdr_type(data_type: str) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Split a ucdr type into (element type, count): count is None for scalars and
+    strings, -1 for sequences and the element count for fixed arrays.
+    Returns None for unknown types.
+    """
+    if data_type in UCDR_DATA_TYPES:
+        return data_type, None
+    match = _SEQUENCE_TYPE.match(data_type)
+    if match:
+        element, count = match.group(1), -1
+    else:
+        match = _ARRAY_TYPE.match(data_type)
+        if not match:
+            return None
+        element, count = match.group(1), int(match.group(2))
+    if element not in UCDR_DATA_TYPES or element == 'string':
+        return None
+    return element, count
+
+class UCDRField(NamedTuple):
+    """Represents a field in ucdr serialized data (immutable, no per-instance dict)"""
     name: str
     data_type: str
     offset: int
@@ -20,6 +91,584 @@ class UCDRField:
     value: Any
     alignment: int = 4
 
+class _FixedRun:
+    """
+    Consecutive fixed-size fields merged into a single struct.Struct.
+    The padding inside the run depends on where the run starts relative to its
+    widest alignment, so one struct is built per start phase (lazily, at most 8).
+    """
+
+    __slots__ = ('names', 'types', 'sizes', 'alignment', 'struct', '_layouts')
+
+    def __init__(self, fields: List[Tuple[str, str]]):
+        self.names = tuple(name for name, _ in fields)
+        self.types = tuple(field_type for _, field_type in fields)
+        self.sizes = tuple(UCDR_DATA_TYPES[t]['size'] for t in self.types)
+        self.alignment = max(UCDR_DATA_TYPES[t]['alignment'] for t in self.types)
+        self._layouts = {}
+        self.struct = self.layout(0)[0]
+
+    def layout(self, phase: int) -> Tuple[struct.Struct, Tuple[int, ...]]:
+        """
+        Get (struct, relative field offsets) for a run starting at `phase` modulo alignment
+        """
+        layout = self._layouts.get(phase)
+        if layout is None:
+            fmt = ['<']
+            offsets = []
+            position = phase
+            for field_type in self.types:
+                type_info = UCDR_DATA_TYPES[field_type]
+                aligned = _align(position, type_info['alignment'])
+                fmt.append('x' * (aligned - position))
+                fmt.append(type_info['unpack'][1:])
+                offsets.append(aligned - phase)
+                position = aligned + type_info['size']
+            layout = (struct.Struct(''.join(fmt)), tuple(offsets))
+            self._layouts[phase] = layout
+        return layout
+
+    def end(self, buffer, offset: int, position: int) -> int:
+        """
+        Relative position just past this run when it starts at `position`
+        """
+        return position + self.layout(position % self.alignment)[0].size
+
+    def extent(self, buffer, offset: int, position: int, index: int) -> Tuple[int, int]:
+        """
+        Absolute (start, end) of the index-th field when the run starts at `position`
+        """
+        start = offset + position + self.layout(position % self.alignment)[1][index]
+        return start, start + self.sizes[index]
+
+class _StringField:
+    """Length-prefixed ucdr string field"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def end(self, buffer, offset: int, position: int) -> int:
+        """
+        Relative position just past this string when it starts at `position`
+        """
+        position = _align(position, 4)
+        return position + 4 + _UINT32.unpack_from(buffer, offset + position)[0]
+
+    def extent(self, buffer, offset: int, position: int, index: int = 0) -> Tuple[int, int]:
+        """
+        Absolute (start, end) of the string contents, excluding the length prefix
+        """
+        start = offset + _align(position, 4) + 4
+        return start, start + _UINT32.unpack_from(buffer, start - 4)[0]
+
+class _ArrayField:
+    """
+    Sequence (uint32 count prefix) or fixed-size array of a primitive type,
+    decoded in bulk into an array.array
+    """
+
+    __slots__ = ('name', 'element', 'count', 'size', 'alignment', 'typecode')
+
+    def __init__(self, name: str, element: str, count: int):
+        type_info = UCDR_DATA_TYPES[element]
+        self.name = name
+        self.element = element
+        self.count = None if count < 0 else count
+        self.size = type_info['size']
+        self.alignment = type_info['alignment']
+        self.typecode = type_info['array']
+
+    def locate(self, buffer, offset: int, position: int) -> Tuple[int, int]:
+        """
+        Get (element data position, element count) for a field starting at relative `position`
+        """
+        count = self.count
+        if count is None:
+            position = _align(position, 4)
+            count = _UINT32.unpack_from(buffer, offset + position)[0]
+            position += 4
+        return _align(position, self.alignment), count
+
+    def end(self, buffer, offset: int, position: int) -> int:
+        """
+        Relative position just past the element data when the field starts at `position`
+        """
+        position, count = self.locate(buffer, offset, position)
+        return position + count * self.size
+
+    def extent(self, buffer, offset: int, position: int, index: int = 0) -> Tuple[int, int]:
+        """
+        Absolute (start, end) of the element data, excluding any count prefix
+        """
+        position, count = self.locate(buffer, offset, position)
+        return offset + position, offset + position + count * self.size
+
+    def decode(self, buffer, start: int, count: int) -> array:
+        """
+        Copy `count` elements starting at `start` into an array.array in one call
+        """
+        values = array(self.typecode)
+        values.frombytes(memoryview(buffer)[start:start + count * self.size])
+        if _BIG_ENDIAN_HOST:
+            values.byteswap()
+        return values
+
+    def encode(self, value) -> memoryview:
+        """
+        Expose a buffer-protocol value (array.array, np.ndarray, bytes) or a list as raw bytes
+        """
+        if isinstance(value, (list, tuple)):
+            value = array(self.typecode, value)
+        if _BIG_ENDIAN_HOST and isinstance(value, array):
+            value = array(self.typecode, value)
+            value.byteswap()
+        raw = memoryview(value).cast('B')
+        if len(raw) % self.size:
+            raise ValueError(f"{self.name}: buffer size {len(raw)} is not a multiple of {self.size}")
+        if self.count is not None and len(raw) != self.count * self.size:
+            raise ValueError(f"{self.name}: expected {self.count} elements, got {len(raw) // self.size}")
+        return raw
+
+class UCDRCodec:
+    """
+    Compiled ucdr codec for a fixed schema
+    Precomputes field layouts so decoding is one struct call per fixed-size run
+    """
+
+    def __init__(self, schema: Dict[str, str]):
+        self.schema = dict(schema)
+        parsed = {name: parse_ucdr_type(t) for name, t in schema.items()}
+        self.unknown_types = [schema[name] for name, t in parsed.items() if t is None]
+        self.names = tuple(name for name, t in parsed.items() if t is not None)
+        self.alignments = {name: UCDR_DATA_TYPES[parsed[name][0]]['alignment'] for name in self.names}
+        self.segments = []
+
+        run = []
+        for name in self.names:
+            element, count = parsed[name]
+            if element != 'string' and count is None:
+                run.append((name, element))
+                continue
+            if run:
+                self.segments.append(_FixedRun(run))
+                run = []
+            if count is None:
+                self.segments.append(_StringField(name))
+            else:
+                self.segments.append(_ArrayField(name, element, count))
+        if run:
+            self.segments.append(_FixedRun(run))
+
+        # Field name -> (segment index, index within a fixed-size run)
+        self.field_segments = {}
+        for segment_index, segment in enumerate(self.segments):
+            if segment.__class__ is _FixedRun:
+                for run_index, name in enumerate(segment.names):
+                    self.field_segments[name] = (segment_index, run_index)
+            else:
+                self.field_segments[segment.name] = (segment_index, 0)
+
+        # Schemas without strings collapse into a single precomputed struct
+        self._struct = None
+        if len(self.segments) == 1 and isinstance(self.segments[0], _FixedRun):
+            self._struct = self.segments[0].layout(0)[0]
+        self.fixed_size = self._struct.size if self._struct else None
+
+        # Per-field scalar structs for in-place patching, plus offsets known at compile time
+        self.field_structs = {
+            name: struct.Struct(UCDR_DATA_TYPES[t]['pack'])
+            for name, t in self.schema.items()
+            if t in UCDR_DATA_TYPES and t != 'string'
+        }
+        self.static_offsets = {}
+        for segment in self.segments:
+            if segment.__class__ is not _FixedRun:
+                break
+            for name, relative in zip(segment.names, segment.layout(0)[1]):
+                self.static_offsets[name] = relative
+
+    def unpack(self, buffer, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Decode one message into a {field: value} dict, None if the buffer is truncated
+        """
+        if self._struct is not None:
+            if offset + self._struct.size > len(buffer):
+                return None
+            return dict(zip(self.names, self._struct.unpack_from(buffer, offset)))
+
+        values = {}
+        end = len(buffer) - offset
+        position = 0
+        try:
+            for segment in self.segments:
+                if segment.__class__ is _FixedRun:
+                    phase = position % segment.alignment
+                    run_struct = segment.struct if not phase else segment.layout(phase)[0]
+                    values.update(zip(segment.names, run_struct.unpack_from(buffer, offset + position)))
+                    position += run_struct.size
+                elif segment.__class__ is _StringField:
+                    position = (position + 3) & ~3
+                    start = offset + position + 4
+                    length = _UINT32.unpack_from(buffer, start - 4)[0]
+                    values[segment.name] = str(buffer[start:start + length], 'utf-8', 'ignore')
+                    position += 4 + length
+                else:
+                    position, count = segment.locate(buffer, offset, position)
+                    if position + count * segment.size > end:
+                        return None
+                    values[segment.name] = segment.decode(buffer, offset + position, count)
+                    position += count * segment.size
+        except (struct.error, ValueError):
+            return None
+        # A string slice past the end is silently short, so check the final extent once
+        if position > end:
+            return None
+        return values
+
+    def decode_fields(self, buffer) -> List[Tuple[str, str, int, int, Any]]:
+        """
+        Decode into (name, type, offset, size, value) tuples, stopping at the first truncated field
+        """
+        fields = []
+        end = len(buffer)
+        position = 0
+        for segment in self.segments:
+            if segment.__class__ is _FixedRun:
+                run_struct, offsets = segment.layout(position % segment.alignment)
+                if position + run_struct.size <= end:
+                    for name, field_type, size, relative, value in zip(
+                            segment.names, segment.types, segment.sizes, offsets,
+                            run_struct.unpack_from(buffer, position)):
+                        fields.append((name, field_type, position + relative, size, value))
+                    position += run_struct.size
+                    continue
+                # Truncated run: keep the leading fields that still fit
+                for name, field_type, size, relative in zip(segment.names, segment.types, segment.sizes, offsets):
+                    field_offset = position + relative
+                    if field_offset + size > end:
+                        return fields
+                    value = struct.unpack_from(UCDR_DATA_TYPES[field_type]['unpack'], buffer, field_offset)[0]
+                    fields.append((name, field_type, field_offset, size, value))
+                return fields
+            elif segment.__class__ is _StringField:
+                position = _align(position, 4)
+                if position + 4 > end:
+                    return fields
+                length = _UINT32.unpack_from(buffer, position)[0]
+                if position + 4 + length > end:
+                    return fields
+                value = str(buffer[position + 4:position + 4 + length], 'utf-8', 'ignore')
+                fields.append((segment.name, 'string', position, 4 + length, value))
+                position += 4 + length
+            else:
+                field_offset = _align(position, 4 if segment.count is None else segment.alignment)
+                try:
+                    position, count = segment.locate(buffer, 0, position)
+                except struct.error:
+                    return fields
+                if position + count * segment.size > end:
+                    return fields
+                value = segment.decode(buffer, position, count)
+                position += count * segment.size
+                fields.append((segment.name, self.schema[segment.name], field_offset, position - field_offset, value))
+        return fields
+
+    def pack(self, values: Dict[str, Any]) -> bytes:
+        """
+        Serialize a {field: value} dict according to the compiled layout
+        """
+        if self._struct is not None:
+            return self._struct.pack(*[values[name] for name in self.names])
+
+        chunks = []
+        position = 0
+        for segment in self.segments:
+            if segment.__class__ is _FixedRun:
+                run_struct = segment.layout(position % segment.alignment)[0]
+                chunks.append(run_struct.pack(*[values[name] for name in segment.names]))
+                position += run_struct.size
+            elif segment.__class__ is _StringField:
+                value = values[segment.name]
+                encoded = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+                padding = _align(position, 4) - position
+                chunks.append(b'\x00' * padding + _UINT32.pack(len(encoded)) + encoded)
+                position += padding + 4 + len(encoded)
+            else:
+                # Element data goes into the joined output straight from the caller's buffer
+                raw = segment.encode(values[segment.name])
+                prefix = b''
+                if segment.count is None:
+                    prefix = b'\x00' * (_align(position, 4) - position) + _UINT32.pack(len(raw) // segment.size)
+                    position += len(prefix)
+                padding = _align(position, segment.alignment) - position
+                chunks.append(prefix + b'\x00' * padding)
+                chunks.append(raw)
+                position += padding + len(raw)
+        return b''.join(chunks)
+
+    def numpy_dtype(self, sample) -> Optional[np.dtype]:
+        """
+        Build a structured dtype matching `sample`'s layout, including its string and sequence lengths.
+        Each string or sequence contributes a '<name>.length' prefix field plus its data field.
+        """
+        names, formats, offsets = [], [], []
+        position = 0
+        for segment in self.segments:
+            if segment.__class__ is _FixedRun:
+                run_struct, relative = segment.layout(position % segment.alignment)
+                for name, field_type, field_offset in zip(segment.names, segment.types, relative):
+                    names.append(name)
+                    formats.append(UCDR_DATA_TYPES[field_type]['numpy'])
+                    offsets.append(position + field_offset)
+                position += run_struct.size
+            elif segment.__class__ is _ArrayField:
+                if segment.count is None:
+                    names.append(f"{segment.name}.length")
+                    formats.append('<u4')
+                    offsets.append(_align(position, 4))
+                try:
+                    position, count = segment.locate(sample, 0, position)
+                except struct.error:
+                    return None
+                names.append(segment.name)
+                formats.append((UCDR_DATA_TYPES[segment.element]['numpy'], (count,)))
+                offsets.append(position)
+                position += count * segment.size
+            else:
+                position = _align(position, 4)
+                if position + 4 > len(sample):
+                    return None
+                length = _UINT32.unpack_from(sample, position)[0]
+                names.append(f"{segment.name}.length")
+                formats.append('<u4')
+                offsets.append(position)
+                if length:
+                    names.append(segment.name)
+                    formats.append(f"S{length}")
+                    offsets.append(position + 4)
+                position += 4 + length
+        if position > len(sample):
+            return None
+        return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': len(sample)})
+
+    def field_offset(self, buffer, name: str, offset: int = 0) -> Optional[int]:
+        """
+        Locate a fixed-size field, reading only the string and sequence lengths that precede it
+        """
+        field_struct = self.field_structs.get(name)
+        if field_struct is None:
+            return None
+
+        field_offset = self.static_offsets.get(name)
+        if field_offset is None:
+            position = 0
+            for segment in self.segments:
+                if segment.__class__ is _FixedRun:
+                    run_struct, offsets = segment.layout(position % segment.alignment)
+                    if name in segment.names:
+                        field_offset = position + offsets[segment.names.index(name)]
+                        break
+                    position += run_struct.size
+                elif segment.__class__ is _StringField:
+                    position = _align(position, 4)
+                    if offset + position + 4 > len(buffer):
+                        return None
+                    position += 4 + _UINT32.unpack_from(buffer, offset + position)[0]
+                else:
+                    if segment.count is None and offset + _align(position, 4) + 4 > len(buffer):
+                        return None
+                    position, count = segment.locate(buffer, offset, position)
+                    position += count * segment.size
+
+        if offset + field_offset + field_struct.size > len(buffer):
+            return None
+        return offset + field_offset
+
+    def view(self, buffer, offset: int = 0) -> 'UCDRView':
+        """
+        Create a lazy zero-copy view of one message
+        """
+        return UCDRView(self, buffer, offset)
+
+    def patch_into(self, buffer, name: str, value: Any, offset: int = 0) -> Optional[int]:
+        """
+        Overwrite one fixed-size field in a writable buffer, returning its absolute offset
+        """
+        field_offset = self.field_offset(buffer, name, offset)
+        if field_offset is not None:
+            self.field_structs[name].pack_into(buffer, field_offset, value)
+        return field_offset
+
+class UCDRView:
+    """
+    Lazy zero-copy view over one ucdr message
+    Segment offsets are resolved on first access, walking only as far as needed,
+    and values are decoded only when read: view.temperature_value or view['accuracy'].
+    raw(field) returns the field's bytes as a memoryview slice without copying.
+    """
+
+    __slots__ = ('_codec', '_buffer', '_offset', '_starts')
+
+    def __init__(self, codec: UCDRCodec, buffer, offset: int = 0):
+        self._codec = codec
+        self._buffer = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        self._offset = offset
+        # Relative start position of each segment resolved so far
+        self._starts = [0]
+
+    def _locate(self, name: str) -> Optional[Tuple[Any, int, int]]:
+        """
+        Resolve (segment, start, end) of a field, None if the message is truncated before it
+        """
+        segment_index, run_index = self._codec.field_segments[name]
+        starts = self._starts
+        buffer = self._buffer
+        offset = self._offset
+        segments = self._codec.segments
+        try:
+            while len(starts) <= segment_index:
+                starts.append(segments[len(starts) - 1].end(buffer, offset, starts[-1]))
+            segment = segments[segment_index]
+            start, end = segment.extent(buffer, offset, starts[segment_index], run_index)
+        except struct.error:
+            return None
+        if end > len(buffer):
+            return None
+        return segment, start, end
+
+    def __getitem__(self, name: str) -> Any:
+        located = self._locate(name)
+        if located is None:
+            return None
+        segment, start, end = located
+        if segment.__class__ is _FixedRun:
+            return self._codec.field_structs[name].unpack_from(self._buffer, start)[0]
+        if segment.__class__ is _StringField:
+            return str(self._buffer[start:end], 'utf-8', 'ignore')
+        return segment.decode(self._buffer, start, (end - start) // segment.size)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def raw(self, name: str) -> Optional[memoryview]:
+        """
+        Get the field's bytes (string/sequence contents without the length prefix) without copying
+        """
+        located = self._locate(name)
+        if located is None:
+            return None
+        return self._buffer[located[1]:located[2]]
+
+    def offset(self, name: str) -> Optional[int]:
+        """
+        Get the absolute offset of a field's data in the underlying buffer
+        """
+        located = self._locate(name)
+        return located[1] if located is not None else None
+
+_CODEC_CACHE: Dict[Tuple[Tuple[str, str], ...], UCDRCodec] = {}
+
+def compile_schema(schema: Dict[str, str]) -> UCDRCodec:
+    """
+    Compile a schema into a UCDRCodec, cached per distinct schema
+    """
+    key = tuple(schema.items())
+    codec = _CODEC_CACHE.get(key)
+    if codec is None:
+        codec = UCDRCodec(schema)
+        _CODEC_CACHE[key] = codec
+    return codec
+
+def find_temperature_record(payload) -> Optional[int]:
+    """
+    Find the start of a temperature record (topic_id + name length guard) with one C-level search
+    """
+    offset = find_pattern(payload, _TEMPERATURE_RECORD_PATTERN)
+    return offset if offset >= 0 else None
+
+def record_field_offset(codec: UCDRCodec, name: str, topic_name: str) -> Optional[int]:
+    """
+    Offset of a fixed-size field from the start of a topic record (topic_id, topic_name, ...)
+    whose name is known, as the record guard pins it; None if the offset depends on other data
+    """
+    if name not in codec.field_structs or list(codec.schema)[:2] != ['topic_id', 'topic_name']:
+        return None
+    position = 0
+    for segment in codec.segments:
+        if segment.__class__ is _FixedRun:
+            run_struct, offsets = segment.layout(position % segment.alignment)
+            if name in segment.names:
+                return position + offsets[segment.names.index(name)]
+            position += run_struct.size
+        elif segment.__class__ is _StringField and segment.name == 'topic_name':
+            position = _align(position, 4) + 4 + len(topic_name.encode('utf-8'))
+        elif segment.__class__ is _ArrayField and segment.count is not None:
+            position, count = segment.locate(None, 0, position)
+            position += count * segment.size
+        else:
+            return None
+    return None
+
+# Temperature value inside a record found by find_temperature_record
+TEMPERATURE_VALUE_OFFSET = record_field_offset(compile_schema(TEMPERATURE_SCHEMA), 'temperature_value',
+                                               TEMPERATURE_TOPIC_NAME)
+
+class FieldOffsetCache:
+    """
+    Per-flow cache of where a topic record starts inside a payload
+    Keyed by (source service, message type, payload length); a cached offset is only
+    trusted after a cheap guard check of the topic id and name length at that offset.
+    """
+
+    def __init__(self, topic_id: int = TEMPERATURE_TOPIC_ID, topic_name: str = TEMPERATURE_TOPIC_NAME,
+                 max_entries: int = 4096):
+        self.guard = (topic_id, len(topic_name.encode('utf-8')))
+        self.max_entries = max_entries
+        self.offsets = {}
+        self.hits = 0
+        self.misses = 0
+
+    def locate(self, payload, flow_key: Optional[Tuple[int, int, int]], scan) -> Optional[int]:
+        """
+        Return the record offset for this flow, falling back to `scan(payload)` on a miss
+        """
+        if flow_key is None:
+            return scan(payload)
+
+        offset = self.offsets.get(flow_key)
+        if offset is not None and _RECORD_GUARD.unpack_from(payload, offset) == self.guard:
+            self.hits += 1
+            return offset
+
+        self.misses += 1
+        offset = scan(payload)
+        if offset is not None:
+            if len(self.offsets) >= self.max_entries:
+                self.offsets.clear()
+            self.offsets[flow_key] = offset
+        return offset
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache hit/miss counters
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.offsets)}
+
+    def clear(self):
+        """
+        Drop cached offsets and reset counters
+        """
+        self.offsets.clear()
+        self.hits = 0
+        self.misses = 0
+
 class UCDRHandler:
     """
     Advanced ucdr (microCDR) Serialization Handler
@@ -28,68 +677,49 @@ class UCDRHandler:
     
     def __init__(self, logger=None):
         self.logger = logger or logging.getLogger(__name__)
-        self.data_types = {
-            'float32': {'size': 4, 'alignment': 4, 'unpack': '<f', 'pack': '<f'},
-            'float64': {'size': 8, 'alignment': 8, 'unpack': '<d', 'pack': '<d'},
-            'int32': {'size': 4, 'alignment': 4, 'unpack': '<i', 'pack': '<i'},
-            'uint32': {'size': 4, 'alignment': 4, 'unpack': '<I', 'pack': '<I'},
-            'int16': {'size': 2, 'alignment': 2, 'unpack': '<h', 'pack': '<h'},
-            'uint16': {'size': 2, 'alignment': 2, 'unpack': '<H', 'pack': '<H'},
-            'int8': {'size': 1, 'alignment': 1, 'unpack': '<b', 'pack': '<b'},
-            'uint8': {'size': 1, 'alignment': 1, 'unpack': '<B', 'pack': '<B'},
-            'string': {'size': -1, 'alignment': 4, 'unpack': None, 'pack': None}
-        }
+        self.data_types = UCDR_DATA_TYPES
+        self.offset_cache = FieldOffsetCache()
+        self.topic_schemas = dict(TOPIC_SCHEMAS)
+        
+    def compile_schema(self, schema: Dict[str, str]) -> UCDRCodec:
+        """
+        Compile schema into a cached codec with precomputed field layout
+        """
+        codec = compile_schema(schema)
+        for field_type in codec.unknown_types:
+            self.logger.warning(f"Unknown data type: {field_type}")
+        return codec
+        
+    def register_topic_schemas(self, schemas: Dict[str, Dict[str, str]]):
+        """
+        Make additional topic schemas resolvable by name, keeping existing ones
+        """
+        for name, schema in schemas.items():
+            self.topic_schemas.setdefault(name, schema)
+        
+    def view(self, data, schema: Dict[str, str]) -> UCDRView:
+        """
+        Create a lazy view that decodes fields only when they are accessed
+        """
+        return self.compile_schema(schema).view(data)
         
     def parse_ucdr_data(self, data: bytes, schema: Dict[str, str]) -> Dict[str, UCDRField]:
         """
         Parse ucdr serialized data according to schema
         """
-        fields = {}
-        offset = 0
-        
         try:
-            for field_name, field_type in schema.items():
-                if field_type not in self.data_types:
-                    self.logger.warning(f"Unknown data type: {field_type}")
-                    continue
-                
-                type_info = self.data_types[field_type]
-                
-                # Handle alignment
-                if type_info['alignment'] > 1:
-                    offset = self._align_offset(offset, type_info['alignment'])
-                
-                # Handle string type (variable length)
-                if field_type == 'string':
-                    if offset + 4 <= len(data):
-                        string_length = struct.unpack('<I', data[offset:offset+4])[0]
-                        offset += 4
-                        if offset + string_length <= len(data):
-                            string_value = data[offset:offset+string_length].decode('utf-8', errors='ignore')
-                            fields[field_name] = UCDRField(
-                                name=field_name,
-                                data_type=field_type,
-                                offset=offset - 4,  # Include length field
-                                size=4 + string_length,
-                                value=string_value,
-                                alignment=type_info['alignment']
-                            )
-                            offset += string_length
-                else:
-                    # Handle fixed-size types
-                    if offset + type_info['size'] <= len(data):
-                        value = struct.unpack(type_info['unpack'], data[offset:offset+type_info['size']])[0]
-                        fields[field_name] = UCDRField(
-                            name=field_name,
-                            data_type=field_type,
-                            offset=offset,
-                            size=type_info['size'],
-                            value=value,
-                            alignment=type_info['alignment']
-                        )
-                        offset += type_info['size']
-            
-            return fields
+            codec = self.compile_schema(schema)
+            return {
+                name: UCDRField(
+                    name=name,
+                    data_type=field_type,
+                    offset=offset,
+                    size=size,
+                    value=value,
+                    alignment=codec.alignments[name]
+                )
+                for name, field_type, offset, size, value in codec.decode_fields(data)
+            }
             
         except Exception as e:
             self.logger.error(f"Failed to parse ucdr data: {e}")
@@ -100,101 +730,137 @@ class UCDRHandler:
         Serialize fields back to ucdr format
         """
         try:
-            # Sort fields by offset
-            sorted_fields = sorted(fields.values(), key=lambda x: x.offset)
-            
-            # Calculate total size
-            total_size = 0
-            for field in sorted_fields:
-                if field.data_type == 'string':
-                    total_size += 4 + len(field.value.encode('utf-8'))
-                else:
-                    total_size += field.size
-                total_size = self._align_offset(total_size, field.alignment)
-            
-            # Create buffer
-            buffer = bytearray(total_size)
-            offset = 0
-            
-            for field in sorted_fields:
-                # Handle alignment
-                if field.alignment > 1:
-                    offset = self._align_offset(offset, field.alignment)
-                
-                # Serialize field
-                if field.data_type == 'string':
-                    # Write string length
-                    string_bytes = field.value.encode('utf-8')
-                    struct.pack_into('<I', buffer, offset, len(string_bytes))
-                    offset += 4
-                    # Write string data
-                    buffer[offset:offset+len(string_bytes)] = string_bytes
-                    offset += len(string_bytes)
-                else:
-                    type_info = self.data_types[field.data_type]
-                    struct.pack_into(type_info['pack'], buffer, offset, field.value)
-                    offset += field.size
+            # Fields from parse_ucdr_data are already in offset order
+            ordered = list(fields.values())
+            if any(ordered[i].offset > ordered[i + 1].offset for i in range(len(ordered) - 1)):
+                ordered.sort(key=lambda x: x.offset)
             
-            return bytes(buffer)
+            codec = self.compile_schema({field.name: field.data_type for field in ordered})
+            return codec.pack({field.name: field.value for field in ordered})
             
         except Exception as e:
             self.logger.error(f"Failed to serialize ucdr data: {e}")
             return b''
     
-    def modify_temperature_in_ucdr(self, data: bytes, new_temperature: float) -> Optional[bytes]:
+    def decode_batch(self, payloads: List[bytes], topic: Union[str, Dict[str, str]]) -> Dict[str, np.ndarray]:
+        """
+        Decode many payloads of a fixed-layout topic into columnar arrays.
+        Payloads are bucketed by length and each bucket is decoded with a single
+        np.frombuffer call; rows whose string or sequence lengths differ from the bucket
+        layout fall back to per-message decoding. Fixed arrays become 2-D columns and
+        sequences object columns of arrays. The 'valid' column flags decoded rows.
+        """
+        schema = self.topic_schemas[topic] if isinstance(topic, str) else topic
+        codec = self.compile_schema(schema)
+        count = len(payloads)
+        
+        columns = {'valid': np.zeros(count, dtype=bool)}
+        prefixed_fields = []
+        sequence_fields = []
+        for name in codec.names:
+            element, element_count = parse_ucdr_type(codec.schema[name])
+            numpy_type = self.data_types[element]['numpy']
+            if numpy_type is None:
+                prefixed_fields.append(name)
+                columns[name] = np.full(count, '', dtype=object)
+            elif element_count == -1:
+                prefixed_fields.append(name)
+                sequence_fields.append(name)
+                columns[name] = np.empty(count, dtype=object)
+            elif element_count is not None:
+                columns[name] = np.zeros((count, element_count), dtype=numpy_type)
+            else:
+                columns[name] = np.zeros(count, dtype=numpy_type)
+        
+        # Bucket row indices by payload length
+        lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=count)
+        order = np.argsort(lengths, kind='stable')
+        bucket_lengths, bucket_starts = np.unique(lengths[order], return_index=True)
+        
+        for length, rows in zip(bucket_lengths.tolist(), np.split(order, bucket_starts[1:])):
+            dtype = codec.numpy_dtype(payloads[rows[0]]) if length else None
+            leftovers = rows
+            if dtype is not None:
+                records = np.frombuffer(b''.join([payloads[i] for i in rows.tolist()]), dtype=dtype)
+                
+                # Rows must share the sample's string and sequence lengths to fit this dtype
+                matches = np.ones(len(rows), dtype=bool)
+                for name in prefixed_fields:
+                    prefix = records[f"{name}.length"]
+                    matches &= prefix == prefix[0]
+                
+                good = rows[matches]
+                for name in codec.names:
+                    if name in sequence_fields:
+                        column = columns[name]
+                        for index, value in zip(good.tolist(), records[name][matches]):
+                            column[index] = value.copy()
+                    elif name in prefixed_fields:
+                        if name in dtype.names:
+                            # Topic names repeat heavily, so decode each distinct value once
+                            raw, inverse = np.unique(records[name][matches], return_inverse=True)
+                            decoded = np.array([value.decode('utf-8', 'ignore') for value in raw.tolist()], dtype=object)
+                            columns[name][good] = decoded[inverse.ravel()]
+                    else:
+                        columns[name][good] = records[name][matches]
+                columns['valid'][good] = True
+                leftovers = rows[~matches]
+            
+            for index in leftovers.tolist():
+                values = codec.unpack(payloads[index])
+                if values is None:
+                    continue
+                for name, value in values.items():
+                    if name in sequence_fields:
+                        value = np.array(value, dtype=self.data_types[parse_ucdr_type(codec.schema[name])[0]]['numpy'])
+                    columns[name][index] = value
+                columns['valid'][index] = True
+        
+        return columns
+    
+    def modify_temperature_in_ucdr(self, data: bytes, new_temperature: float,
+                                   flow_key: Optional[Tuple[int, int, int]] = None) -> Optional[bytes]:
         """
         Modify temperature value in ucdr serialized data
+        The temperature record is resolved through the per-flow offset cache when a flow key is given.
         """
         try:
-            # ASOA temperature schema based on t_simple.hpp
-            temperature_schema = {
-                'topic_id': 'uint32',
-                'topic_name': 'string',
-                'temperature_value': 'float32',
-                'accuracy': 'float32'
-            }
-            
-            # Parse the data
-            fields = self.parse_ucdr_data(data, temperature_schema)
+            record_offset = self.offset_cache.locate(data, flow_key, find_temperature_record)
+            if record_offset is None:
+                return None
             
-            if 'temperature_value' in fields:
-                # Modify temperature value
-                fields['temperature_value'].value = new_temperature
-                
-                # Reserialize
-                return self.serialize_ucdr_data(fields)
-            else:
-                # Try to find temperature data in raw bytes
-                return self._find_and_modify_temperature_raw(data, new_temperature)
+            # Patch a private copy in place instead of parsing and reserializing
+            buffer = bytearray(data)
+            if self.patch_temperature_in_ucdr(buffer, new_temperature, record_offset=record_offset) is None:
+                return None
+            return bytes(buffer)
                 
         except Exception as e:
             self.logger.error(f"Failed to modify temperature in ucdr: {e}")
             return None
     
-    def _find_and_modify_temperature_raw(self, data: bytes, new_temperature: float) -> Optional[bytes]:
+    def patch_temperature_in_ucdr(self, buffer: Union[bytearray, memoryview], new_temperature: float,
+                                  offset: Optional[int] = None, record_offset: Optional[int] = None) -> Optional[int]:
         """
-        Find and modify temperature value in raw bytes
+        Overwrite the temperature value in a writable buffer without intermediate objects.
+        The value is located inside the temperature record at `record_offset`, which is searched
+        for when not given; pass a previously returned offset to skip the lookup entirely.
+        Returns the offset of the patched value, or None if it could not be located.
         """
         try:
-            # Look for temperature topic ID (15) followed by float value
-            temp_topic_id = 15
-            modified_data = bytearray(data)
-            
-            for i in range(len(data) - 8):
-                if i + 4 <= len(data):
-                    potential_topic_id = struct.unpack('<I', data[i:i+4])[0]
-                    if potential_topic_id == temp_topic_id:
-                        # Found temperature data, modify the value
-                        if i + 8 <= len(data):
-                            temp_bytes = struct.pack('<f', new_temperature)
-                            modified_data[i+4:i+8] = temp_bytes
-                            self.logger.info(f"Modified temperature at offset {i+4}: {new_temperature}°C")
-                            return bytes(modified_data)
-            
-            return None
+            if offset is None:
+                if record_offset is None:
+                    record_offset = find_temperature_record(buffer)
+                    if record_offset is None:
+                        return None
+                offset = record_offset + TEMPERATURE_VALUE_OFFSET
+                if offset + 4 > len(buffer):
+                    return None
+            _FLOAT32.pack_into(buffer, offset, new_temperature)
+            return offset
             
         except Exception as e:
-            self.logger.error(f"Failed to find and modify temperature raw: {e}")
+            self.logger.error(f"Failed to patch temperature in ucdr: {e}")
             return None
     
     def extract_temperature_from_ucdr(self, data: bytes) -> Optional[float]:
@@ -205,26 +871,17 @@ class UCDRHandler:
             # For the test data we created, the temperature is at a specific offset
             # In real ASOA data, we need to parse the ucdr structure properly
             
-            # Try structured parsing first
-            temperature_schema = {
-                'topic_id': 'uint32',
-                'topic_name': 'string',
-                'temperature_value': 'float32',
-                'accuracy': 'float32'
-            }
-            
-            fields = self.parse_ucdr_data(data, temperature_schema)
-            if 'temperature_value' in fields:
-                return fields['temperature_value'].value
+            # Try structured parsing first, decoding only the temperature field
+            temperature = compile_schema(TEMPERATURE_SCHEMA).view(data).temperature_value
+            if temperature is not None:
+                return temperature
             
             # Fallback to raw search for temperature topic ID (15)
-            temp_topic_id = 15
-            for i in range(len(data) - 8):
-                if i + 4 <= len(data):
-                    potential_topic_id = struct.unpack('<I', data[i:i+4])[0]
-                    if potential_topic_id == temp_topic_id:
-                        if i + 8 <= len(data):
-                            return struct.unpack('<f', data[i+4:i+8])[0]
+            record_offset = find_temperature_record(data)
+            if record_offset is not None:
+                value_offset = record_offset + TEMPERATURE_VALUE_OFFSET
+                if value_offset + 4 <= len(data):
+                    return _FLOAT32.unpack_from(data, value_offset)[0]
             
             # If we created the data ourselves, temperature should be at offset 12 (after topic_id and name)
             if len(data) >= 16:
@@ -272,9 +929,7 @@ class UCDRHandler:
         """
         Align offset to specified alignment boundary
         """
-        if alignment <= 1:
-            return offset
-        return (offset + alignment - 1) & ~(alignment - 1)
+        return _align(offset, alignment)
     
     def get_ucdr_size(self, schema: Dict[str, str]) -> int:
         """
@@ -283,11 +938,16 @@ class UCDRHandler:
         total_size = 0
         
         for field_type in schema.values():
-            if field_type in self.data_types:
-                type_info = self.data_types[field_type]
-                if type_info['size'] > 0:  # Fixed size
+            parsed = parse_ucdr_type(field_type)
+            if parsed is not None:
+                element, count = parsed
+                type_info = self.data_types[element]
+                if count == -1:  # Variable size (sequence)
+                    total_size = self._align_offset(total_size, 4)
+                    total_size += 4  # Length field
+                elif type_info['size'] > 0:  # Fixed size
                     total_size = self._align_offset(total_size, type_info['alignment'])
-                    total_size += type_info['size']
+                    total_size += type_info['size'] * (count or 1)
                 else:  # Variable size (string)
                     total_size = self._align_offset(total_size, type_info['alignment'])
                     total_size += 4  # Length field